@@ -0,0 +1,155 @@
+import os
+import threading
+import numpy as np
+from scipy.sparse.linalg import svds
+
+EMBEDDING_DIM = int(os.getenv("WATCHX_ANN_DIM", "64"))
+DEFAULT_NPROBE = int(os.getenv("WATCHX_ANN_NPROBE", "8"))  # Starting point when the recommender tunes nprobe
+MIN_LIST_SIZE = 64  # Vectors per list the default list count aims for at least, on small catalogs
+
+# Learns a projection from sparse feature columns to dense embeddings by truncated SVD, so
+# items sharing correlated features (a franchise's cast and keywords) land close together.
+# Returns a (n_features, dim) float32 matrix; rows @ projection gives the embeddings.
+def fit_projection(matrix, dim=EMBEDDING_DIM):
+    dim = min(dim, min(matrix.shape) - 1)
+    if dim < 1:
+        return np.eye(matrix.shape[1], dtype=np.float32)
+    _, _, vt = svds(matrix.astype(np.float64), k=dim)
+    return np.ascontiguousarray(vt.T, dtype=np.float32)
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+# Spherical k-means on (a sample of) unit vectors; returns unit-length centroids
+def kmeans(vectors, n_clusters, iterations=10, sample_size=50000, seed=0):
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False)]
+    centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = np.bincount(assignment, minlength=n_clusters) == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]  # Reseed empty clusters
+        centroids = normalize(sums)
+    return centroids
+
+# Inverted-file (IVF) index for cosine similarity over unit vectors.
+# Vectors are clustered around coarse centroids and stored contiguously per cluster; a query
+# scans only the `nprobe` closest clusters, so nprobe trades recall for latency. Items added
+# after the build go to an in-memory delta segment until compact() folds them in.
+class IVFIndex:
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.centroids = np.zeros((0, dim), np.float32)
+        self.offsets = np.zeros(1, np.int64)  # List i occupies [offsets[i], offsets[i + 1])
+        self.ids = np.zeros(0, np.int64)
+        self.vectors = np.zeros((0, dim), np.float32)
+        self.delta_ids = []
+        self.delta_vectors = []
+        self.delta_lists = []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids) + len(self.delta_ids)
+
+    def build(self, vectors, ids=None, n_lists=None):
+        vectors = normalize(vectors)
+        ids = np.arange(len(vectors), dtype=np.int64) if ids is None else np.asarray(ids, np.int64)
+        # 4 * sqrt(n) lists, but no fewer than MIN_LIST_SIZE vectors to a list, so a small
+        # catalog is not split into lists of a dozen items that any nprobe scans too little of
+        n_lists = n_lists or max(1, min(int(4 * np.sqrt(len(vectors))), len(vectors) // MIN_LIST_SIZE))
+        self.centroids = kmeans(vectors, n_lists) if len(vectors) else np.zeros((0, self.dim), np.float32)
+        self._store(vectors, ids, self._assign(vectors))
+        return self
+
+    def _assign(self, vectors):
+        if not len(vectors):
+            return np.zeros(0, np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def _store(self, vectors, ids, assignment):
+        order = np.argsort(assignment, kind="stable")
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.ids = ids[order]
+        counts = np.bincount(assignment, minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.delta_ids, self.delta_vectors, self.delta_lists = [], [], []
+
+    # Adds vectors without reclustering; they are searchable immediately
+    def add(self, vectors, ids):
+        vectors = normalize(np.atleast_2d(vectors))
+        if not len(self.centroids):
+            self.build(vectors, ids)
+            return
+        assignment = self._assign(vectors)
+        with self.lock:
+            self.delta_vectors.extend(vectors)
+            self.delta_ids.extend(int(i) for i in ids)
+            self.delta_lists.extend(int(a) for a in assignment)
+
+    # Folds the delta segment into the contiguous per-list arrays
+    def compact(self):
+        with self.lock:
+            if not self.delta_ids:
+                return
+            lists = np.repeat(np.arange(len(self.centroids)), np.diff(self.offsets))
+            vectors = np.vstack([np.asarray(self.vectors), np.asarray(self.delta_vectors, np.float32)])
+            ids = np.concatenate([np.asarray(self.ids), np.asarray(self.delta_ids, np.int64)])
+            self._store(vectors, ids, np.concatenate([lists, np.asarray(self.delta_lists, np.int64)]))
+
+    # Returns (ids, scores) of the approximate top-k for one query, best first
+    def search(self, query, k=10, nprobe=None):
+        query = normalize(query).ravel()
+        nprobe = min(nprobe or DEFAULT_NPROBE, len(self.centroids))
+        if nprobe == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        ranges = [np.arange(self.offsets[p], self.offsets[p + 1]) for p in probe]
+        rows = np.concatenate(ranges) if ranges else np.zeros(0, np.int64)
+        candidate_ids = self.ids[rows]
+        scores = self.vectors[rows] @ query
+        with self.lock:
+            if self.delta_ids:
+                in_probe = np.isin(np.asarray(self.delta_lists), probe)
+                if in_probe.any():
+                    delta_vectors = np.asarray(self.delta_vectors, np.float32)[in_probe]
+                    candidate_ids = np.concatenate([candidate_ids, np.asarray(self.delta_ids, np.int64)[in_probe]])
+                    scores = np.concatenate([scores, delta_vectors @ query])
+        k = min(k, len(scores))
+        if k == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return candidate_ids[top], scores[top]
+
+    def save(self, directory):
+        self.compact()
+        os.makedirs(directory, exist_ok=True)
+        for name in ("centroids", "offsets", "ids", "vectors"):
+            tmp_path = os.path.join(directory, f"{name}.tmp.npy")
+            np.save(tmp_path, np.asarray(getattr(self, name)))
+            os.replace(tmp_path, os.path.join(directory, f"{name}.npy"))
+
+    # Loads an index; the vector and id arrays are memory-mapped rather than read into memory
+    @classmethod
+    def load(cls, directory, mmap=True):
+        centroids = np.load(os.path.join(directory, "centroids.npy"))
+        index = cls(centroids.shape[1])
+        index.centroids = centroids
+        index.offsets = np.load(os.path.join(directory, "offsets.npy"))
+        mode = "r" if mmap else None
+        index.ids = np.load(os.path.join(directory, "ids.npy"), mmap_mode=mode)
+        index.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mode)
+        return index
+
+# Exact top-k by brute force, for small catalogs and for measuring recall
+def exact_search(vectors, query, k=10):
+    scores = vectors @ normalize(query).ravel()
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top, scores[top]
@@ -0,0 +1,227 @@
+# End-to-end benchmark of the grid, category switch, search and detail flows.
+#
+# The app runs headless (offscreen Qt) against mock_tmdb.py, one process per run so memory
+# and the in-process caches start clean. "cold" runs start from an empty cache directory;
+# "warm" runs reuse the directory a cold run filled, so JSON and images come from disk.
+# Per run it records:
+#   time_to_json_ms    response applied to the grid model or the dialog
+#   first_tile_ms      first paint of the grid (or dialog) with content
+#   all_images_ms      every image the flow put on screen decoded and shown
+#   widgets            QApplication.allWidgets() once the flow is done
+#   peak_rss_mb        peak resident set size of the process
+# Results are written as JSON; --compare prints the change against an earlier results file
+# and exits non-zero if a median regressed by more than --threshold.
+#
+# Usage: python benchmarks/bench_flows.py [--flows grid search] [--repeat 3] [--latency-ms 50]
+#                                         [--out results.json] [--compare baseline.json]
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+FLOWS = ("grid", "category", "search", "detail")
+VARIANTS = ("cold", "warm")
+METRICS = ("time_to_json_ms", "first_tile_ms", "all_images_ms", "widgets", "peak_rss_mb")
+LOWER_IS_BETTER = set(METRICS)
+SEARCH_QUERY = "star wars"
+DETAIL_ID = 550
+
+# Child process: runs one flow and prints its metrics as JSON on the last line of stdout
+def run_child(flow, timeout):
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QObject, QEvent
+    import movie_recommender as mr
+
+    app = QApplication(sys.argv)
+    marks = {}
+    started = [None]
+    target = [None]
+
+    def mark(name):
+        if started[0] is not None and name not in marks:
+            marks[name] = (time.perf_counter() - started[0]) * 1000
+
+    # Catches the first paint of the flow's widget (or a child of it) once data is in
+    class PaintProbe(QObject):
+        def eventFilter(self, watched, event):
+            if (event.type() == QEvent.Paint and "time_to_json_ms" in marks and target[0] is not None
+                    and watched.isWidgetType() and (watched is target[0] or target[0].isAncestorOf(watched))):
+                mark("first_tile_ms")
+            return False
+
+    probe = PaintProbe()
+    app.installEventFilter(probe)
+
+    display_details = mr.DetailDialog.display_details
+    def timed_display_details(self, data):
+        display_details(self, data)
+        mark("time_to_json_ms")
+    mr.DetailDialog.display_details = timed_display_details
+
+    def wait_until(condition):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                return False
+            app.processEvents()
+            time.sleep(0.001)
+        return True
+
+    window = mr.TMDbGUI()
+    window.resize(1280, 900)
+    window.show()
+    loader = mr.ImageLoader.instance()
+    scheduler = mr.RequestScheduler.instance()
+    # Let startup (first grid, recommender, catalog store) finish before timing anything
+    wait_until(lambda: window.started and not scheduler.tasks and not loader.pending
+               and not window.today_model.loading)
+
+    model = window.today_model
+    model.loaded.connect(lambda count: mark("time_to_json_ms"))
+    dialog = None
+    started[0] = time.perf_counter()
+    if flow == "grid":
+        target[0] = window.today_view
+        window.load_content("movie", "popular", "day")
+    elif flow == "category":
+        target[0] = window.today_view
+        window.switch_category("TV Shows")
+    elif flow == "search":
+        target[0] = window.today_view
+        window.search_input.setText(SEARCH_QUERY)
+        window.search_content()
+    else:
+        dialog = mr.DetailDialog("movie", DETAIL_ID, window.client, window)
+        target[0] = dialog
+        dialog.show()
+
+    def images_done():
+        if "first_tile_ms" not in marks or loader.pending:
+            return False
+        return dialog is None or not dialog.lazy_timer.isActive()
+
+    complete = wait_until(images_done)
+    mark("all_images_ms")
+    marks["widgets"] = len(app.allWidgets())
+    marks["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    marks["complete"] = complete
+    print(json.dumps(marks))
+
+# Runs the child for one flow and variant and returns its metrics
+def run_once(flow, cache_dir, server_url, timeout):
+    env = dict(os.environ, WATCHX_CACHE_DIR=cache_dir, WATCHX_TMDB_API_HOST=server_url,
+               WATCHX_TMDB_IMAGE_HOST=server_url, WATCHX_PREFETCH_CONCURRENCY="0",
+               TMDB_API_KEY="bench", YOUTUBE_API_KEY="bench", RAPIDAPI_KEY="bench")
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", flow, "--timeout", str(timeout)],
+                            env=env, capture_output=True, text=True, timeout=timeout * 3)
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        raise RuntimeError(f"{flow} run failed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+def summarize(runs):
+    summary = {}
+    for run in runs:
+        cell = summary.setdefault(run["flow"], {}).setdefault(run["variant"], {})
+        for metric in METRICS:
+            if metric in run:
+                cell.setdefault(metric, []).append(run[metric])
+    for variants in summary.values():
+        for cell in variants.values():
+            for metric, values in cell.items():
+                cell[metric] = statistics.median(values)
+    return summary
+
+def print_summary(summary):
+    print(f"{'flow':<10}{'variant':<8}" + "".join(f"{m:>17}" for m in METRICS))
+    for flow, variants in summary.items():
+        for variant, cell in variants.items():
+            cells = "".join(f"{cell[m]:>17.1f}" if m in cell else f"{'-':>17}" for m in METRICS)
+            print(f"{flow:<10}{variant:<8}{cells}")
+
+# Prints the change of every median against a baseline; returns the regressions
+def compare(summary, baseline, threshold):
+    regressions = []
+    print(f"\n{'flow':<10}{'variant':<8}{'metric':<17}{'baseline':>11}{'now':>11}{'change':>9}")
+    for flow, variants in summary.items():
+        for variant, cell in variants.items():
+            for metric, value in cell.items():
+                before = baseline.get(flow, {}).get(variant, {}).get(metric)
+                if not before:
+                    continue
+                change = (value - before) / before
+                flag = ""
+                if metric in LOWER_IS_BETTER and change > threshold:
+                    flag = "  REGRESSION"
+                    regressions.append((flow, variant, metric, change))
+                print(f"{flow:<10}{variant:<8}{metric:<17}{before:>11.1f}{value:>11.1f}{change:>+8.0%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end flow benchmark against the mock TMDb server")
+    parser.add_argument("--flows", nargs="+", choices=FLOWS, default=list(FLOWS))
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mock server latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--synthetic", action="store_true", help="ignore the recorded fixtures (replayed by default)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds a flow may take")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression")
+    parser.add_argument("--child", choices=FLOWS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.timeout)
+        return
+
+    import mock_tmdb
+    server = mock_tmdb.start_server(faults=mock_tmdb.FaultPolicy(args.latency_ms, args.jitter_ms, seed=0),
+                                    replay=False if args.synthetic else None)
+    runs = []
+    try:
+        for flow in args.flows:
+            for _ in range(args.repeat):
+                cache_dir = tempfile.mkdtemp(prefix="watchx-bench-")
+                try:
+                    for variant in VARIANTS:
+                        run = run_once(flow, cache_dir, server.url, args.timeout)
+                        if variant in args.variants:
+                            runs.append(dict(run, flow=flow, variant=variant))
+                finally:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+    finally:
+        server.shutdown()
+
+    summary = summarize(runs)
+    results = {
+        "meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "platform": platform.platform(), "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                 "repeat": args.repeat, "replay": server.replay},
+        "summary": summary,
+        "runs": runs,
+    }
+    print_summary(summary)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(summary, json.load(f)["summary"], args.threshold)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Startup benchmark: import time and time to the first painted grid.
+#
+# Each run starts the app in a fresh process with WATCHX_STARTUP_PROFILE=exit, which prints
+# the startup marks to stderr and closes the window after the first grid paint. "cold" runs
+# start from an empty cache directory; "warm" runs reuse the snapshot the previous run saved
+# on exit (seeded with synthetic items if the cold run never reached the network).
+#
+# Usage: python benchmarks/bench_startup.py [--repeat 5] [--timeout 20]
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MARKS = ("imports", "window shown", "snapshot loaded", "first grid paint")
+MARK_RE = re.compile(r"^startup: (.+) ([0-9.]+) ms$")
+
+def seed_snapshot(cache_dir, count=20):
+    items = [{"id": i, "title": f"Movie title number {i}", "vote_average": 7.3,
+              "release_date": "2024-05-01", "poster_path": None} for i in range(count)]
+    os.makedirs(os.path.join(cache_dir, "snapshot"), exist_ok=True)
+    with open(os.path.join(cache_dir, "snapshot", "grid.json"), "w", encoding="utf-8") as f:
+        json.dump({"content_type": "movie", "items": items, "ratio": 1.0, "thumbnails": {}}, f)
+
+# Runs the app once; returns {mark: ms} plus the process wall time
+def run_once(cache_dir, timeout):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", WATCHX_STARTUP_PROFILE="exit",
+               WATCHX_CACHE_DIR=cache_dir, TMDB_API_KEY=os.getenv("TMDB_API_KEY", "bench"),
+               YOUTUBE_API_KEY=os.getenv("YOUTUBE_API_KEY", "bench"),
+               RAPIDAPI_KEY=os.getenv("RAPIDAPI_KEY", "bench"))
+    start = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable, "movie_recommender.py"], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=timeout)
+        stderr = result.stderr
+    except subprocess.TimeoutExpired as e:
+        stderr = e.stderr.decode() if isinstance(e.stderr, bytes) else (e.stderr or "")
+    marks = {"process": (time.perf_counter() - start) * 1000}
+    for line in stderr.splitlines():
+        match = MARK_RE.match(line.strip())
+        if match:
+            marks[match.group(1)] = float(match.group(2))
+    return marks
+
+def summarize(runs):
+    keys = ("process",) + MARKS
+    return {key: statistics.median([run[key] for run in runs if key in run])
+            for key in keys if any(key in run for run in runs)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=20.0, help="seconds before a run is abandoned")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="watchx-startup-")
+    try:
+        cold = []
+        for _ in range(args.repeat):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(run_once(cache_dir, args.timeout))
+        if not os.path.exists(os.path.join(cache_dir, "snapshot", "grid.json")):
+            seed_snapshot(cache_dir)
+        warm = [run_once(cache_dir, args.timeout) for _ in range(args.repeat)]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    results = {"cold": summarize(cold), "warm": summarize(warm)}
+    print(f"{'mark':<20}{'cold ms':>12}{'warm ms':>12}")
+    for key in ("process",) + MARKS:
+        cells = [f"{results[case][key]:>12.1f}" if key in results[case] else f"{'-':>12}" for case in ("cold", "warm")]
+        print(f"{key:<20}{''.join(cells)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# Before/after benchmark for grid tile construction.
+#
+# "before" rebuilds the widget-per-tile grid the way display_content used to, with a fresh
+# setStyleSheet string on every tile and child label/button. "after" fills the painted
+# ContentGridView and renders one frame. Detail cards are compared the same way: per-widget
+# style sheets versus object names resolved against the single DetailDialog style sheet.
+#
+# Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_tile_build.py [--tiles 12 100] [--repeat 5]
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import (QApplication, QWidget, QGridLayout, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QFrame)
+from PyQt5.QtCore import Qt
+import movie_recommender as mr
+
+TILE_STYLE = """
+    background-color: #222222;
+    border-radius: 10px;
+    padding: 15px;
+"""
+BUTTON_STYLE = """
+    QPushButton {
+        background: #FF0000;
+        color: white;
+        border-radius: 5px;
+        padding: 8px;
+        font-size: 14px;
+    }
+    QPushButton:hover {
+        background: #CC0000;
+    }
+"""
+
+def make_items(count):
+    return [{"id": i, "title": f"Movie title number {i}", "vote_average": 7.3,
+             "release_date": "2024-05-01", "poster_path": None} for i in range(count)]
+
+# Widget-per-tile grid with per-widget style sheets, as display_content built it
+def build_stylesheet_grid(items):
+    container = QWidget()
+    grid = QGridLayout(container)
+    for i, item in enumerate(items):
+        tile = QWidget()
+        tile.setStyleSheet(TILE_STYLE)
+        layout = QVBoxLayout(tile)
+        rating = QLabel(f"★ {int(item['vote_average'] * 10)}%")
+        rating.setStyleSheet("font-size: 16px; font-weight: bold; color: #FF0000; margin-top: 5px;")
+        title = QLabel(item["title"])
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: #FFFFFF;")
+        title.setWordWrap(True)
+        date = QLabel(item["release_date"])
+        date.setStyleSheet("font-size: 14px; color: #AAAAAA; margin-bottom: 5px;")
+        for label in (rating, title, date):
+            label.setAlignment(Qt.AlignCenter)
+            layout.addWidget(label)
+        buttons = QWidget()
+        button_layout = QHBoxLayout(buttons)
+        for text in ("Details", "❤ Favorite"):
+            button = QPushButton(text)
+            button.setStyleSheet(BUTTON_STYLE)
+            button_layout.addWidget(button)
+        layout.addWidget(buttons)
+        grid.addWidget(tile, i // 3, i % 3)
+    container.resize(1240, 800)
+    container.grab()  # Forces polish, layout and one paint
+    return container
+
+# Painted, virtualized grid
+def build_painted_grid(items):
+    model = mr.ContentGridModel("bench_grid")
+    delegate = mr.ContentTileDelegate(lambda content_type, item_id: False)
+    view = mr.ContentGridView(model, delegate)
+    view.resize(1240, 800)
+    model.set_items(items, "movie")
+    view.grab()
+    return view
+
+def build_cards(items, use_object_names):
+    dialog = QWidget()
+    if use_object_names:
+        dialog.setStyleSheet("QFrame#card { background-color: #333333; border-radius: 8px; padding: 10px; }"
+                             "QLabel#cardText { color: #FFFFFF; font-size: 14px; }")
+    layout = QHBoxLayout(dialog)
+    for item in items:
+        card = QFrame()
+        label = QLabel(item["title"])
+        if use_object_names:
+            card.setObjectName("card")
+            label.setObjectName("cardText")
+        else:
+            card.setStyleSheet("background: #333333; border-radius: 8px; padding: 10px;")
+            label.setStyleSheet("color: #FFFFFF; font-size: 14px;")
+        QVBoxLayout(card).addWidget(label)
+        layout.addWidget(card)
+    dialog.grab()
+    return dialog
+
+def measure(build, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        widget = build()
+        timings.append((time.perf_counter() - start) * 1000)
+        widget.deleteLater()
+        QApplication.processEvents()
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid tile build benchmark")
+    parser.add_argument("--tiles", type=int, nargs="+", default=[12, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    print(f"{'case':<34}{'tiles':>7}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for count in args.tiles:
+        items = make_items(count)
+        cases = (
+            ("grid build + first frame", lambda: build_stylesheet_grid(items), lambda: build_painted_grid(items)),
+            ("detail cards build + first frame", lambda: build_cards(items, False), lambda: build_cards(items, True)),
+        )
+        for name, before, after in cases:
+            before_ms = measure(before, args.repeat)
+            after_ms = measure(after, args.repeat)
+            print(f"{name:<34}{count:>7}{before_ms:>12.1f}{after_ms:>12.1f}{before_ms / after_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+from recommender import CATALOG_PATH
+from search_index import SearchIndex, build_search_index
+from tmdb_cache import CACHE_DIR, atomic_write
+
+# Columnar, memory-mapped copy of the local catalog, one table per content type.
+# Numeric fields live in typed .npy columns sorted by id, strings in a per-table interned
+# string table (one UTF-8 blob plus offsets) referenced by int32 indices, and genres as a
+# CSR pair of offsets and values. Opening a table maps the files without reading them, so
+# startup cost does not grow with the catalog and filters run as vectorised numpy masks.
+# Each build goes to a fresh generation directory named by a CURRENT pointer file, so a
+# rebuild never touches files another process (or this one) still has mapped.
+
+STORE_DIR = os.path.join(CACHE_DIR, "catalog_store")
+STORE_VERSION = 2  # Bumped when the on-disk layout changes; older tables are rebuilt
+CONTENT_TYPES = ("movie", "tv", "person")
+
+# TMDb field -> store column for each content type
+STRING_FIELDS = {
+    "movie": {"title": "title", "original_title": "original_title", "overview": "overview", "poster_path": "image_path"},
+    "tv": {"name": "title", "original_name": "original_title", "overview": "overview", "poster_path": "image_path"},
+    "person": {"name": "title", "profile_path": "image_path", "known_for_department": "department"},
+}
+DATE_FIELDS = {"movie": "release_date", "tv": "first_air_date", "person": "birthday"}
+NUMERIC_COLUMNS = {"id": np.int64, "vote_average": np.float32, "vote_count": np.int32,
+                   "popularity": np.float32, "date": np.int32}
+TOP_RATED_MIN_VOTES = 200  # Keeps one-vote 10/10 titles out of top-rated lists
+REBUILD_FRACTION = 0.1  # Catalog growth since the build, relative to its size then, that forces a rebuild
+
+# "2024-05-15" -> 20240515; 0 when missing or malformed
+def encode_date(value):
+    digits = (value or "").replace("-", "")
+    return int(digits) if len(digits) == 8 and digits.isdigit() else 0
+
+def decode_date(value):
+    value = int(value)
+    return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}" if value else ""
+
+# Yields (content_type, item) for every catalog line, oldest first
+def _read_lines(catalog_path):
+    if not os.path.exists(catalog_path):
+        return
+    with open(catalog_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if item.get("media_type") in CONTENT_TYPES and "id" in item:
+                yield item["media_type"], item
+
+# Builds all tables from the JSON-lines catalog. Later lines for an item win, as they do
+# for the recommender; only the winning line of each item is kept in memory while building.
+def build_store(catalog_path=CATALOG_PATH, directory=STORE_DIR):
+    started = time.monotonic()
+    latest = {content_type: {} for content_type in CONTENT_TYPES}  # Type -> id -> winning line number
+    for line_number, (content_type, item) in enumerate(_read_lines(catalog_path)):
+        latest[content_type][item["id"]] = line_number
+    winners = {line_number: content_type for content_type in CONTENT_TYPES for line_number in latest[content_type].values()}
+    builders = {content_type: _TableBuilder(content_type) for content_type in CONTENT_TYPES}
+    for line_number, (content_type, item) in enumerate(_read_lines(catalog_path)):
+        if winners.get(line_number) == content_type:
+            builders[content_type].add(item)
+
+    source = _source_stamp(catalog_path)
+    for builder in builders.values():
+        builder.write(directory, source)
+    print(f"Built catalog store ({', '.join(f'{len(b.ids)} {t}' for t, b in builders.items())}) "
+          f"in {time.monotonic() - started:.1f}s", file=sys.stderr)
+    return CatalogStore.open(directory)
+
+def _source_stamp(catalog_path):
+    try:
+        stat = os.stat(catalog_path)
+    except OSError:
+        return {"size": 0, "mtime": 0.0}
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+# Accumulates one content type's columns in plain lists while the catalog is scanned
+class _TableBuilder:
+    def __init__(self, content_type):
+        self.content_type = content_type
+        self.ids = []
+        self.numbers = {name: [] for name in NUMERIC_COLUMNS if name != "id"}
+        self.string_columns = {column: [] for column in STRING_FIELDS[content_type].values()}
+        self.strings = {"": 0}  # Interned string -> index; 0 is the empty string
+        self.genres = []
+
+    def intern(self, value):
+        return self.strings.setdefault(value or "", len(self.strings))
+
+    def add(self, item):
+        self.ids.append(item["id"])
+        self.numbers["vote_average"].append(item.get("vote_average") or 0.0)
+        self.numbers["vote_count"].append(item.get("vote_count") or 0)
+        self.numbers["popularity"].append(item.get("popularity") or 0.0)
+        self.numbers["date"].append(encode_date(item.get(DATE_FIELDS[self.content_type])))
+        for field, column in STRING_FIELDS[self.content_type].items():
+            self.string_columns[column].append(self.intern(item.get(field)))
+        self.genres.append(item.get("genres") or [])
+
+    def write(self, directory, source):
+        table_dir = os.path.join(directory, self.content_type)
+        generation = f"gen-{time.time_ns()}"
+        path = os.path.join(table_dir, generation)
+        os.makedirs(path)
+
+        order = np.argsort(np.asarray(self.ids, np.int64), kind="stable")
+        columns = {"id": np.asarray(self.ids, np.int64)}
+        columns.update({name: np.asarray(values, NUMERIC_COLUMNS[name]) for name, values in self.numbers.items()})
+        columns.update({name: np.asarray(values, np.int32) for name, values in self.string_columns.items()})
+        genres = [self.genres[row] for row in order]
+        columns["genre_offsets"] = np.concatenate([[0], np.cumsum([len(g) for g in genres])]).astype(np.int64)
+        columns["genre_values"] = np.asarray([genre for g in genres for genre in g], np.int32)
+        for name, values in columns.items():
+            if name not in ("genre_offsets", "genre_values"):
+                values = values[order] if len(values) else values
+            np.save(os.path.join(path, f"{name}.npy"), values)
+
+        encoded = [s.encode("utf-8") for s in self.strings]  # Dicts keep insertion (= index) order
+        np.save(os.path.join(path, "string_offsets.npy"),
+                np.concatenate([[0], np.cumsum([len(s) for s in encoded])]).astype(np.int64))
+        np.save(os.path.join(path, "string_data.npy"), np.frombuffer(b"".join(encoded), np.uint8))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": STORE_VERSION, "rows": len(self.ids), "source": source, "built_at": time.time()}, f)
+        build_search_index(CatalogTable(path, self.content_type), os.path.join(path, "search"))
+
+        # Publish the new generation, then drop old ones nobody can still be reading from
+        previous = _current_generation(table_dir)
+        atomic_write(os.path.join(table_dir, "CURRENT"), generation.encode("utf-8"))
+        for name in os.listdir(table_dir):
+            if name.startswith("gen-") and name not in (generation, previous):
+                shutil.rmtree(os.path.join(table_dir, name), ignore_errors=True)
+
+def _current_generation(table_dir):
+    try:
+        with open(os.path.join(table_dir, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+# One content type's columns, memory-mapped read-only. Rows are ordered by id.
+class CatalogTable:
+    def __init__(self, path, content_type):
+        self.path = path
+        self.content_type = content_type
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.columns = {}
+        for name in os.listdir(path):
+            if name.endswith(".npy"):
+                # Empty arrays cannot be mapped; they are free to read anyway
+                array = np.load(os.path.join(path, name), mmap_mode="r")
+                self.columns[name[:-4]] = array if array.size else np.asarray(array)
+        self.ids = self.columns["id"]
+        self.string_offsets = self.columns.pop("string_offsets")
+        self.string_data = self.columns.pop("string_data")
+        self._genre_rows = None
+        self._search_index = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def string(self, index):
+        start, end = self.string_offsets[index], self.string_offsets[index + 1]
+        return bytes(self.string_data[start:end]).decode("utf-8")
+
+    def column_strings(self, column, rows):
+        return [self.string(index) for index in self.columns[column][rows]]
+
+    # Row index of an id, or None
+    def row_of(self, item_id):
+        row = int(np.searchsorted(self.ids, item_id))
+        return row if row < len(self.ids) and self.ids[row] == item_id else None
+
+    # A row as a TMDb-shaped list item, so grids and dialogs can consume it unchanged
+    def get(self, row):
+        columns = self.columns
+        item = {"id": int(self.ids[row]), "media_type": self.content_type,
+                "popularity": float(columns["popularity"][row])}
+        for field, column in STRING_FIELDS[self.content_type].items():
+            value = self.string(columns[column][row])
+            if value:
+                item[field] = value
+        date = decode_date(columns["date"][row])
+        if date:
+            item[DATE_FIELDS[self.content_type]] = date
+        if self.content_type != "person":
+            item["vote_average"] = round(float(columns["vote_average"][row]), 3)
+            item["vote_count"] = int(columns["vote_count"][row])
+            start, end = columns["genre_offsets"][row], columns["genre_offsets"][row + 1]
+            item["genre_ids"] = [int(g) for g in columns["genre_values"][start:end]]
+        return item
+
+    def lookup(self, item_id):
+        row = self.row_of(item_id)
+        return None if row is None else self.get(row)
+
+    def items(self, rows):
+        return [self.get(row) for row in rows]
+
+    # Row of each genre_values entry, built on first genre filter
+    def genre_rows(self):
+        if self._genre_rows is None:
+            self._genre_rows = np.repeat(np.arange(len(self.ids)), np.diff(self.columns["genre_offsets"]))
+        return self._genre_rows
+
+    # Rows matching every given condition; dates are yyyymmdd integers (see encode_date)
+    def filter(self, min_vote=None, min_votes=None, min_popularity=None, date_from=None, date_to=None, genre=None):
+        columns = self.columns
+        mask = np.ones(len(self.ids), bool)
+        if min_vote is not None:
+            mask &= columns["vote_average"] >= min_vote
+        if min_votes is not None:
+            mask &= columns["vote_count"] >= min_votes
+        if min_popularity is not None:
+            mask &= columns["popularity"] >= min_popularity
+        if date_from is not None:
+            mask &= columns["date"] >= date_from
+        if date_to is not None:
+            mask &= (columns["date"] <= date_to) & (columns["date"] > 0)
+        if genre is not None:
+            in_genre = np.zeros(len(self.ids), bool)
+            in_genre[self.genre_rows()[columns["genre_values"] == genre]] = True
+            mask &= in_genre
+        return np.flatnonzero(mask)
+
+    # The k rows with the highest value of a numeric column, best first
+    def top(self, rows=None, by="popularity", k=20):
+        values = self.columns[by] if rows is None else self.columns[by][rows]
+        k = min(k, len(values))
+        if k == 0:
+            return np.zeros(0, np.int64)
+        best = np.argpartition(-values, k - 1)[:k]
+        best = best[np.argsort(-values[best], kind="stable")]
+        return best if rows is None else np.asarray(rows)[best]
+
+    # Full-text index over the table's titles and overviews, opened on first use
+    def search_index(self):
+        if self._search_index is None:
+            self._search_index = SearchIndex.open(os.path.join(self.path, "search"), self.columns["popularity"])
+        return self._search_index
+
+    # Ranked local search results as TMDb-shaped items
+    def search(self, query, k=20):
+        index = self.search_index()
+        return self.items(index.search(query, k)[0]) if index is not None else []
+
+    # Offline stand-in for a TMDb list endpoint (popular, top_rated, now_playing, ...)
+    def list_items(self, filter_type, k=40):
+        today = datetime.date.today()
+        if filter_type == "top_rated":
+            return self.items(self.top(self.filter(min_votes=TOP_RATED_MIN_VOTES), by="vote_average", k=k))
+        if filter_type in ("now_playing", "airing_today", "on_the_air"):
+            since = today - datetime.timedelta(days=45)
+            rows = self.filter(date_from=encode_date(since.isoformat()), date_to=encode_date(today.isoformat()))
+            return self.items(self.top(rows, k=k))
+        if filter_type == "upcoming":
+            return self.items(self.top(self.filter(date_from=encode_date(today.isoformat())), k=k))
+        return self.items(self.top(k=k))  # popular, trending
+
+# All tables of a store directory; types that were never built are simply absent
+class CatalogStore:
+    def __init__(self, directory, tables):
+        self.directory = directory
+        self.tables = tables
+
+    @classmethod
+    def open(cls, directory=STORE_DIR):
+        tables = {}
+        for content_type in CONTENT_TYPES:
+            table_dir = os.path.join(directory, content_type)
+            generation = _current_generation(table_dir)
+            if generation is None:
+                continue
+            try:
+                tables[content_type] = CatalogTable(os.path.join(table_dir, generation), content_type)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable catalog table {content_type}: {e}", file=sys.stderr)
+        return cls(directory, tables)
+
+    def table(self, content_type):
+        return self.tables.get(content_type)
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+    # True when the catalog file changed since the tables were built, or they use an older layout
+    def is_stale(self, catalog_path=CATALOG_PATH):
+        source = _source_stamp(catalog_path)
+        if not self.tables:
+            return source["size"] > 0
+        return any(table.meta.get("source") != source or table.meta.get("version") != STORE_VERSION
+                   for table in self.tables.values())
+
+    # Like is_stale, but tolerates a small appended tail: the catalog is only ever appended to,
+    # and titles opened in detail views add a line each, so the store is rebuilt only once the
+    # catalog has grown by REBUILD_FRACTION since the build (or shrank, i.e. was replaced)
+    def needs_rebuild(self, catalog_path=CATALOG_PATH):
+        if not self.is_stale(catalog_path):
+            return False
+        if not self.tables or any(table.meta.get("version") != STORE_VERSION for table in self.tables.values()):
+            return True
+        size = _source_stamp(catalog_path)["size"]
+        built = min(table.meta.get("source", {}).get("size", 0) for table in self.tables.values())
+        return size < built or size - built > REBUILD_FRACTION * built
+
+# Opens the store, rebuilding it first if the catalog has grown or changed since the last build
+def load_catalog_store(catalog_path=CATALOG_PATH, directory=STORE_DIR):
+    store = CatalogStore.open(directory)
+    return build_store(catalog_path, directory) if store.needs_rebuild(catalog_path) else store
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the columnar local catalog store")
+    parser.add_argument("--catalog", default=CATALOG_PATH)
+    parser.add_argument("--store", default=STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="rebuild the store from the catalog")
+    query = sub.add_parser("top", help="list the best rows of a table")
+    query.add_argument("content_type", choices=CONTENT_TYPES)
+    query.add_argument("--by", default="popularity", choices=["popularity", "vote_average", "vote_count", "date"])
+    query.add_argument("--min-votes", type=int)
+    query.add_argument("--genre", type=int)
+    query.add_argument("--from-date", help="YYYY-MM-DD")
+    query.add_argument("--to-date", help="YYYY-MM-DD")
+    query.add_argument("-k", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_store(args.catalog, args.store)
+        return
+    table = load_catalog_store(args.catalog, args.store).table(args.content_type)
+    if table is None:
+        parser.error(f"no {args.content_type} table; ingest some items first")
+    started = time.perf_counter()
+    rows = table.filter(min_votes=args.min_votes, genre=args.genre,
+                        date_from=encode_date(args.from_date) if args.from_date else None,
+                        date_to=encode_date(args.to_date) if args.to_date else None)
+    rows = table.top(rows, by=args.by, k=args.k)
+    elapsed = time.perf_counter() - started
+    for item in table.items(rows):
+        print(f"{item['id']:<8} {item.get('vote_average', 0):>5} {item['popularity']:>9.1f}  "
+              f"{item.get(DATE_FIELDS[args.content_type], ''):<10}  {item.get('title') or item.get('name')}")
+    print(f"{len(rows)} rows in {elapsed * 1000:.2f} ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
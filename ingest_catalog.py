@@ -0,0 +1,180 @@
+import argparse
+import gzip
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+import requests
+import tmdb_http
+from recommender import CATALOG_PATH, compact_item
+from tmdb_cache import atomic_write
+
+# Streaming ingestion of TMDb daily ID exports (https://developer.themoviedb.org/docs/daily-id-exports)
+# into the local catalog. IDs are read lazily from the gzipped JSON-lines file, details are fetched
+# concurrently under a rate limit with the same append_to_response bundle as DetailDialog, and
+# compact records are appended to the catalog. A checkpoint records the export line below which
+# everything was attempted, so an interrupted run resumes there, plus the lines that failed,
+# which the next run retries first; re-ingesting an item only appends a newer line for it,
+# which catalog readers treat as the current version.
+
+EXPORT_TYPES = {"movie_ids": "movie", "tv_series_ids": "tv", "person_ids": "person"}
+CHECKPOINT_EVERY = 100  # Items between checkpoint writes
+
+# Infers the content type from an export file name such as movie_ids_05_15_2024.json.gz
+def export_content_type(path):
+    match = re.match(r"(movie_ids|tv_series_ids|person_ids)_", os.path.basename(path))
+    return EXPORT_TYPES[match.group(1)] if match else None
+
+# Yields (line_number, id) from an export file without loading it into memory
+def read_export(path, start_line=0, min_popularity=0.0):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line_number, line in enumerate(f):
+            if line_number < start_line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("adult") or record.get("popularity", 0.0) < min_popularity:
+                continue
+            yield line_number, record["id"]
+
+# Compact catalog record for a person details payload
+def compact_person(data):
+    return {
+        "id": data["id"],
+        "media_type": "person",
+        "name": data.get("name"),
+        "profile_path": data.get("profile_path"),
+        "popularity": data.get("popularity", 0.0),
+        "known_for_department": data.get("known_for_department"),
+        "birthday": data.get("birthday"),
+    }
+
+# Fetches one item's details; returns the compact record, or None if TMDb no longer has it
+def fetch_details(api_base, api_key, content_type, item_id, governor):
+    # The ingestion queue yields to interactive and prefetch requests sharing the API budget
+    with tmdb_http.request_queue(tmdb_http.QUEUE_INGESTION):
+        response = tmdb_http.get(f"{api_base}/{content_type}/{item_id}", params={
+            "api_key": api_key,
+            "append_to_response": tmdb_http.DETAIL_APPEND_TO_RESPONSE[content_type],
+        }, governor=governor)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    data = response.json()
+    return compact_person(data) if content_type == "person" else compact_item(data, content_type)
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# Runs the pipeline. Only `workers * 2` fetches are in flight at any time, so memory stays
+# bounded however long the export is. Requests go through the API host's rate governor on its
+# ingestion queue, capped at `rate` per second; a stub server at `api_base` gets a governor
+# of its own.
+def ingest(export_path, content_type, api_key, out_path=CATALOG_PATH, api_base=tmdb_http.TMDB_API_BASE,
+           workers=8, rate=40.0, min_popularity=0.0, limit=None, checkpoint_path=None):
+    checkpoint_path = checkpoint_path or f"{out_path}.{os.path.basename(export_path)}.checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path)
+    watermark = checkpoint.get("next_line", 0)  # Every line before this one was attempted
+    retry = {line_number: item_id for line_number, item_id in checkpoint.get("retry", [])}  # Failed lines
+    governor = tmdb_http.governor_for(f"{api_base}/") or tmdb_http.RateGovernor("ingest", rate)
+    governor.limit_queue(tmdb_http.QUEUE_INGESTION, rate)
+    stats = {"written": 0, "missing": 0, "failed": 0}
+    in_flight = {}  # Future -> (export line number, id)
+    ids = itertools.chain(sorted(retry.items()), read_export(export_path, watermark, min_popularity))
+    window = workers * 2
+    submitted = since_checkpoint = 0
+    last_line = watermark - 1
+    exhausted = False
+    started = time.monotonic()
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Top up the in-flight window from the export
+            while not exhausted and len(in_flight) < window:
+                next_id = next(ids, None) if limit is None or submitted < limit else None
+                if next_id is None:
+                    exhausted = True
+                    break
+                line_number, item_id = next_id
+                in_flight[pool.submit(fetch_details, api_base, api_key, content_type, item_id, governor)] = next_id
+                submitted += 1
+                last_line = max(last_line, line_number)
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                line_number, item_id = in_flight.pop(future)
+                try:
+                    record = future.result()
+                except (requests.exceptions.RequestException, KeyError, TypeError, ValueError) as e:
+                    # A failed fetch or a payload compact_item cannot read costs only this item
+                    print(f"Failed to ingest line {line_number} (id {item_id}): {e!r}", file=sys.stderr)
+                    stats["failed"] += 1
+                    retry[line_number] = item_id
+                    continue
+                retry.pop(line_number, None)
+                if record is None:
+                    stats["missing"] += 1
+                else:
+                    out.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    stats["written"] += 1
+            since_checkpoint += len(finished)
+
+            # Lines are submitted in order, so everything below the oldest in-flight line was
+            # attempted; retried lines already sit below the watermark and must not pull it back
+            oldest = min(line_number for line_number, _ in in_flight.values()) if in_flight else last_line + 1
+            watermark = max(watermark, oldest)
+            if since_checkpoint >= CHECKPOINT_EVERY or not in_flight:
+                out.flush()
+                atomic_write(checkpoint_path, json.dumps({
+                    "next_line": watermark,
+                    "retry": sorted(retry.items()),
+                }).encode("utf-8"))
+                since_checkpoint = 0
+                total = sum(stats.values())
+                print(f"{total} items ({stats['written']} written, {stats['missing']} missing, "
+                      f"{stats['failed']} failed) {total / max(time.monotonic() - started, 1e-6):.1f}/s",
+                      file=sys.stderr)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a TMDb daily ID export into the local catalog")
+    parser.add_argument("export", help="gzipped JSON-lines export, e.g. movie_ids_05_15_2024.json.gz")
+    parser.add_argument("--type", choices=sorted(set(EXPORT_TYPES.values())), help="content type (default: from file name)")
+    parser.add_argument("--out", default=CATALOG_PATH, help="catalog file to append to")
+    parser.add_argument("--api-base", default=tmdb_http.TMDB_API_BASE, help="API root, e.g. a local stub server")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=40.0, help="maximum requests per second")
+    parser.add_argument("--min-popularity", type=float, default=0.0)
+    parser.add_argument("--limit", type=int, help="stop after this many items")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first line")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv("TMDB_API_KEY")
+    content_type = args.type or export_content_type(args.export)
+    if not api_key:
+        parser.error("TMDB_API_KEY is not set")
+    if content_type is None:
+        parser.error("cannot infer the content type from the file name; pass --type")
+    checkpoint_path = f"{args.out}.{os.path.basename(args.export)}.checkpoint"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    ingest(args.export, content_type, api_key, args.out, args.api_base.rstrip("/"), args.workers,
+           args.rate, args.min_popularity, args.limit, checkpoint_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Local stand-in for the TMDb API and image CDN, for load tests and offline benchmarks.
+# Requests are answered from recorded fixtures when there is one for them, and otherwise
+# from deterministic synthetic data, so every endpoint the app uses works with no fixtures
+# at all. Replay is on whenever the fixture directory exists (fixtures/tmdb ships a small
+# set); --synthetic turns it off. Latency, server errors and 429 throttling can be injected.
+# With --record, fixture misses are forwarded to the real TMDb (with the caller's api_key)
+# and saved for replay, with the key scrubbed from what is written.
+#
+# Point the app at it with WATCHX_TMDB_API_HOST and WATCHX_TMDB_IMAGE_HOST (see tmdb_http),
+# and give it its own WATCHX_CACHE_DIR: image cache keys do not include the host.
+#
+# Usage: python mock_tmdb.py [--port 8765] [--latency-ms 80] [--error-rate 0.01] [--rps 40]
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "tmdb")
+UPSTREAM_API_HOST = "https://api.themoviedb.org"
+UPSTREAM_IMAGE_HOST = "https://image.tmdb.org"
+
+PAGE_SIZE = 20
+TOTAL_PAGES = 50  # Pages of every synthetic list
+GENRES = {28: "Action", 12: "Adventure", 16: "Animation", 35: "Comedy", 80: "Crime", 18: "Drama",
+          14: "Fantasy", 27: "Horror", 10749: "Romance", 878: "Science Fiction", 53: "Thriller"}
+MAX_IMAGES = 512  # Synthetic images kept encoded in memory
+
+# Fixture file for a request: the path and sorted query, without the api_key
+def fixture_path(directory, path, query):
+    query = {k: v for k, v in query.items() if k != "api_key"}
+    name = path.strip("/").replace("/", "__") or "index"
+    if query:
+        name += "--" + re.sub(r"[^A-Za-z0-9_.,=&-]", "_", urlencode(sorted(query.items())))
+    if len(name) > 150:
+        name = name[:100] + "-" + hashlib.sha1(name.encode("utf-8")).hexdigest()
+    return os.path.join(directory, name + ".json")
+
+# A response body fit to commit as a fixture: the api_key, and any api_key= query in URLs
+# the body carries, replaced with REDACTED
+def sanitize(body, api_key=None):
+    if api_key:
+        body = body.replace(api_key.encode("utf-8"), b"REDACTED")
+    return re.sub(rb"api_key=[^&\"'\s]+", b"api_key=REDACTED", body)
+
+# Decides what happens to each request: the latency to add, and whether to fail it with a
+# 500 or throttle it with a 429. Throttling is random (throttle_rate) and/or enforced by a
+# requests-per-second budget shared by all connections, as TMDb does.
+class FaultPolicy:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, throttle_rate=0.0, rps=0.0,
+                 retry_after=1, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rps = rps
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = rps
+        self.updated = time.monotonic()
+
+    # Returns (delay_seconds, status or None)
+    def decide(self):
+        with self.lock:
+            delay = max(0.0, self.random.gauss(self.latency_ms, self.jitter_ms)) / 1000 if self.latency_ms else 0.0
+            roll = self.random.random()
+            if self.rps:
+                now = time.monotonic()
+                self.tokens = min(self.rps, self.tokens + (now - self.updated) * self.rps)
+                self.updated = now
+                if self.tokens < 1:
+                    return delay, 429
+                self.tokens -= 1
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+# Deterministic fake TMDb payloads. Every value is derived from the request, so the same
+# request always gets the same answer across runs and processes.
+class SyntheticTMDb:
+    def __init__(self, total_pages=TOTAL_PAGES):
+        self.total_pages = total_pages
+
+    @staticmethod
+    def _rng(*parts):
+        return random.Random(zlib.crc32("/".join(map(str, parts)).encode("utf-8")))
+
+    def item(self, content_type, item_id):
+        rng = self._rng(content_type, item_id)
+        if content_type == "person":
+            return {"id": item_id, "name": f"Person {item_id}", "profile_path": f"/p{item_id}.jpg",
+                    "popularity": round(rng.uniform(1, 100), 3), "known_for_department": "Acting",
+                    "media_type": "person"}
+        year = rng.randint(1970, 2025)
+        date = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        item = {"id": item_id, "poster_path": f"/{content_type[0]}{item_id}.jpg",
+                "backdrop_path": f"/b{item_id}.jpg", "overview": f"Synthetic overview of item {item_id}.",
+                "vote_average": round(rng.uniform(4, 9), 1), "vote_count": rng.randint(0, 20000),
+                "popularity": round(rng.uniform(1, 500), 3), "genre_ids": rng.sample(sorted(GENRES), 2),
+                "original_language": "en", "media_type": content_type}
+        if content_type == "movie":
+            item.update(title=f"Movie {item_id}", original_title=f"Movie {item_id}", release_date=date)
+        else:
+            item.update(name=f"Show {item_id}", original_name=f"Show {item_id}", first_air_date=date)
+        return item
+
+    def page(self, content_type, key, page, titles=None):
+        rng = self._rng(content_type, key, page)
+        results = []
+        for i in range(PAGE_SIZE):
+            item = self.item(content_type, rng.randint(1, 999999))
+            if titles:
+                item["title" if content_type == "movie" else "name"] = f"{titles} {(page - 1) * PAGE_SIZE + i + 1}"
+            results.append(item)
+        return {"page": page, "results": results, "total_pages": self.total_pages,
+                "total_results": self.total_pages * PAGE_SIZE}
+
+    def details(self, content_type, item_id, append):
+        rng = self._rng("details", content_type, item_id)
+        data = self.item(content_type, item_id)
+        data.pop("media_type", None)
+        if content_type == "person":
+            data.update(birthday=f"{rng.randint(1940, 2000)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+                        place_of_birth="Springfield", biography=f"Synthetic biography of person {item_id}.",
+                        also_known_as=[f"P. {item_id}"])
+        else:
+            data["genres"] = [{"id": g, "name": GENRES[g]} for g in data.pop("genre_ids")]
+            if content_type == "movie":
+                data["runtime"] = rng.randint(80, 180)
+            else:
+                data["number_of_episodes"] = rng.randint(6, 120)
+        others = [rng.randint(1, 999999) for _ in range(20)]
+        for part in append:
+            if part == "credits":
+                data[part] = {"cast": [dict(self.item("person", pid), character=f"Character {pid}")
+                                       for pid in others[:12]], "crew": []}
+            elif part == "videos":
+                data[part] = {"results": [{"key": f"vid{item_id}", "site": "YouTube", "type": "Trailer",
+                                           "name": "Official Trailer"}]}
+            elif part == "reviews":
+                data[part] = {"results": [{"author": "critic", "content": "Synthetic review."}], "total_results": 1}
+            elif part == "recommendations":
+                data[part] = {"page": 1, "results": [self.item(content_type, oid) for oid in others[:10]],
+                              "total_pages": 1}
+            elif part == "watch/providers":
+                data[part] = {"results": {"US": {"flatrate": [
+                    {"provider_id": n, "provider_name": f"Provider {n}", "logo_path": f"/l{n}.png"} for n in range(3)]}}}
+            elif part == "keywords":
+                data[part] = {"keywords" if content_type == "movie" else "results": [
+                    {"id": 1000 + n, "name": f"keyword {n}"} for n in rng.sample(range(50), 5)]}
+            elif part == "combined_credits":
+                data[part] = {"cast": [dict(self.item(rng.choice(("movie", "tv")), oid), character=f"Role {oid}")
+                                       for oid in others[:15]]}
+            elif part == "images":
+                data[part] = {"profiles": [{"file_path": f"/p{item_id}-{n}.jpg"} for n in range(6)]}
+        return data
+
+    # Returns (status, payload) for an API path below /3
+    def handle(self, path, query):
+        parts = [p for p in path.split("/") if p][1:]
+        page = max(1, int(query.get("page", 1) or 1))
+        if page > self.total_pages:
+            return 422, {"success": False, "status_code": 22, "status_message": "Invalid page."}
+        if len(parts) == 3 and parts[0] == "trending":
+            return 200, self.page(parts[1], f"trending-{parts[2]}", page)
+        if len(parts) == 2 and parts[0] == "search":
+            text = query.get("query", "").strip()
+            if not text:
+                return 200, {"page": 1, "results": [], "total_pages": 0, "total_results": 0}
+            return 200, self.page(parts[1], f"search-{text.casefold()}", page, titles=text.title())
+        if len(parts) == 2 and parts[1] == "latest":
+            return 200, self.details(parts[0], 999999, [])
+        if len(parts) == 2 and not parts[1].isdigit():
+            return 200, self.page(parts[0], parts[1], page)
+        if len(parts) == 2 and parts[0] in ("movie", "tv", "person"):
+            append = [p for p in query.get("append_to_response", "").split(",") if p]
+            return 200, self.details(parts[0], int(parts[1]), append)
+        return 404, {"success": False, "status_code": 34, "status_message": "The resource you requested could not be found."}
+
+# Size of a synthetic image in a CDN bucket: "w" buckets fix the width, "h" the height
+def image_dimensions(size, file_path):
+    aspect = 1.0 if file_path.endswith(".png") else 1.5  # Logos are square, everything else portrait
+    if size.startswith("w"):
+        width = int(size[1:])
+        return width, round(width * aspect)
+    if size.startswith("h"):
+        height = int(size[1:])
+        return round(height / aspect), height
+    return 500, round(500 * aspect)
+
+def synthetic_image(size, file_path):
+    from PIL import Image
+    width, height = image_dimensions(size, file_path)
+    color = zlib.crc32(file_path.encode("utf-8"))
+    image = Image.new("RGB", (width, height), ((color >> 16) & 255, (color >> 8) & 255, color & 255))
+    buffer = io.BytesIO()
+    if file_path.endswith(".png"):
+        image.save(buffer, "PNG")
+    else:
+        image.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real CDN and API
+
+    def do_GET(self):
+        server = self.server
+        split = urlsplit(self.path)
+        query = dict(parse_qsl(split.query))
+        if split.path == "/__stats":
+            return self.send(200, json.dumps(server.snapshot_stats()).encode("utf-8"), "application/json")
+        delay, fault = server.faults.decide()
+        if delay:
+            time.sleep(delay)
+        if fault == 429:
+            return self.send(429, json.dumps({"status_code": 25, "status_message": "Your request count is over the allowed limit."}).encode("utf-8"),
+                             "application/json", {"Retry-After": str(server.faults.retry_after)})
+        if fault == 500:
+            return self.send(500, b'{"status_code": 11, "status_message": "Internal error."}', "application/json")
+        if split.path.startswith("/3/"):
+            if not query.get("api_key"):
+                return self.send(401, b'{"status_code": 7, "status_message": "Invalid API key."}', "application/json")
+            status, body = server.api_response(split.path, query)
+            return self.send(status, body, "application/json")
+        match = re.match(r"^/t/p/([a-z0-9]+)(/.+)$", split.path)
+        if match:
+            status, body = server.image_response(match.group(1), match.group(2))
+            return self.send(status, body, "image/png" if match.group(2).endswith(".png") else "image/jpeg")
+        self.send(404, b"{}", "application/json")
+
+    def send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(status)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class MockTMDbServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixture_dir=FIXTURE_DIR, faults=None, record=False, total_pages=TOTAL_PAGES,
+                 verbose=False, replay=None):
+        super().__init__(address, MockHandler)
+        self.fixture_dir = fixture_dir
+        self.replay = os.path.isdir(fixture_dir) if replay is None else replay  # Serve fixtures that exist
+        self.faults = faults or FaultPolicy()
+        self.record = record
+        self.synthetic = SyntheticTMDb(total_pages)
+        self.verbose = verbose
+        self.images = OrderedDict()  # (size, path) -> bytes, most recent last
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "statuses": {}, "fixtures": 0, "recorded": 0, "synthetic": 0}
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def count(self, status):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["statuses"][status] = self.stats["statuses"].get(status, 0) + 1
+
+    # Where a response came from: "fixtures", "recorded" or "synthetic"
+    def count_source(self, source):
+        with self.lock:
+            self.stats[source] += 1
+
+    def snapshot_stats(self):
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+    # Fixture, recorded upstream response, or synthetic payload for an API request
+    def api_response(self, path, query):
+        fixture = fixture_path(self.fixture_dir, path, query)
+        if self.replay and os.path.exists(fixture):
+            self.count_source("fixtures")
+            with open(fixture, "rb") as f:
+                return 200, f.read()
+        if self.record:
+            status, body = self.forward(f"{UPSTREAM_API_HOST}{path}", query)
+            if status == 200:
+                self.save(fixture, sanitize(body, query.get("api_key")))
+            return status, body
+        self.count_source("synthetic")
+        status, data = self.synthetic.handle(path, query)
+        return status, json.dumps(data).encode("utf-8")
+
+    def image_response(self, size, file_path):
+        fixture = os.path.join(self.fixture_dir, "images", size, file_path.lstrip("/"))
+        if self.replay and os.path.exists(fixture):
+            self.count_source("fixtures")
+            with open(fixture, "rb") as f:
+                return 200, f.read()
+        if self.record:
+            status, body = self.forward(f"{UPSTREAM_IMAGE_HOST}/t/p/{size}{file_path}", {})
+            if status == 200:
+                self.save(fixture, body)
+            return status, body
+        self.count_source("synthetic")
+        key = (size, file_path)
+        with self.lock:
+            data = self.images.get(key)
+            if data is not None:
+                self.images.move_to_end(key)
+                return 200, data
+        data = synthetic_image(size, file_path)
+        with self.lock:
+            self.images[key] = data
+            while len(self.images) > MAX_IMAGES:
+                self.images.popitem(last=False)
+        return 200, data
+
+    def forward(self, url, query):
+        import tmdb_http
+        try:
+            response = tmdb_http.get(url, params=query or None)
+        except tmdb_http.RequestException as e:
+            print(f"Upstream request failed: {e}", file=sys.stderr)
+            return 502, b"{}"
+        self.count_source("recorded")
+        return response.status_code, response.content
+
+    def save(self, path, body):
+        from tmdb_cache import atomic_write
+        try:
+            atomic_write(path, body)
+        except OSError as e:
+            print(f"Fixture write failed: {e}", file=sys.stderr)
+
+# Starts a server on a daemon thread and returns it; port 0 picks a free port. Used by the
+# benchmarks, which point the app at server.url.
+def start_server(host="127.0.0.1", port=0, **options):
+    server = MockTMDbServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="mock-tmdb", daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the TMDb API and image CDN")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="directory of recorded responses")
+    parser.add_argument("--record", action="store_true", help="forward fixture misses to TMDb and save them")
+    parser.add_argument("--synthetic", action="store_true", help="ignore the fixtures and serve synthetic data only")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="standard deviation of the added latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--rps", type=float, default=0.0, help="requests per second before 429s (0: unlimited)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--pages", type=int, default=TOTAL_PAGES, help="pages of every synthetic list")
+    parser.add_argument("--seed", type=int, help="seed for injected faults")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    faults = FaultPolicy(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, args.rps,
+                         args.retry_after, args.seed)
+    server = MockTMDbServer((args.host, args.port), args.fixtures, faults, args.record, args.pages, args.verbose,
+                            replay=False if args.synthetic else None)
+    if server.replay:
+        print(f"Replaying fixtures from {args.fixtures}", file=sys.stderr)
+    print(f"Mock TMDb listening on {server.url}; run the app with\n"
+          f"  WATCHX_TMDB_API_HOST={server.url} WATCHX_TMDB_IMAGE_HOST={server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.snapshot_stats()), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,851 @@
+import os
 import sys
-import requests
-import webbrowser
-from datetime import datetime
+import time
+_MODULE_STARTED = time.perf_counter()
+import hashlib
+import json
+import threading
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QTabWidget, QScrollArea,
-                             QGridLayout, QFrame, QDialog, QFormLayout, QStatusBar, QMessageBox,
-                             QComboBox, QTextEdit, QListWidget, QListWidgetItem)
-from PyQt5.QtGui import QPixmap, QImage, QFont
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
-from io import BytesIO
-from PIL import Image
-from dotenv import load_dotenv
-import os
-
-# Worker thread for asynchronous API requests to avoid blocking the GUI
-class FetchWorker(QThread):
-    result = pyqtSignal(dict)  # Signal to emit API response
-
-    def __init__(self, url, params=None, headers=None):
+                             QFrame, QDialog, QFormLayout, QStatusBar, QMessageBox,
+                             QComboBox, QTextEdit, QListWidget, QListWidgetItem, QListView,
+                             QStyledItemDelegate, QStyle, QShortcut)
+from PyQt5.QtGui import QPixmap, QImage, QFont, QPixmapCache, QPainter, QColor, QCursor, QKeySequence
+from PyQt5.QtCore import (Qt, pyqtSignal, QSize, QObject, QRunnable, QThreadPool, QAbstractListModel,
+                          QModelIndex, QRect, QEvent, QTimer, QPoint, QBuffer, QByteArray, QIODevice)
+from PyQt5 import sip
+from tmdb_cache import CACHE_DIR, ImageCache, atomic_write
+import tmdb_http
+import tmdb_client
+import tracing
+from tmdb_client import DETAIL_IMAGES, ListItem, Page, TMDbClient, details_from_payload
+from user_store import UserStore
+# requests, numpy and scipy (behind the recommender, catalog store and search index) are
+# imported on first use, mostly on pool threads, so they stay off the startup path
+
+# Startup timing on stderr when WATCHX_STARTUP_PROFILE is set; "exit" also quits after the
+# first painted grid (see benchmarks/bench_startup.py)
+STARTUP_PROFILE = os.getenv("WATCHX_STARTUP_PROFILE", "")
+_startup_marks = {}
+
+def startup_mark(name):
+    if STARTUP_PROFILE and name not in _startup_marks:
+        _startup_marks[name] = time.perf_counter() - _MODULE_STARTED
+        print(f"startup: {name} {_startup_marks[name] * 1000:.1f} ms", file=sys.stderr, flush=True)
+        if name == "first grid paint" and STARTUP_PROFILE == "exit":
+            QTimer.singleShot(0, QApplication.closeAllWindows)
+
+PIXMAP_CACHE_MB = int(os.getenv("WATCHX_PIXMAP_CACHE_MB", "64"))
+
+# Scheduler priorities: requests for what is on screen run before background prefetches
+PRIORITY_VISIBLE = 10
+PRIORITY_PREFETCH = 0
+
+# Last session's first screen, shown before anything else loads
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshot")
+
+# Search-as-you-type: quiet period after the last keystroke, and shortest query sent to TMDb
+SEARCH_DEBOUNCE_MS = int(os.getenv("WATCHX_SEARCH_DEBOUNCE_MS", "250"))
+MIN_SEARCH_CHARS = 2
+
+# Detail dialog images further than this many pixels outside the viewport are not loaded yet
+LAZY_IMAGE_MARGIN = 300
+
+# Speculative detail prefetch: parallel requests, and kilobytes it may download per minute
+# (0 turns prefetching off)
+PREFETCH_CONCURRENCY = int(os.getenv("WATCHX_PREFETCH_CONCURRENCY", "2"))
+PREFETCH_KB_PER_MINUTE = int(os.getenv("WATCHX_PREFETCH_KB_PER_MINUTE", "4096"))
+
+THUMBNAIL_JPEG_QUALITY = 90
+
+# Spans shown by the status bar tracing overlay (WATCHX_TRACE), as median/95th percentile
+TRACE_OVERLAY_SPANS = ("fetch", "http GET", "connect", "json", "image download", "decode", "scale",
+                       "paint tile", "dialog build")
+
+# Device pixel ratio for images painted into grid tiles, which have no widget of their own
+def device_pixel_ratio():
+    app = QApplication.instance()
+    return app.devicePixelRatio() if app is not None else 1.0
+
+# Signals for FetchTask, since QRunnable is not a QObject and cannot own signals
+class FetchTaskSignals(QObject):
+    result = pyqtSignal(int, object)  # Request id and API response (may fire twice when revalidating)
+    finished = pyqtSignal(int)  # Request id, once the task is done
+
+# Runs one API request on the scheduler's thread pool.
+# Responses go through the shared TTL cache (see tmdb_client.responses): fresh entries are
+# served without a request, stale ones are emitted immediately and then re-emitted if
+# revalidation changed them. With a shape function, what is emitted is shape(response),
+# built on the pool thread (e.g. a Page of compact records rather than the response dict).
+class FetchTask(QRunnable):
+    def __init__(self, request_id, url, params, headers, signals, scheduler, queue=tmdb_http.QUEUE_INTERACTIVE,
+                 shape=None):
         super().__init__()
+        self.request_id = request_id
         self.url = url
         self.params = params or {}
         self.headers = headers or {}
+        self.signals = signals
+        self.scheduler = scheduler
+        self.queue = queue  # Rate governor queue (see tmdb_http.RateGovernor)
+        self.shape = shape
+
+    # Executes the API request on a pool thread
+    def run(self):
+        try:
+            if not self.scheduler.is_cancelled(self.request_id):
+                with tracing.span("fetch", "api", self.request_id, url=self.url.rsplit("/3", 1)[-1]), \
+                        tmdb_http.request_queue(self.queue):
+                    self.fetch()
+        finally:
+            self.signals.finished.emit(self.request_id)
+
+    def fetch(self):
+        for data in tmdb_client.responses(self.url, self.params, self.headers):
+            if self.shape is not None:
+                data = self.shape(data)
+            self.signals.result.emit(self.request_id, data)  # Empty dict on failure
+
+# Runs a plain function on the scheduler's pool, e.g. loading a model from disk
+class CallTask(QRunnable):
+    def __init__(self, request_id, fn, signals, scheduler, queue=tmdb_http.QUEUE_INTERACTIVE):
+        super().__init__()
+        self.request_id = request_id
+        self.fn = fn
+        self.signals = signals
+        self.scheduler = scheduler
+        self.queue = queue
+
+    def run(self):
+        try:
+            if not self.scheduler.is_cancelled(self.request_id):
+                with tracing.span("call", "task", self.request_id, fn=getattr(self.fn, "__name__", "")), \
+                        tmdb_http.request_queue(self.queue):
+                    result = self.fn()
+                self.signals.result.emit(self.request_id, result)
+        except Exception as e:
+            print(f"Background task failed: {e}")
+        finally:
+            self.signals.finished.emit(self.request_id)
+
+# Central scheduler for API requests: a fixed thread pool, request ids and priorities.
+# Every request belongs to a UI slot (e.g. "today_grid" or a dialog); submitting a new
+# request to a slot cancels the one it supersedes, and results are delivered only to
+# the callback of the request that is still current for its slot.
+# CPU-bound maintenance (model refits, catalog appends and store builds) runs on a separate
+# single-thread background pool, so it never holds a slot interactive fetches wait for.
+class RequestScheduler(QObject):
+    _instance = None
+
+    def __init__(self, max_workers=4, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.background_pool = QThreadPool(self)
+        self.background_pool.setMaxThreadCount(1)
+        self.callbacks = {}  # Request id -> callback for live requests
+        self.tasks = {}  # Request id -> FetchTask
+        self.slots = {}  # Slot name -> current request id
+        self.cancelled = set()  # Ids of cancelled requests that may still be running
+        self.signals = FetchTaskSignals()
+        self.signals.result.connect(self.on_result)
+        self.signals.finished.connect(self.on_finished)
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    # Queues a request for slot and returns its id; callback receives the response dict
+    def submit(self, slot, url, params, callback, priority=PRIORITY_VISIBLE, headers=None, shape=None):
+        request_id = tracing.new_request_id()
+        task = FetchTask(request_id, url, params, headers, self.signals, self, self.request_queue(priority), shape)
+        return self.start(slot, task, callback, priority)
+
+    # Like submit, but runs fn() in the pool (or the background pool) and passes its return
+    # value to callback
+    def submit_call(self, slot, fn, callback, priority=PRIORITY_VISIBLE, background=False):
+        request_id = tracing.new_request_id()
+        task = CallTask(request_id, fn, self.signals, self, self.request_queue(priority))
+        return self.start(slot, task, callback, priority, self.background_pool if background else self.pool)
+
+    # Prefetch-priority work also waits behind what is on screen for TMDb's rate limit
+    @staticmethod
+    def request_queue(priority):
+        return tmdb_http.QUEUE_INTERACTIVE if priority >= PRIORITY_VISIBLE else tmdb_http.QUEUE_PREFETCH
+
+    def start(self, slot, task, callback, priority, pool=None):
+        self.cancel(slot)
+        task.pool = pool or self.pool
+        self.slots[slot] = task.request_id
+        self.callbacks[task.request_id] = callback
+        self.tasks[task.request_id] = task
+        task.pool.start(task, priority)
+        return task.request_id
+
+    # Cancels whatever request is current for slot; queued tasks never start,
+    # running ones finish but their results are discarded
+    def cancel(self, slot):
+        request_id = self.slots.pop(slot, None)
+        if request_id is None:
+            return
+        self.callbacks.pop(request_id, None)
+        task = self.tasks.get(request_id)
+        # A task that just finished is deleted by the pool before on_finished drops it here
+        if task is not None and not sip.isdeleted(task) and task.pool.tryTake(task):
+            del self.tasks[request_id]
+        else:
+            self.cancelled.add(request_id)
+
+    # Called from pool threads before a task starts its network work
+    def is_cancelled(self, request_id):
+        return request_id in self.cancelled
+
+    def on_result(self, request_id, data):
+        callback = self.callbacks.get(request_id)
+        if callback is not None:
+            callback(data)
+
+    def on_finished(self, request_id):
+        self.tasks.pop(request_id, None)
+        self.callbacks.pop(request_id, None)
+        self.cancelled.discard(request_id)
+        for slot, current in list(self.slots.items()):
+            if current == request_id:
+                del self.slots[slot]
+
+# Signals for ImageTask, since QRunnable is not a QObject and cannot own signals
+class ImageTaskSignals(QObject):
+    finished = pyqtSignal(str, QImage)  # Emits the request key and the decoded image
+
+# Loads one downloaded image (size bucket + file path) on a pool thread for every box waiting
+# on it. Each box gets its saved thumbnail if there is one; otherwise the bucket's bytes (from
+# disk or the network) are decoded once, scaled to that box's size in device pixels and saved
+# as its thumbnail for next time. QImage (unlike QPixmap) is safe to build outside the GUI thread.
+class ImageTask(QRunnable):
+    def __init__(self, size, file_path, disk_cache, signals):
+        super().__init__()
+        self.size = size
+        self.file_path = file_path
+        self.disk_cache = disk_cache
+        self.signals = signals
+        self.targets = []  # (request key, device width, device height, ratio)
+        self.lock = threading.Lock()
+        self.closed = False  # Set once run() has taken the targets
+        self.request_id = tracing.new_request_id()
+
+    # Adds a box to fill; False once the task has started and takes no more
+    def add_target(self, key, width, height, ratio):
+        with self.lock:
+            if self.closed:
+                return False
+            self.targets.append((key, width, height, ratio))
+            return True
+
+    def keys(self):
+        with self.lock:
+            return [target[0] for target in self.targets]
 
-    # Executes the API request in a separate thread
     def run(self):
+        with self.lock:
+            self.closed = True
+            targets = list(self.targets)
+        source = None
+        for key, width, height, ratio in targets:
+            with tracing.span("image", "image", self.request_id, key=key):
+                image = self.thumbnail(key)
+                if image.isNull():
+                    if source is None:
+                        source = self.decode()
+                    image = self.fit(source, key, width, height)
+            image.setDevicePixelRatio(ratio)
+            self.signals.finished.emit(key, image)
+
+    # The box's scaled copy saved by an earlier session, or a null image
+    def thumbnail(self, key):
+        image = QImage()
+        with tracing.span("thumbnail read", "image"):
+            thumbnail = self.disk_cache.get_thumbnail(key)
+        if thumbnail is not None:
+            with tracing.span("decode", "image", bytes=len(thumbnail)):
+                image.loadFromData(thumbnail)
+        return image
+
+    # The downloaded image at full bucket size, or a null image if it could not be fetched
+    def decode(self):
+        image = QImage()
         try:
-            response = requests.get(self.url, params=self.params, headers=self.headers, timeout=10)
-            response.raise_for_status()  # Raises exception for HTTP errors
-            self.result.emit(response.json())  # Emit successful response
-        except requests.exceptions.RequestException as e:
-            print(f"API request failed: {e}")
-            self.result.emit({})  # Emit empty dict on failure
+            data = tmdb_client.image_bytes(self.size, self.file_path, self.disk_cache)
+        except tmdb_http.RequestException as e:
+            print(f"Error loading image: {e}")
+            return image
+        with tracing.span("decode", "image", bytes=len(data)):
+            image.loadFromData(data)
+        return image
+
+    # Scales the source down to fit the box and saves the result as the box's thumbnail
+    def fit(self, source, key, width, height):
+        if source.isNull() or not width or not height or (source.width() <= width and source.height() <= height):
+            return QImage(source)  # Shared until the ratio is set
+        with tracing.span("scale", "image"):
+            image = source.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        with tracing.span("thumbnail write", "image"):
+            self.disk_cache.put_thumbnail(key, self.encode(image))
+        return image
+
+    # JPEG for opaque images, PNG where transparency matters (e.g. provider logos)
+    @staticmethod
+    def encode(image):
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        if image.hasAlphaChannel():
+            image.save(buffer, "PNG")
+        else:
+            image.save(buffer, "JPG", THUMBNAIL_JPEG_QUALITY)
+        buffer.close()
+        return bytes(data)
+
+# Loads images on a bounded worker pool and swaps them into their targets as they arrive.
+# Images are looked up in three tiers: decoded pixmaps in QPixmapCache, then scaled thumbnails
+# on disk, then the bucket's raw bytes on disk, and only then the network.
+class ImageLoader(QObject):
+    image_ready = pyqtSignal(str)  # Request key, emitted once the pixmap is in QPixmapCache
+    _instance = None
+
+    def __init__(self, max_workers=6, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.disk_cache = ImageCache()
+        self.pending = {}  # Request key -> labels waiting for that image
+        self.tasks = {}  # Request key -> queued or running ImageTask
+        self.sources = {}  # (size, file path) -> ImageTask still taking boxes for that download
+        self.failed = set()  # Keys that could not be loaded this session
+        self.signals = ImageTaskSignals()
+        self.signals.finished.connect(self.on_image_loaded)
+        QPixmapCache.setCacheLimit(PIXMAP_CACHE_MB * 1024)
+
+    # Loader shared by the main window and every DetailDialog
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    # Request key, size bucket and device-pixel size for an image of the given kind (poster,
+    # profile, logo) shown in a width x height box: the smallest bucket that covers the box
+    @staticmethod
+    def spec(kind, file_path, width, height, ratio=1.0):
+        size = tmdb_http.image_size(kind, width, height, ratio)
+        width, height = round(width * ratio), round(height * ratio)
+        return f"{size}{file_path}@{width}x{height}", size, width, height
+
+    # Fills the label with the TMDb image sized for it at the label's device pixel ratio.
+    # Cached pixmaps are applied immediately; otherwise the label keeps its placeholder until the image arrives.
+    def load(self, label, kind, file_path, width, height):
+        ratio = label.devicePixelRatioF()
+        key = self.spec(kind, file_path, width, height, ratio)[0]
+        pixmap = self.request(kind, file_path, width, height, ratio)
+        if pixmap is not None:
+            label.setPixmap(pixmap)
+        elif key in self.failed:
+            label.setText("Image unavailable")
+        else:
+            self.pending[key].append(label)
+
+    # Returns the cached pixmap, or None after queueing a download; image_ready fires when it lands.
+    # Used by painted views that have no label to fill.
+    def request(self, kind, file_path, width, height, ratio=1.0):
+        key, size, device_width, device_height = self.spec(kind, file_path, width, height, ratio)
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        if key not in self.pending and key not in self.failed:
+            self.pending[key] = []
+            task = self.sources.get((size, file_path))
+            if task is None or not task.add_target(key, device_width, device_height, ratio):
+                task = self.sources[(size, file_path)] = ImageTask(size, file_path, self.disk_cache, self.signals)
+                task.add_target(key, device_width, device_height, ratio)
+                self.pool.start(task)
+            self.tasks[key] = task
+        return None
+
+    # Drops queued downloads no label is waiting on (e.g. tiles scrolled or reset away). A task
+    # shared by several keys is only dropped when every one of them is released.
+    def release(self, keys):
+        keys = set(keys)
+        for key in keys:
+            task = self.tasks.get(key)
+            if (task is None or sip.isdeleted(task)
+                    or any(self.pending.get(other) or other not in keys for other in task.keys())):
+                continue
+            if self.pool.tryTake(task):
+                for other in task.keys():
+                    del self.pending[other]
+                    del self.tasks[other]
+                if self.sources.get((task.size, task.file_path)) is task:
+                    del self.sources[(task.size, task.file_path)]
+
+    # Runs on the GUI thread: converts to QPixmap, caches it and fills every waiting label
+    def on_image_loaded(self, key, image):
+        labels = self.pending.pop(key, [])
+        task = self.tasks.pop(key, None)
+        if task is not None and self.sources.get((task.size, task.file_path)) is task:
+            del self.sources[(task.size, task.file_path)]  # Started, so it takes no more boxes
+        pixmap = None
+        if not image.isNull():
+            with tracing.span("pixmap", "image", key=key):
+                pixmap = QPixmap.fromImage(image)
+            QPixmapCache.insert(key, pixmap)
+        else:
+            self.failed.add(key)
+        for label in labels:
+            if sip.isdeleted(label):
+                continue  # Dialog was closed while the image was in flight
+            if pixmap is None:
+                label.setText("Image unavailable")
+            else:
+                label.setPixmap(pixmap)
+        self.image_ready.emit(key)
+
+# List model behind a content grid. Holds the items of every page fetched so far and
+# pulls the next TMDb page through the scheduler when the view asks for more.
+class ContentGridModel(QAbstractListModel):
+    ItemRole = Qt.UserRole
+    loaded = pyqtSignal(int)  # Number of items, once the first page (or a fixed list) is in
+
+    PAGE_SIZE = 20  # Items per TMDb page
+
+    def __init__(self, slot, parent=None):
+        super().__init__(parent)
+        self.slot = slot  # Scheduler slot this grid's requests are issued under
+        self.scheduler = RequestScheduler.instance()
+        self.items = []
+        self.content_type = "movie"
+        self.url = None
+        self.params = {}
+        self.offline = None  # Callable returning local items to show if the first page fails
+        self.local_items = []  # Shown from the local catalog ahead of the network pages
+        self.local_ids = set()
+        self.provisional = False  # Items after the local ones stand in until the first page arrives
+        self.page = 0
+        self.total_pages = 0
+        self.loading = False
+        self.message = ""  # Shown by the view when there are no items
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.items):
+            return None
+        item = self.items[index.row()]
+        if role == self.ItemRole:
+            return item
+        if role == Qt.DisplayRole:
+            return item.get("title") or item.get("name", "Unknown")
+        return None
+
+    # Lets queued poster downloads for the items being dropped go
+    def release_images(self):
+        keys = []
+        for item in self.items:
+            kind, image_path = ContentTileDelegate.image(item)
+            if image_path:
+                width, height = ContentTileDelegate.poster_size(self.content_type)
+                keys.append(ImageLoader.spec(kind, image_path, width, height, device_pixel_ratio())[0])
+        ImageLoader.instance().release(keys)
+
+    # Starts over with the first page of a paginated endpoint. Local items (e.g. offline search
+    # hits) are shown at once, and network pages only add the items they do not already cover;
+    # if the local items fill a page, the network is not asked until the user scrolls past them.
+    # Provisional items (e.g. a shorter query's results narrowed down) are shown after the local
+    # ones and replaced by the first page when it arrives.
+    def load(self, url, params, content_type, offline=None, local_items=None, provisional_items=None):
+        self.scheduler.cancel(self.slot)
+        self.release_images()
+        self.beginResetModel()
+        self.local_items = list(local_items or [])
+        self.local_ids = {item.get("id") for item in self.local_items}
+        provisional_items = [item for item in provisional_items or [] if item.get("id") not in self.local_ids]
+        self.provisional = bool(provisional_items)
+        self.items = self.local_items + provisional_items
+        self.content_type = content_type
+        self.url = url
+        self.params = dict(params)
+        self.offline = offline
+        self.page = 0
+        self.total_pages = 1
+        self.message = "" if self.items else "Loading..."
+        # Marked as loading before the reset so the view's fetchMore does not request page 1 too
+        self.loading = self.provisional or len(self.items) < self.PAGE_SIZE
+        self.endResetModel()
+        if self.items:
+            self.loaded.emit(len(self.items))
+        if self.loading:
+            self.request_page(1)
+
+    # Shows a fixed list of items that has no further pages
+    def set_items(self, items, content_type, notify=True):
+        self.scheduler.cancel(self.slot)
+        self.release_images()
+        self.beginResetModel()
+        self.items = list(items)
+        self.local_items = []
+        self.local_ids = set()
+        self.provisional = False
+        self.content_type = content_type
+        self.url = None
+        self.page = self.total_pages = 1
+        self.loading = False
+        self.message = "" if items or not notify else "No results found or failed to load content."
+        self.endResetModel()
+        if notify:
+            self.loaded.emit(len(self.items))
+
+    def clear(self):
+        self.set_items([], self.content_type, notify=False)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.url is not None and not self.loading and self.page < self.total_pages
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.request_page(self.page + 1)
+
+    def request_page(self, page):
+        self.loading = True
+        url = self.url
+        self.scheduler.submit(self.slot, url, dict(self.params, page=page),
+                              lambda result: self.on_page(url, page, result),
+                              shape=lambda data: Page.from_response(data, page))
+
+    # Takes a Page built on the pool thread
+    def on_page(self, url, page, result):
+        with tracing.span("grid page", "ui", page=page):
+            if url != self.url:
+                return  # Response for a list this model no longer shows
+            self.loading = False
+            results = [item for item in result.items if item.get("id") not in self.local_ids]
+            if page == 1 and not result.ok and self.provisional:
+                self.total_pages = self.page  # Refinement failed: keep the provisional items
+            elif page == 1 and (not self.local_items or self.provisional):
+                if not result.ok and self.offline is not None:
+                    results = self.offline()  # Network failed: fall back to the local catalog store
+                    result.total_pages = 1
+                # First page, a revalidated copy of it, or the refined results replacing provisional ones
+                self.beginResetModel()
+                self.items = self.local_items + list(results)
+                self.provisional = False
+                self.page = 1
+                self.total_pages = max(result.total_pages, 1)
+                self.message = "" if self.items else "No results found or failed to load content."
+                self.endResetModel()
+                self.loaded.emit(len(self.items))
+            elif page == self.page + 1 and result.ok:
+                self.page = page
+                self.total_pages = result.total_pages
+                if results:
+                    self.beginInsertRows(QModelIndex(), len(self.items), len(self.items) + len(results) - 1)
+                    self.items.extend(results)
+                    self.endInsertRows()
+            elif not result.ok:
+                self.total_pages = self.page  # Stop paging after a failed request
+
+# Paints content tiles directly instead of building a widget tree per item, so a grid of any
+# length costs only the tiles currently on screen. Buttons are hit-tested in editorEvent.
+class ContentTileDelegate(QStyledItemDelegate):
+    details_clicked = pyqtSignal(QModelIndex)
+    favorite_clicked = pyqtSignal(QModelIndex)
+
+    TILE_SIZE = QSize(260, 500)
+    PADDING = 15
+    BUTTON_HEIGHT = 36
+
+    def __init__(self, is_favorite, parent=None):
+        super().__init__(parent)
+        self.is_favorite = is_favorite  # Callable(content_type, item_id) -> bool
+        self.image_loader = ImageLoader.instance()
+        self.title_font = QFont("Arial")
+        self.title_font.setPixelSize(16)
+        self.title_font.setBold(True)
+        self.text_font = QFont("Arial")
+        self.text_font.setPixelSize(14)
+
+    def sizeHint(self, option, index):
+        return self.TILE_SIZE
+
+    @staticmethod
+    def poster_size(content_type):
+        return (200, 300) if content_type == "person" else (220, 330)
+
+    # Image kind and path of a tile: its poster, or a person's profile picture
+    @staticmethod
+    def image(item):
+        if item.get("poster_path"):
+            return "poster", item["poster_path"]
+        return "profile", item.get("profile_path")
+
+    def button_rects(self, rect):
+        inner = rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        top = inner.bottom() - self.BUTTON_HEIGHT + 1
+        half = (inner.width() - 10) // 2
+        return (QRect(inner.left(), top, half, self.BUTTON_HEIGHT),
+                QRect(inner.left() + half + 10, top, inner.width() - half - 10, self.BUTTON_HEIGHT))
+
+    def paint(self, painter, option, index):
+        start = time.perf_counter() if tracing.enabled else None  # Runs per tile per frame
+        item = index.data(ContentGridModel.ItemRole)
+        content_type = index.model().content_type
+        rect = option.rect
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor("#222222"))
+        painter.drawRoundedRect(rect, 10, 10)
+        inner = rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+
+        # Poster, or a placeholder until the image loader has it (or has given up on it)
+        width, height = self.poster_size(content_type)
+        poster_rect = QRect(inner.left() + (inner.width() - width) // 2, inner.top(), width, height)
+        kind, image_path = self.image(item)
+        ratio = device_pixel_ratio()
+        pixmap = self.image_loader.request(kind, image_path, width, height, ratio) if image_path else None
+        if pixmap is not None:
+            ratio = pixmap.devicePixelRatio()
+            target = QRect(0, 0, round(pixmap.width() / ratio), round(pixmap.height() / ratio))
+            target.moveCenter(poster_rect.center())
+            painter.drawPixmap(target, pixmap)
+        elif image_path:
+            painter.setPen(QColor("#AAAAAA"))
+            painter.setFont(self.text_font)
+            failed = ImageLoader.spec(kind, image_path, width, height, ratio)[0] in self.image_loader.failed
+            painter.drawText(poster_rect, Qt.AlignCenter, "Image unavailable" if failed else "Loading...")
+
+        # Content specific information
+        y = poster_rect.bottom() + 10
+        if content_type == "person":
+            lines = [(item.get("name", "Unknown"), self.title_font, "#FFFFFF", 44)]
+            known_for = item.get("known_for", [])
+            if known_for:
+                known_for_text = ", ".join([x.get("title") or x.get("name") or "Unknown" for x in known_for[:2]])
+                lines.append((known_for_text, self.text_font, "#AAAAAA", 40))
+        else:
+            lines = []
+            if "vote_average" in item:
+                lines.append((f"★ {int(item['vote_average'] * 10)}%", self.title_font, "#FF0000", 22))
+            lines.append((item.get("title") or item.get("name", "Unknown"), self.title_font, "#FFFFFF", 44))
+            lines.append((item.get("release_date") or item.get("first_air_date", "N/A"), self.text_font, "#AAAAAA", 20))
+        for text, font, color, line_height in lines:
+            painter.setFont(font)
+            painter.setPen(QColor(color))
+            painter.drawText(QRect(inner.left(), y, inner.width(), line_height),
+                             Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap, text)
+            y += line_height + 4
+
+        # Details / Favorite buttons
+        details_rect, fav_rect = self.button_rects(rect)
+        cursor = option.widget.viewport().mapFromGlobal(QCursor.pos()) if option.widget else None
+        hovered = option.state & QStyle.State_MouseOver and cursor is not None
+        favorite = self.is_favorite(item.get("media_type", content_type), item.get("id"))
+        for button_rect, text, color, hover_color in (
+                (details_rect, "Details", "#FF0000", "#CC0000"),
+                (fav_rect, "★ Unfavorite" if favorite else "❤ Favorite", "#333333", "#444444")):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(hover_color if hovered and button_rect.contains(cursor) else color))
+            painter.drawRoundedRect(button_rect, 5, 5)
+            painter.setPen(QColor("#FFFFFF"))
+            painter.setFont(self.text_font)
+            painter.drawText(button_rect, Qt.AlignCenter, text)
+        painter.restore()
+        if start is not None:
+            tracing.record("paint tile", start, "ui")
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            details_rect, fav_rect = self.button_rects(option.rect)
+            if details_rect.contains(event.pos()):
+                self.details_clicked.emit(index)
+                return True
+            if fav_rect.contains(event.pos()):
+                self.favorite_clicked.emit(index)
+                return True
+        return super().editorEvent(event, model, option, index)
+
+# Virtualized grid of content tiles. QListView only lays out and paints the rows in view,
+# and the next page is requested once the user scrolls within a couple of rows of the end.
+class ContentGridView(QListView):
+    settled = pyqtSignal(str, list)  # Content type and visible items, once scrolling and loading pause
+    hovered = pyqtSignal(str, dict)  # Content type and item under the pointer
+
+    PREFETCH_ROWS = 2
+    SETTLE_MS = 400
+
+    def __init__(self, model, delegate, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.setItemDelegate(delegate)
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setSpacing(10)
+        self.setSelectionMode(QListView.NoSelection)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(30)
+        self.setMouseTracking(True)
+        self.setStyleSheet("QListView { background-color: #121212; border: none; }")
+        self.verticalScrollBar().valueChanged.connect(self.maybe_fetch_more)
+        model.rowsInserted.connect(self.maybe_fetch_more)
+        model.modelReset.connect(self.maybe_fetch_more)
+        ImageLoader.instance().image_ready.connect(self.viewport().update)
+        self.hovered_row = -1
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(self.SETTLE_MS)
+        self.settle_timer.timeout.connect(lambda: self.settled.emit(self.model().content_type, self.visible_items()))
+        self.verticalScrollBar().valueChanged.connect(lambda value: self.settle_timer.start())
+        model.rowsInserted.connect(lambda *args: self.settle_timer.start())
+        model.modelReset.connect(self.settle_timer.start)
+
+    # Requests the next page when the remaining rows below the viewport run short
+    def maybe_fetch_more(self, *args):
+        self.executeDelayedItemsLayout()  # Make sure the scroll range reflects newly inserted rows
+        scroll_bar = self.verticalScrollBar()
+        remaining = scroll_bar.maximum() - scroll_bar.value()
+        if remaining <= self.PREFETCH_ROWS * ContentTileDelegate.TILE_SIZE.height() and self.model().canFetchMore():
+            self.model().fetchMore()
+
+    # Items whose tiles intersect the viewport, in display order
+    def visible_items(self):
+        self.executeDelayedItemsLayout()
+        viewport = self.viewport().rect()
+        items = []
+        for row in range(self.model().rowCount()):
+            rect = self.visualRect(self.model().index(row))
+            if rect.top() > viewport.bottom():
+                break  # Tiles flow left to right, top to bottom
+            if rect.intersects(viewport):
+                items.append(self.model().items[row])
+        return items
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.settle_timer.start()
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        index = self.indexAt(event.pos())
+        self.viewport().update(self.visualRect(index))  # Button hover state
+        if index.isValid() and index.row() != self.hovered_row:
+            self.hovered.emit(self.model().content_type, index.data(ContentGridModel.ItemRole))
+        self.hovered_row = index.row()
+
+    # Draws the model's status message when there is nothing to show
+    def paintEvent(self, event):
+        with tracing.span("paint grid", "ui"):
+            super().paintEvent(event)
+            if self.model().rowCount():
+                startup_mark("first grid paint")
+            if self.model().rowCount() == 0 and self.model().message:
+                painter = QPainter(self.viewport())
+                painter.setPen(QColor("#FF0000" if not self.model().loading else "#AAAAAA"))
+                font = QFont("Arial")
+                font.setPixelSize(16)
+                painter.setFont(font)
+                painter.drawText(self.viewport().rect().adjusted(0, 20, 0, 0), Qt.AlignHCenter | Qt.AlignTop, self.model().message)
+                painter.end()
+
+# Loaders for the scheduler pool, which keep numpy and scipy out of the startup imports
+def open_recommender():
+    from recommender import load_recommender
+    return load_recommender()
+
+# Appends a title opened in a detail view to the local catalog; returns its compact item
+def append_viewed_item(content_type, item_id, data):
+    from recommender import append_to_catalog, compact_item
+    item = compact_item(dict(data, id=item_id), content_type)
+    append_to_catalog([item])
+    return item
+
+def open_catalog_store():
+    from catalog_store import CatalogStore
+    return CatalogStore.open()
+
+# Speculatively loads detail payloads for the tiles on screen into the response cache, so a
+# DetailDialog opens without a round trip. Runs at prefetch priority, at most
+# PREFETCH_CONCURRENCY requests at a time and PREFETCH_KB_PER_MINUTE of downloads; hovered
+# tiles jump the queue, and each settled grid replaces what is still waiting. A budget of 0
+# disables it.
+class DetailPrefetcher(QObject):
+    def __init__(self, client, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.scheduler = RequestScheduler.instance()
+        self.queue = []  # (content_type, item_id), next first
+        self.in_flight = {}  # Scheduler slot -> (content_type, item_id)
+        self.done = set()
+        self.downloads = deque()  # (time, bytes) over the last minute
+        self.resume_timer = QTimer(self)
+        self.resume_timer.setSingleShot(True)
+        self.resume_timer.timeout.connect(self.pump)
+
+    def keys(self, content_type, items):
+        keys = []
+        for item in items:
+            key = (item.get("media_type", content_type), item.get("id"))
+            if key[0] in DETAIL_IMAGES and key[1] is not None and key not in self.done:
+                keys.append(key)
+        return keys
+
+    # Queues the visible items of a settled grid in place of anything still waiting
+    def prefetch_visible(self, content_type, items):
+        self.queue = self.keys(content_type, items)
+        self.pump()
+
+    # Moves a hovered item to the front of the queue
+    def prefetch_hovered(self, content_type, item):
+        keys = self.keys(content_type, [item])
+        self.queue = keys + [key for key in self.queue if key not in keys]
+        self.pump()
+
+    def pump(self):
+        if PREFETCH_KB_PER_MINUTE <= 0:
+            self.queue = []
+            return
+        now = time.monotonic()
+        while self.downloads and now - self.downloads[0][0] > 60:
+            self.downloads.popleft()
+        while self.queue and len(self.in_flight) < PREFETCH_CONCURRENCY:
+            if self.downloads and sum(size for _, size in self.downloads) >= PREFETCH_KB_PER_MINUTE * 1024:
+                self.resume_timer.start(int((60 - (now - self.downloads[0][0])) * 1000) + 100)
+                return
+            key = self.queue.pop(0)
+            slot = f"prefetch-{key[0]}-{key[1]}"
+            if key in self.done or slot in self.in_flight:
+                continue
+            self.in_flight[slot] = key
+            ratio = device_pixel_ratio()
+            self.scheduler.submit_call(slot, lambda key=key: self.client.prefetch_details(*key, ratio),
+                                       lambda size, slot=slot: self.on_prefetched(slot, size), PRIORITY_PREFETCH)
+
+    def on_prefetched(self, slot, size):
+        key = self.in_flight.pop(slot, None)
+        if key is not None and size is not None:
+            self.done.add(key)
+        self.downloads.append((time.monotonic(), size or 0))
+        self.pump()
+
+    # Drops the queue and cancels requests in flight, e.g. when the category changes
+    def cancel(self):
+        self.queue = []
+        self.resume_timer.stop()
+        for slot in self.in_flight:
+            self.scheduler.cancel(slot)
+        self.in_flight.clear()
 
 # Dialog for simulated user login
 class LoginDialog(QDialog):
@@ -101,14 +915,16 @@ class LoginDialog(QDialog):
 
 # Dialog to display detailed information about a movie, TV show, or person
 class DetailDialog(QDialog):
-    def __init__(self, content_type, item_id, tmdb_api_key, parent=None):
+    def __init__(self, content_type, item_id, client, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Details")
         self.normal_size = QSize(900, 900)  # Larger default size
         self.setFixedSize(self.normal_size)  # Start with normal size
         self.is_maximized = False
         
-        # Enhanced style sheet with better typography
+        # Enhanced style sheet with better typography. Every widget in the dialog is styled
+        # from here through object names and properties, so the sheet is parsed once per dialog.
+        style_started = time.perf_counter()
         self.setStyleSheet("""
             QDialog {
                 background-color: #121212;
@@ -149,11 +965,81 @@ class DetailDialog(QDialog):
             QPushButton:hover {
                 background-color: #CC0000;
             }
+            QWidget#titleBar {
+                background-color: #222222;
+                padding: 10px;
+            }
+            QLabel#dialogTitle {
+                font-size: 18px;
+                color: #FF0000;
+                font-weight: bold;
+            }
+            QPushButton#maximizeButton {
+                background: none;
+                color: #FFFFFF;
+                font-size: 18px;
+                padding: 0px;
+                min-width: 24px;
+                max-width: 24px;
+            }
+            QPushButton#maximizeButton:hover {
+                color: #FF0000;
+            }
+            QWidget#content {
+                background-color: #121212;
+            }
+            QFrame#section {
+                background-color: #222222;
+                border-radius: 8px;
+                padding: 15px;
+            }
+            QFrame#section[spaced="true"] {
+                margin-top: 10px;
+            }
+            QFrame#panel {
+                background-color: #333333;
+                border-radius: 8px;
+                padding: 15px;
+            }
+            QFrame#card {
+                background-color: #333333;
+                border-radius: 8px;
+                padding: 10px;
+            }
+            QFrame#plain, QScrollArea#strip, QScrollArea#strip > QWidget > QWidget {
+                background: transparent;
+                border: none;
+            }
+            QTextEdit#textBlock {
+                border-radius: 5px;
+            }
+            QLabel#placeholder {
+                color: #AAAAAA;
+                font-size: 14px;
+            }
+            QLabel#error {
+                color: #FF0000;
+                font-size: 16px;
+            }
+            QLabel#cardText {
+                color: #FFFFFF;
+                font-size: 14px;
+            }
         """)
+        tracing.record("dialog stylesheet", style_started, "ui")
         
         self.content_type = content_type
         self.item_id = item_id
-        self.tmdb_api_key = tmdb_api_key
+        self.client = client
+        self.image_loader = ImageLoader.instance()
+        self.scheduler = RequestScheduler.instance()
+        self.request_slot = f"detail-{id(self)}"
+        self.finished.connect(lambda: self.scheduler.cancel(self.request_slot))
+        self.lazy_images = []  # (label, kind, file_path, width, height) waiting to scroll into view
+        self.catalog_fed = False  # Whether this item was handed to the local catalog yet
+        self.lazy_timer = QTimer(self)
+        self.lazy_timer.setSingleShot(True)
+        self.lazy_timer.timeout.connect(self.load_visible_images)
         
         # Main layout
         main_layout = QVBoxLayout(self)
@@ -162,29 +1048,18 @@ class DetailDialog(QDialog):
         
         # Custom title bar with maximize button
         title_bar = QWidget()
-        title_bar.setStyleSheet("background-color: #222222; padding: 10px;")
+        title_bar.setObjectName("titleBar")
+        title_bar.setAttribute(Qt.WA_StyledBackground)
         title_bar_layout = QHBoxLayout(title_bar)
         title_bar_layout.setContentsMargins(15, 5, 15, 5)
         
         self.title_label = QLabel("Details")
-        self.title_label.setStyleSheet("font-size: 18px; color: #FF0000; font-weight: bold;")
+        self.title_label.setObjectName("dialogTitle")
         title_bar_layout.addWidget(self.title_label)
         title_bar_layout.addStretch()
         
         self.btn_maximize = QPushButton("⛶")  # Maximize symbol
-        self.btn_maximize.setStyleSheet("""
-            QPushButton {
-                background: none;
-                color: #FFFFFF;
-                font-size: 18px;
-                padding: 0px;
-                min-width: 24px;
-                max-width: 24px;
-            }
-            QPushButton:hover {
-                color: #FF0000;
-            }
-        """)
+        self.btn_maximize.setObjectName("maximizeButton")
         self.btn_maximize.clicked.connect(self.toggle_maximize)
         title_bar_layout.addWidget(self.btn_maximize)
         
@@ -194,11 +1069,12 @@ class DetailDialog(QDialog):
         self.scroll = QScrollArea()
         self.scroll.setWidgetResizable(True)
         self.content = QWidget()
-        self.content.setStyleSheet("background-color: #121212;")
+        self.content.setObjectName("content")
         self.content_layout = QVBoxLayout(self.content)
         self.content_layout.setContentsMargins(20, 20, 20, 20)
         self.content_layout.setSpacing(15)
         self.scroll.setWidget(self.content)
+        self.scroll.verticalScrollBar().valueChanged.connect(lambda value: self.lazy_timer.start())
         main_layout.addWidget(self.scroll)
 
         # Set default font for better readability
@@ -220,62 +1096,181 @@ class DetailDialog(QDialog):
             self.move(0, 0)
         self.is_maximized = not self.is_maximized
 
-    def load_details(self):
-        url = f"https://api.themoviedb.org/3/{self.content_type}/{self.item_id}"
-        params = {
-            "api_key": self.tmdb_api_key,
-            "append_to_response": "combined_credits,images" if self.content_type == "person" 
-                               else "credits,videos,reviews,recommendations,watch/providers"
-        }
-        self.worker = FetchWorker(url, params)
-        self.worker.result.connect(self.display_details)
-        self.worker.start()
-
-    def display_details(self, data):
-        if not data:
-            error_label = QLabel("Failed to load details")
-            error_label.setStyleSheet("color: #FF0000; font-size: 16px;")
-            self.content_layout.addWidget(error_label)
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.lazy_timer.start()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.lazy_timer.start()
+
+    # Creates a placeholder label that the shared image loader fills in asynchronously.
+    # Lazy labels (card strips further down) are only requested once they near the viewport.
+    def image_label(self, kind, file_path, width, height, lazy=False):
+        label = QLabel("Loading...")
+        label.setFixedSize(width, height)
+        label.setObjectName("placeholder")
+        label.setAlignment(Qt.AlignCenter)
+        if lazy:
+            self.lazy_images.append((label, kind, file_path, width, height))
+            self.lazy_timer.start()
+        else:
+            self.image_loader.load(label, kind, file_path, width, height)
+        return label
+
+    # True if widget lies within LAZY_IMAGE_MARGIN pixels of the visible part of every scroll
+    # area containing it (the dialog body and, for cards, their horizontal strip)
+    def near_viewport(self, widget):
+        if not widget.isVisibleTo(self):
+            return False
+        parent = widget.parentWidget()
+        while parent is not None and parent is not self:
+            scroll_area = parent.parentWidget()
+            if isinstance(scroll_area, QScrollArea) and parent is scroll_area.viewport():
+                rect = QRect(widget.mapTo(parent, QPoint(0, 0)), widget.size())
+                margin = LAZY_IMAGE_MARGIN
+                if not rect.intersects(parent.rect().adjusted(-margin, -margin, margin, margin)):
+                    return False
+            parent = parent.parentWidget()
+        return True
+
+    # Starts loading the lazy images that have scrolled into (or near) view
+    def load_visible_images(self):
+        if not self.isVisible():
             return
+        waiting = []
+        for entry in self.lazy_images:
+            label = entry[0]
+            if sip.isdeleted(label):
+                continue
+            if self.near_viewport(label):
+                self.image_loader.load(*entry)
+            else:
+                waiting.append(entry)
+        self.lazy_images = waiting
+
+    # Creates a frame styled by the dialog stylesheet rule for the given object name
+    def styled_frame(self, name, spaced=False):
+        frame = QFrame()
+        frame.setObjectName(name)
+        if spaced:
+            frame.setProperty("spaced", True)
+        return frame
+
+    # Creates a borderless, horizontally scrolling strip for a row of cards
+    def strip_scroll_area(self):
+        scroll_area = QScrollArea()
+        scroll_area.setObjectName("strip")
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        scroll_area.horizontalScrollBar().valueChanged.connect(lambda value: self.lazy_timer.start())
+        return scroll_area
+
+    # Horizontal strip of poster cards (title and rating) for a list of movies or shows
+    def recommendation_section(self, heading, recs):
+        recs_frame = self.styled_frame("section")
+        recs_layout = QVBoxLayout(recs_frame)
+        recs_layout.setContentsMargins(10, 10, 10, 10)
+        recs_layout.setSpacing(15)
+        
+        recs_layout.addWidget(QLabel(f"<h3 style='color:#FF0000; margin-bottom: 10px;'>{heading}</h3>"))
+        
+        # Horizontal scroll area for recommendations
+        scroll_area = self.strip_scroll_area()
+        
+        recs_widget = QWidget()
+        recs_hbox = QHBoxLayout(recs_widget)
+        recs_hbox.setContentsMargins(5, 5, 5, 5)
+        recs_hbox.setSpacing(15)
+        
+        for rec in recs:
+            rec_frame = self.styled_frame("card")
+            rec_layout = QVBoxLayout(rec_frame)
+            rec_layout.setContentsMargins(10, 10, 10, 10)
+            rec_layout.setSpacing(10)
+            
+            # Recommendation poster
+            poster_path = rec.get("poster_path")
+            if poster_path:
+                rec_layout.addWidget(self.image_label("poster", poster_path, 150, 225, lazy=True), alignment=Qt.AlignCenter)
+            
+            # Recommendation title
+            rec_title = rec.get("title") or rec.get("name", "Unknown")
+            title_label = QLabel(f"<b style='color:#FFFFFF; font-size: 14px;'>{rec_title}</b>")
+            title_label.setAlignment(Qt.AlignCenter)
+            title_label.setWordWrap(True)
+            
+            # Recommendation rating
+            vote_avg = rec.get("vote_average", 0)
+            if vote_avg > 0:
+                rating_label = QLabel(f"<span style='color:#FF0000; font-size: 13px;'>★ {vote_avg:.1f}</span>")
+                rating_label.setAlignment(Qt.AlignCenter)
+                rec_layout.addWidget(rating_label)
+            
+            rec_layout.addWidget(title_label)
+            recs_hbox.addWidget(rec_frame)
+        
+        scroll_area.setWidget(recs_widget)
+        recs_layout.addWidget(scroll_area)
+        return recs_frame
 
-        if self.content_type == "person":
-            self.display_person_details(data)
+    # Renders at once from a fresh cached payload (e.g. one the grid prefetched); otherwise
+    # fetches it, showing a stale copy first if there is one
+    def load_details(self):
+        details, fresh = self.client.cached_details(self.content_type, self.item_id)
+        if fresh:
+            self.display_details(details.data)
         else:
-            self.display_media_details(data)
+            url, params = self.client.detail_request(self.content_type, self.item_id)
+            self.scheduler.submit(self.request_slot, url, params, self.display_details)
+
+    # Removes everything rendered so far, so a revalidated payload replaces the stale one
+    def clear_content(self):
+        while self.content_layout.count():
+            widget = self.content_layout.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+        self.lazy_images = []
 
-    def display_person_details(self, data):
+    def display_details(self, data):
+        with tracing.span("dialog build", "ui", content_type=self.content_type, id=self.item_id):
+            self.clear_content()
+            details = details_from_payload(self.content_type, self.item_id, data)
+            if details is None:
+                error_label = QLabel("Failed to load details")
+                error_label.setObjectName("error")
+                self.content_layout.addWidget(error_label)
+                return
+
+            if self.content_type == "person":
+                self.display_person_details(details)
+            else:
+                # Feeds the offline recommender once per dialog, not again on revalidation
+                add_viewed_item = getattr(self.parent(), "add_viewed_item", None)
+                if add_viewed_item is not None and not self.catalog_fed:
+                    self.catalog_fed = True
+                    add_viewed_item(self.content_type, self.item_id, data)
+                self.display_media_details(details)
+
+    def display_person_details(self, details):
         # Display person's name
-        name = data.get("name", "Unknown")
+        name = details.name
         self.title_label.setText(f"Details - {name}")
         
         # Main content frame
-        main_frame = QFrame()
-        main_frame.setStyleSheet("background-color: #222222; border-radius: 8px; padding: 15px;")
+        main_frame = self.styled_frame("section")
         main_layout = QHBoxLayout(main_frame)
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.setSpacing(20)
 
         # Left column - Profile image (larger size)
-        profile_path = data.get("profile_path")
-        if profile_path:
-            try:
-                img_data = requests.get(f"https://image.tmdb.org/t/p/original{profile_path}").content
-                pixmap = QPixmap()
-                pixmap.loadFromData(img_data)
-                pixmap = pixmap.scaled(350, 525, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                poster_label = QLabel()
-                poster_label.setPixmap(pixmap)
-                poster_label.setAlignment(Qt.AlignCenter)
-                main_layout.addWidget(poster_label)
-            except Exception as e:
-                print(f"Error loading profile image: {e}")
-                error_label = QLabel("Image unavailable")
-                error_label.setStyleSheet("color: #FFFFFF; font-size: 14px;")
-                main_layout.addWidget(error_label)
+        if details.profile_path:
+            kind, _, width, height = DETAIL_IMAGES["person"]
+            main_layout.addWidget(self.image_label(kind, details.profile_path, width, height))
 
         # Right column - Personal info
-        info_frame = QFrame()
-        info_frame.setStyleSheet("background-color: #333333; border-radius: 8px; padding: 15px;")
+        info_frame = self.styled_frame("panel")
         info_layout = QVBoxLayout(info_frame)
         info_layout.setContentsMargins(10, 10, 10, 10)
         info_layout.setSpacing(15)
@@ -285,52 +1280,34 @@ class DetailDialog(QDialog):
         info_layout.addWidget(name_label)
 
         # Personal information with better formatting
-        also_known_as = data.get("also_known_as", [])
-        if also_known_as and also_known_as[0] != name:
+        if details.real_name:
+            info_layout.addWidget(QLabel(
+                f"<p style='color:#FFFFFF; font-size: 15px; margin: 5px 0;'>"
+                f"<b style='color:#FF0000;'>Real Name:</b> {details.real_name}</p>"
+            ))
+
+        if details.birthday:
+            info_layout.addWidget(QLabel(
+                f"<p style='color:#FFFFFF; font-size: 15px; margin: 5px 0;'>"
+                f"<b style='color:#FF0000;'>Age:</b> {details.age} years</p>"
+            ))
             info_layout.addWidget(QLabel(
                 f"<p style='color:#FFFFFF; font-size: 15px; margin: 5px 0;'>"
-                f"<b style='color:#FF0000;'>Real Name:</b> {also_known_as[0]}</p>"
+                f"<b style='color:#FF0000;'>Birthday:</b> {details.birthday}</p>"
             ))
 
-        birthday = data.get("birthday")
-        if birthday:
-            try:
-                birth_date = datetime.strptime(birthday, "%Y-%m-%d")
-                age = (datetime.now() - birth_date).days // 365
-                info_layout.addWidget(QLabel(
-                    f"<p style='color:#FFFFFF; font-size: 15px; margin: 5px 0;'>"
-                    f"<b style='color:#FF0000;'>Age:</b> {age} years</p>"
-                ))
-                info_layout.addWidget(QLabel(
-                    f"<p style='color:#FFFFFF; font-size: 15px; margin: 5px 0;'>"
-                    f"<b style='color:#FF0000;'>Birthday:</b> {birthday}</p>"
-                ))
-            except:
-                pass
-
-        birthplace = data.get("place_of_birth")
-        if birthplace:
+        if details.birthplace:
             info_layout.addWidget(QLabel(
                 f"<p style='color:#FFFFFF; font-size: 15px; margin: 5px 0;'>"
-                f"<b style='color:#FF0000;'>Birthplace:</b> {birthplace}</p>"
+                f"<b style='color:#FF0000;'>Birthplace:</b> {details.birthplace}</p>"
             ))
 
         # Biography with better formatting
-        biography = data.get("biography")
-        if biography:
+        if details.biography:
             bio_text = QTextEdit()
-            bio_text.setPlainText(biography)
+            bio_text.setPlainText(details.biography)
             bio_text.setReadOnly(True)
-            bio_text.setStyleSheet("""
-                QTextEdit {
-                    background-color: #1E1E1E;
-                    color: #FFFFFF;
-                    border: none;
-                    font-size: 14px;
-                    padding: 10px;
-                    border-radius: 5px;
-                }
-            """)
+            bio_text.setObjectName("textBlock")
             info_layout.addWidget(QLabel("<h3 style='color:#FF0000; margin-bottom: 5px;'>Biography</h3>"))
             info_layout.addWidget(bio_text)
 
@@ -338,62 +1315,39 @@ class DetailDialog(QDialog):
         self.content_layout.addWidget(main_frame)
 
         # Known for section with improved layout
-        known_for_frame = QFrame()
-        known_for_frame.setStyleSheet("background-color: #222222; border-radius: 8px; padding: 15px; margin-top: 10px;")
+        known_for_frame = self.styled_frame("section", spaced=True)
         known_for_layout = QVBoxLayout(known_for_frame)
         known_for_layout.setContentsMargins(10, 10, 10, 10)
         known_for_layout.setSpacing(15)
         
         known_for_layout.addWidget(QLabel("<h2 style='color:#FF0000; margin-bottom: 10px;'>Known For</h2>"))
 
-        credits = data.get("combined_credits", {})
-        if credits:
-            cast = sorted(credits.get("cast", []), 
-                         key=lambda x: x.get("popularity", 0), 
-                         reverse=True)[:5]  # Top 5 roles
+        for role in details.known_for:  # Top 5 roles
+            role_frame = self.styled_frame("card")
+            role_layout = QHBoxLayout(role_frame)
+            role_layout.setContentsMargins(10, 10, 10, 10)
+            role_layout.setSpacing(15)
             
-            for role in cast:
-                role_type = "Movie" if role.get("media_type") == "movie" else "TV Show"
-                role_name = role.get("title") or role.get("name") or "Unknown"
-                character = role.get("character") or "Unknown"
-                
-                role_frame = QFrame()
-                role_frame.setStyleSheet("background-color: #333333; border-radius: 8px; padding: 10px;")
-                role_layout = QHBoxLayout(role_frame)
-                role_layout.setContentsMargins(10, 10, 10, 10)
-                role_layout.setSpacing(15)
-                
-                # Role poster (larger thumbnail)
-                poster_path = role.get("poster_path")
-                if poster_path:
-                    try:
-                        img_data = requests.get(f"https://image.tmdb.org/t/p/w154{poster_path}").content
-                        pixmap = QPixmap()
-                        pixmap.loadFromData(img_data)
-                        poster_label = QLabel()
-                        poster_label.setPixmap(pixmap)
-                        role_layout.addWidget(poster_label)
-                    except:
-                        pass
-                
-                # Role info with better typography
-                role_info = QLabel(
-                    f"<p style='color:#FFFFFF; font-size: 15px; margin: 5px 0;'>"
-                    f"<b>{role_name}</b> ({role_type})<br>"
-                    f"<span style='font-size: 14px; color: #AAAAAA;'>as <i>{character}</i></span></p>"
-                )
-                role_info.setWordWrap(True)
-                role_layout.addWidget(role_info, stretch=1)
-                
-                known_for_layout.addWidget(role_frame)
+            # Role poster (larger thumbnail)
+            if role.poster_path:
+                role_layout.addWidget(self.image_label("poster", role.poster_path, 154, 231, lazy=True))
+            
+            # Role info with better typography
+            role_info = QLabel(
+                f"<p style='color:#FFFFFF; font-size: 15px; margin: 5px 0;'>"
+                f"<b>{role.title}</b> ({role.media_label})<br>"
+                f"<span style='font-size: 14px; color: #AAAAAA;'>as <i>{role.character}</i></span></p>"
+            )
+            role_info.setWordWrap(True)
+            role_layout.addWidget(role_info, stretch=1)
+            
+            known_for_layout.addWidget(role_frame)
 
         self.content_layout.addWidget(known_for_frame)
 
         # Gallery section with larger thumbnails
-        images = data.get("images", {}).get("profiles", [])
-        if images:
-            gallery_frame = QFrame()
-            gallery_frame.setStyleSheet("background-color: #222222; border-radius: 8px; padding: 15px; margin-top: 15px;")
+        if details.gallery:
+            gallery_frame = self.styled_frame("section", spaced=True)
             gallery_layout = QVBoxLayout(gallery_frame)
             gallery_layout.setContentsMargins(10, 10, 10, 10)
             gallery_layout.setSpacing(15)
@@ -401,44 +1355,26 @@ class DetailDialog(QDialog):
             gallery_layout.addWidget(QLabel("<h2 style='color:#FF0000; margin-bottom: 10px;'>Gallery</h2>"))
 
             # Horizontal scroll area for gallery
-            scroll_area = QScrollArea()
-            scroll_area.setWidgetResizable(True)
-            scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-            scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-            scroll_area.setStyleSheet("background: transparent; border: none;")
+            scroll_area = self.strip_scroll_area()
             
             gallery_widget = QWidget()
             gallery_hbox = QHBoxLayout(gallery_widget)
             gallery_hbox.setContentsMargins(5, 5, 5, 5)
             gallery_hbox.setSpacing(15)
             
-            for image in images[:10]:  # Show first 10 images
-                try:
-                    img_data = requests.get(f"https://image.tmdb.org/t/p/w300{image['file_path']}").content
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(img_data)
-                    pixmap = pixmap.scaled(200, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    
-                    image_frame = QFrame()
-                    image_frame.setStyleSheet("background: transparent;")
-                    image_layout = QVBoxLayout(image_frame)
-                    image_layout.setContentsMargins(0, 0, 0, 0)
-                    
-                    poster_label = QLabel()
-                    poster_label.setPixmap(pixmap)
-                    poster_label.setAlignment(Qt.AlignCenter)
-                    image_layout.addWidget(poster_label)
-                    
-                    gallery_hbox.addWidget(image_frame)
-                except:
-                    pass
+            for file_path in details.gallery:  # First 10 images
+                image_frame = self.styled_frame("plain")
+                image_layout = QVBoxLayout(image_frame)
+                image_layout.setContentsMargins(0, 0, 0, 0)
+                image_layout.addWidget(self.image_label("profile", file_path, 200, 300, lazy=True))
+                gallery_hbox.addWidget(image_frame)
             
             scroll_area.setWidget(gallery_widget)
             gallery_layout.addWidget(scroll_area)
             self.content_layout.addWidget(gallery_frame)
 
-    def display_media_details(self, data):
-        title = data.get("title") or data.get("name", "Unknown")
+    def display_media_details(self, details):
+        title = details.title
         self.title_label.setText(f"Details - {title}")
         
         # Main content container
@@ -458,32 +1394,18 @@ class DetailDialog(QDialog):
         top_layout.setSpacing(20)
 
         # Poster image (larger size)
-        poster_path = data.get("poster_path")
-        if poster_path:
-            try:
-                img_data = requests.get(f"https://image.tmdb.org/t/p/w300{poster_path}").content
-                pixmap = QPixmap()
-                pixmap.loadFromData(img_data)
-                pixmap = pixmap.scaled(300, 450, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                poster_label = QLabel()
-                poster_label.setPixmap(pixmap)
-                poster_label.setAlignment(Qt.AlignCenter)
-                top_layout.addWidget(poster_label)
-            except Exception as e:
-                print(f"Error loading poster: {e}")
-                error_label = QLabel("Poster unavailable")
-                error_label.setStyleSheet("color: #FFFFFF; font-size: 14px;")
-                top_layout.addWidget(error_label)
+        if details.poster_path:
+            kind, _, width, height = DETAIL_IMAGES[self.content_type]
+            top_layout.addWidget(self.image_label(kind, details.poster_path, width, height))
 
         # Basic info frame
-        info_frame = QFrame()
-        info_frame.setStyleSheet("background-color: #222222; border-radius: 8px; padding: 15px;")
+        info_frame = self.styled_frame("section")
         info_layout = QVBoxLayout(info_frame)
         info_layout.setContentsMargins(10, 10, 10, 10)
         info_layout.setSpacing(15)
 
         # Rating with star icon
-        rating = data.get("vote_average", 0)
+        rating = details.rating
         if rating > 0:
             rating_label = QLabel(
                 f"<p style='color:#FFFFFF; font-size: 16px; margin: 5px 0;'>"
@@ -492,16 +1414,15 @@ class DetailDialog(QDialog):
             info_layout.addWidget(rating_label)
 
         # Release date
-        date = data.get("release_date") or data.get("first_air_date")
-        if date:
+        if details.date:
             date_label = QLabel(
                 f"<p style='color:#FFFFFF; font-size: 16px; margin: 5px 0;'>"
-                f"<b style='color:#FF0000;'>Release Date:</b> {date}</p>"
+                f"<b style='color:#FF0000;'>Release Date:</b> {details.date}</p>"
             )
             info_layout.addWidget(date_label)
 
         # Genres
-        genres = ", ".join([g["name"] for g in data.get("genres", [])])
+        genres = ", ".join(details.genres)
         if genres:
             genres_label = QLabel(
                 f"<p style='color:#FFFFFF; font-size: 16px; margin: 5px 0;'>"
@@ -510,7 +1431,7 @@ class DetailDialog(QDialog):
             info_layout.addWidget(genres_label)
 
         # Runtime for movies
-        runtime = data.get("runtime")
+        runtime = details.runtime
         if runtime:
             hours = runtime // 60
             minutes = runtime % 60
@@ -521,11 +1442,10 @@ class DetailDialog(QDialog):
             info_layout.addWidget(runtime_label)
 
         # Number of episodes for TV shows
-        num_episodes = data.get("number_of_episodes")
-        if num_episodes:
+        if details.episodes:
             episodes_label = QLabel(
                 f"<p style='color:#FFFFFF; font-size: 16px; margin: 5px 0;'>"
-                f"<b style='color:#FF0000;'>Episodes:</b> {num_episodes}</p>"
+                f"<b style='color:#FF0000;'>Episodes:</b> {details.episodes}</p>"
             )
             info_layout.addWidget(episodes_label)
 
@@ -533,9 +1453,8 @@ class DetailDialog(QDialog):
         main_layout.addWidget(top_section)
 
         # Overview section with better formatting
-        overview = data.get("overview", "Not available")
-        overview_frame = QFrame()
-        overview_frame.setStyleSheet("background-color: #222222; border-radius: 8px; padding: 15px;")
+        overview = details.overview
+        overview_frame = self.styled_frame("section")
         overview_layout = QVBoxLayout(overview_frame)
         overview_layout.setContentsMargins(10, 10, 10, 10)
         
@@ -543,25 +1462,15 @@ class DetailDialog(QDialog):
         overview_text = QTextEdit()
         overview_text.setPlainText(overview)
         overview_text.setReadOnly(True)
-        overview_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #1E1E1E;
-                color: #FFFFFF;
-                border: none;
-                font-size: 14px;
-                padding: 10px;
-                border-radius: 5px;
-            }
-        """)
+        overview_text.setObjectName("textBlock")
         
         overview_layout.addWidget(overview_label)
         overview_layout.addWidget(overview_text)
         main_layout.addWidget(overview_frame)
 
         # Cast section with improved layout
-        if "credits" in data:
-            cast_frame = QFrame()
-            cast_frame.setStyleSheet("background-color: #222222; border-radius: 8px; padding: 15px;")
+        if details.cast is not None:
+            cast_frame = self.styled_frame("section")
             cast_layout = QVBoxLayout(cast_frame)
             cast_layout.setContentsMargins(10, 10, 10, 10)
             cast_layout.setSpacing(15)
@@ -569,49 +1478,29 @@ class DetailDialog(QDialog):
             cast_layout.addWidget(QLabel("<h3 style='color:#FF0000; margin-bottom: 10px;'>Cast</h3>"))
             
             # Horizontal scroll area for cast
-            scroll_area = QScrollArea()
-            scroll_area.setWidgetResizable(True)
-            scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-            scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-            scroll_area.setStyleSheet("background: transparent; border: none;")
+            scroll_area = self.strip_scroll_area()
             
             cast_widget = QWidget()
             cast_hbox = QHBoxLayout(cast_widget)
             cast_hbox.setContentsMargins(5, 5, 5, 5)
             cast_hbox.setSpacing(15)
             
-            for cast_member in data["credits"].get("cast", [])[:10]:  # Show first 10 cast members
-                cast_member_frame = QFrame()
-                cast_member_frame.setStyleSheet("background: #333333; border-radius: 8px; padding: 10px;")
+            for cast_member in details.cast:  # First 10 cast members
+                cast_member_frame = self.styled_frame("card")
                 cast_member_layout = QVBoxLayout(cast_member_frame)
                 cast_member_layout.setContentsMargins(10, 10, 10, 10)
                 cast_member_layout.setSpacing(10)
                 
                 # Cast member image
-                profile_path = cast_member.get("profile_path")
-                if profile_path:
-                    try:
-                        img_data = requests.get(f"https://image.tmdb.org/t/p/w185{profile_path}").content
-                        pixmap = QPixmap()
-                        pixmap.loadFromData(img_data)
-                        pixmap = pixmap.scaled(150, 225, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        
-                        poster_label = QLabel()
-                        poster_label.setPixmap(pixmap)
-                        poster_label.setAlignment(Qt.AlignCenter)
-                        cast_member_layout.addWidget(poster_label)
-                    except:
-                        pass
+                if cast_member.profile_path:
+                    cast_member_layout.addWidget(self.image_label("profile", cast_member.profile_path, 150, 225, lazy=True), alignment=Qt.AlignCenter)
                 
                 # Cast member info
-                name = cast_member.get("name", "Unknown")
-                character = cast_member.get("character", "Unknown")
-                
-                name_label = QLabel(f"<b style='color:#FFFFFF; font-size: 14px;'>{name}</b>")
+                name_label = QLabel(f"<b style='color:#FFFFFF; font-size: 14px;'>{cast_member.name}</b>")
                 name_label.setAlignment(Qt.AlignCenter)
                 name_label.setWordWrap(True)
                 
-                character_label = QLabel(f"<span style='color:#AAAAAA; font-size: 13px;'>as {character}</span>")
+                character_label = QLabel(f"<span style='color:#AAAAAA; font-size: 13px;'>as {cast_member.character}</span>")
                 character_label.setAlignment(Qt.AlignCenter)
                 character_label.setWordWrap(True)
                 
@@ -624,46 +1513,32 @@ class DetailDialog(QDialog):
             main_layout.addWidget(cast_frame)
 
         # Watch providers section
-        if "watch/providers" in data and "US" in data["watch/providers"].get("results", {}):
-            providers_frame = QFrame()
-            providers_frame.setStyleSheet("background-color: #222222; border-radius: 8px; padding: 15px;")
+        if details.providers is not None:
+            providers_frame = self.styled_frame("section")
             providers_layout = QVBoxLayout(providers_frame)
             providers_layout.setContentsMargins(10, 10, 10, 10)
             
             providers_layout.addWidget(QLabel("<h3 style='color:#FF0000; margin-bottom: 10px;'>Where to Watch</h3>"))
             
-            providers = data["watch/providers"]["results"]["US"].get("flatrate", [])
+            providers = details.providers
             if providers:
                 providers_hbox = QHBoxLayout()
                 providers_hbox.setContentsMargins(10, 10, 10, 10)
                 providers_hbox.setSpacing(15)
                 
-                for provider in providers[:6]:  # Show first 6 providers
-                    provider_frame = QFrame()
-                    provider_frame.setStyleSheet("background: #333333; border-radius: 8px; padding: 10px;")
+                for provider in providers:  # First 6 providers
+                    provider_frame = self.styled_frame("card")
                     provider_layout = QVBoxLayout(provider_frame)
                     provider_layout.setContentsMargins(10, 10, 10, 10)
                     provider_layout.setSpacing(10)
                     
                     # Provider logo
-                    logo_path = provider.get("logo_path")
-                    if logo_path:
-                        try:
-                            img_data = requests.get(f"https://image.tmdb.org/t/p/w154{logo_path}").content
-                            pixmap = QPixmap()
-                            pixmap.loadFromData(img_data)
-                            pixmap = pixmap.scaled(100, 100, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                            
-                            logo_label = QLabel()
-                            logo_label.setPixmap(pixmap)
-                            logo_label.setAlignment(Qt.AlignCenter)
-                            provider_layout.addWidget(logo_label)
-                        except:
-                            pass
+                    if provider.logo_path:
+                        provider_layout.addWidget(self.image_label("logo", provider.logo_path, 100, 100, lazy=True), alignment=Qt.AlignCenter)
                     
                     # Provider name
-                    name_label = QLabel(provider.get("provider_name", "Unknown"))
-                    name_label.setStyleSheet("color: #FFFFFF; font-size: 14px;")
+                    name_label = QLabel(provider.name)
+                    name_label.setObjectName("cardText")
                     name_label.setAlignment(Qt.AlignCenter)
                     provider_layout.addWidget(name_label)
                     
@@ -673,69 +1548,15 @@ class DetailDialog(QDialog):
                 main_layout.addWidget(providers_frame)
 
         # Recommendations section
-        if "recommendations" in data and data["recommendations"].get("results"):
-            recs_frame = QFrame()
-            recs_frame.setStyleSheet("background-color: #222222; border-radius: 8px; padding: 15px;")
-            recs_layout = QVBoxLayout(recs_frame)
-            recs_layout.setContentsMargins(10, 10, 10, 10)
-            recs_layout.setSpacing(15)
-            
-            recs_layout.addWidget(QLabel("<h3 style='color:#FF0000; margin-bottom: 10px;'>Recommendations</h3>"))
-            
-            # Horizontal scroll area for recommendations
-            scroll_area = QScrollArea()
-            scroll_area.setWidgetResizable(True)
-            scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-            scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-            scroll_area.setStyleSheet("background: transparent; border: none;")
-            
-            recs_widget = QWidget()
-            recs_hbox = QHBoxLayout(recs_widget)
-            recs_hbox.setContentsMargins(5, 5, 5, 5)
-            recs_hbox.setSpacing(15)
-            
-            for rec in data["recommendations"]["results"][:10]:  # Show first 10 recommendations
-                rec_frame = QFrame()
-                rec_frame.setStyleSheet("background: #333333; border-radius: 8px; padding: 10px;")
-                rec_layout = QVBoxLayout(rec_frame)
-                rec_layout.setContentsMargins(10, 10, 10, 10)
-                rec_layout.setSpacing(10)
-                
-                # Recommendation poster
-                poster_path = rec.get("poster_path")
-                if poster_path:
-                    try:
-                        img_data = requests.get(f"https://image.tmdb.org/t/p/w185{poster_path}").content
-                        pixmap = QPixmap()
-                        pixmap.loadFromData(img_data)
-                        pixmap = pixmap.scaled(150, 225, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        
-                        poster_label = QLabel()
-                        poster_label.setPixmap(pixmap)
-                        poster_label.setAlignment(Qt.AlignCenter)
-                        rec_layout.addWidget(poster_label)
-                    except:
-                        pass
-                
-                # Recommendation title
-                rec_title = rec.get("title") or rec.get("name", "Unknown")
-                title_label = QLabel(f"<b style='color:#FFFFFF; font-size: 14px;'>{rec_title}</b>")
-                title_label.setAlignment(Qt.AlignCenter)
-                title_label.setWordWrap(True)
-                
-                # Recommendation rating
-                vote_avg = rec.get("vote_average", 0)
-                if vote_avg > 0:
-                    rating_label = QLabel(f"<span style='color:#FF0000; font-size: 13px;'>★ {vote_avg:.1}</span>")
-                    rating_label.setAlignment(Qt.AlignCenter)
-                    rec_layout.addWidget(rating_label)
-                
-                rec_layout.addWidget(title_label)
-                rec_hbox.addWidget(rec_frame)
-            
-            scroll_area.setWidget(recs_widget)
-            recs_layout.addWidget(scroll_area)
-            main_layout.addWidget(recs_frame)
+        if details.recommendations:
+            main_layout.addWidget(self.recommendation_section("Recommendations", details.recommendations))
+
+        # Offline "more like this" from the local recommender
+        recommender = getattr(self.parent(), "recommender", None)
+        if recommender is not None and (self.content_type, self.item_id) in recommender:
+            similar = [item for item, score in recommender.similar(self.content_type, self.item_id, k=10)]
+            if similar:
+                main_layout.addWidget(self.recommendation_section("More Like This", similar))
 
         # Add main container to content layout
         self.content_layout.addWidget(main_container)
@@ -820,6 +1641,31 @@ class TMDbGUI(QMainWindow):
                 border: 1px solid #FF0000;
                 font-size: 14px;
             }
+            QPushButton#navButton {
+                color: #FFFFFF;
+                background: none;
+                border: none;
+                font-size: 16px;
+                padding: 5px 10px;
+            }
+            QPushButton#navButton:hover {
+                color: #FF0000;
+            }
+            QPushButton#navButton[active="true"] {
+                color: #FF0000;
+                border-bottom: 2px solid #FF0000;
+            }
+            QPushButton#footerButton {
+                background: #333333;
+                color: #FFFFFF;
+                border-radius: 15px;
+                padding: 8px 15px;
+                font-size: 14px;
+                min-width: 120px;
+            }
+            QPushButton#footerButton:hover {
+                background: #FF0000;
+            }
         """)
 
         # Set default font for the application
@@ -828,6 +1674,7 @@ class TMDbGUI(QMainWindow):
         self.setFont(font)
 
         # Load API keys from .env file
+        from dotenv import load_dotenv
         load_dotenv()
         self.tmdb_api_key = os.getenv("TMDB_API_KEY")
         self.youtube_api_key = os.getenv("YOUTUBE_API_KEY")
@@ -838,12 +1685,24 @@ class TMDbGUI(QMainWindow):
             sys.exit(1)
 
         # Initialize variables and caches
-        self.tmdb_image_base_url = "https://image.tmdb.org/t/p/w300"  # Higher resolution images
         self.trailer_cache = {}
         self.streaming_cache = {}
         self.logged_in = False
         self.username = None
-        self.favorites = []  # Local list for favorited items
+        self.user_store = None  # Favorites and viewing history, kept on disk; opened in the background
+        self.background_user_store = None  # Store the background open produced, until it is delivered
+        self.user_store_lock = threading.Lock()
+        self.closing = False
+        self.recommender = None  # Offline content-based recommender, loaded in the background
+        self.viewed_items = set()  # (content_type, id) appended to the catalog this session
+        self.catalog_store = None  # Memory-mapped local catalog, opened in the background
+        self.snapshot_items = []  # Last session's first screen, shown until it is revalidated
+        self.last_search = None  # (content_type, query) currently shown
+        self.scheduler = RequestScheduler.instance()  # Shared API request pool
+        self.client = TMDbClient(self.tmdb_api_key, image_cache=ImageLoader.instance().disk_cache)
+        self.prefetcher = DetailPrefetcher(self.client, self)  # Warms detail payloads for visible tiles
+        # Reading the favorites and history tables runs alongside building the window
+        self.scheduler.submit_call("user_store", self.open_user_store, self.on_user_store_opened)
 
         # Set up central widget and layout
         self.central_widget = QWidget()
@@ -856,15 +1715,145 @@ class TMDbGUI(QMainWindow):
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Welcome to WatchX!")
+        if tracing.enabled:
+            self.setup_trace_overlay()
 
         # Initialize UI components
         self.setup_header()
         self.setup_content_section()
         self.setup_footer()
 
-        # Load initial content
+        # Show last session's first screen now; fetching starts once the window is up
         self.current_content_type = "movie"
-        self.load_content("movie", "trending", "day")
+        self.started = False
+        self.load_snapshot()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.started:
+            self.started = True
+            startup_mark("window shown")
+            QTimer.singleShot(0, self.start_loading)
+
+    # Revalidates the first screen and starts the background work deferred from startup
+    def start_loading(self):
+        startup_mark("start loading")
+        self.load_content("movie", "trending", "day", provisional_items=self.snapshot_items)
+        self.scheduler.submit_call("recommender", open_recommender, self.on_recommender_loaded, PRIORITY_PREFETCH,
+                                   background=True)
+        self.scheduler.submit_call("catalog_store", open_catalog_store, self.on_catalog_store_opened, PRIORITY_PREFETCH)
+
+    # Fills the Today grid from the snapshot saved at the end of the last session, with its
+    # thumbnails put straight into QPixmapCache so the first paint has posters
+    def load_snapshot(self):
+        try:
+            with open(os.path.join(SNAPSHOT_DIR, "grid.json"), encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, name in snapshot.get("thumbnails", {}).items():
+            pixmap = QPixmap(os.path.join(SNAPSHOT_DIR, name))
+            if not pixmap.isNull():
+                pixmap.setDevicePixelRatio(snapshot.get("ratio", 1.0))
+                QPixmapCache.insert(key, pixmap)
+        self.snapshot_items = snapshot.get("items", [])
+        self.today_model.set_items(self.snapshot_items, snapshot.get("content_type", "movie"), notify=False)
+        startup_mark("snapshot loaded")
+
+    # Saves the first page of the trending grid and the thumbnails it has on screen
+    def save_snapshot(self):
+        model = self.today_model
+        url = self.client.list_request("movie", "trending", "day")[0]
+        if model.url != url or not model.items:
+            return
+        items = model.items[:ContentGridModel.PAGE_SIZE]
+        width, height = ContentTileDelegate.poster_size(model.content_type)
+        ratio = device_pixel_ratio()
+        thumbnails = {}
+        try:
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            existing = set(os.listdir(SNAPSHOT_DIR))  # Listed once; names are content hashes
+            for item in items:
+                kind, image_path = ContentTileDelegate.image(item)
+                key = ImageLoader.spec(kind, image_path, width, height, ratio)[0] if image_path else None
+                pixmap = QPixmapCache.find(key) if key else None
+                if pixmap is not None and not pixmap.isNull():
+                    name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg"
+                    if name not in existing:
+                        pixmap.save(os.path.join(SNAPSHOT_DIR, name), "JPG", THUMBNAIL_JPEG_QUALITY)
+                    thumbnails[key] = name
+            snapshot = {"content_type": model.content_type, "items": items, "ratio": ratio, "thumbnails": thumbnails}
+            atomic_write(os.path.join(SNAPSHOT_DIR, "grid.json"),
+                         json.dumps(snapshot, default=ListItem.to_dict).encode("utf-8"))
+            kept = set(thumbnails.values())
+            for name in existing - kept:  # Everything written above is kept
+                if name.endswith(".jpg"):
+                    os.remove(os.path.join(SNAPSHOT_DIR, name))
+        except OSError as e:
+            print(f"Snapshot write failed: {e}")
+
+    def closeEvent(self, event):
+        self.save_snapshot()
+        # Closes the stores open so far; an open still running sees `closing` and closes its own
+        with self.user_store_lock:
+            self.closing = True
+            stores = {self.user_store, self.background_user_store} - {None}
+        for store in stores:
+            store.close()
+        super().closeEvent(event)
+
+    # Runs on a worker thread. The store is handed over through background_user_store, so a
+    # window closing before the result is delivered can still close it.
+    def open_user_store(self):
+        store = UserStore()
+        with self.user_store_lock:
+            if self.closing:
+                store.close()
+                return None
+            self.background_user_store = store
+        return store
+
+    # Takes the store opened in the background, unless the user got to it first (see
+    # get_user_store), and repaints the tiles for their favorite stars
+    def on_user_store_opened(self, store):
+        with self.user_store_lock:
+            if self.closing or store is None:
+                return  # closeEvent closed it
+            self.background_user_store = None
+        if self.user_store is not None:
+            store.close()
+            return
+        self.user_store = store
+        self.today_view.viewport().update()
+        self.week_view.viewport().update()
+
+    # The user store, opened here on the GUI thread if an action needs it before the
+    # background open has finished
+    def get_user_store(self):
+        if self.user_store is None:
+            self.user_store = UserStore()
+        return self.user_store
+
+    # Rolling span latencies over the last 30 seconds in the status bar; Ctrl+Shift+T exports
+    # the trace buffer
+    def setup_trace_overlay(self):
+        self.trace_label = QLabel()
+        self.trace_label.setStyleSheet("color: #AAAAAA; font-size: 11px;")
+        self.status_bar.addPermanentWidget(self.trace_label)
+        self.trace_timer = QTimer(self)
+        self.trace_timer.timeout.connect(self.update_trace_overlay)
+        self.trace_timer.start(1000)
+        QShortcut(QKeySequence("Ctrl+Shift+T"), self, activated=self.export_trace)
+
+    def update_trace_overlay(self):
+        stats = tracing.summary(seconds=30)
+        self.trace_label.setText("  ".join(f"{name} {stats[name][1]:.0f}/{stats[name][2]:.0f}ms"
+                                           for name in TRACE_OVERLAY_SPANS if name in stats))
+
+    def export_trace(self):
+        path = os.path.join(CACHE_DIR, "traces", time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        count = tracing.export_chrome_trace(path)
+        self.status_bar.showMessage(f"Exported {count} spans to {path}", 5000)
 
     # Sets up the header with logo, navigation, search, and login/join buttons
     def setup_header(self):
@@ -895,18 +1884,7 @@ class TMDbGUI(QMainWindow):
         self.nav_buttons = {}
         for category, options in self.nav_options.items():
             btn = QPushButton(category)
-            btn.setStyleSheet("""
-                QPushButton {
-                    color: #FFFFFF;
-                    background: none;
-                    border: none;
-                    font-size: 16px;
-                    padding: 5px 10px;
-                }
-                QPushButton:hover {
-                    color: #FF0000;
-                }
-            """)
+            btn.setObjectName("navButton")
             btn.clicked.connect(lambda checked, c=category: self.switch_category(c))
             self.nav_buttons[category] = btn
             nav_layout.addWidget(btn)
@@ -932,6 +1910,16 @@ class TMDbGUI(QMainWindow):
             }
         """)
         search_layout.addWidget(self.search_input)
+
+        # Search as you type: each keystroke restarts the timer, so a request goes out only
+        # once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(lambda: self.run_search(self.search_input.text().strip()))
+        self.search_input.textEdited.connect(lambda text: self.search_timer.start())
+        self.search_input.returnPressed.connect(self.search_content)
+        self.search_type.currentIndexChanged.connect(lambda index: self.search_timer.start())
         
         search_btn = QPushButton("🔍 Search")
         search_btn.setStyleSheet("""
@@ -984,7 +1972,7 @@ class TMDbGUI(QMainWindow):
         """)
         
         self.login_btn.clicked.connect(self.show_login_dialog)
-        self.join_btn.clicked.connect(lambda: webbrowser.open("https://www.themoviedb.org/signup"))
+        self.join_btn.clicked.connect(lambda: __import__("webbrowser").open("https://www.themoviedb.org/signup"))
         
         auth_layout.addWidget(self.login_btn)
         auth_layout.addWidget(self.join_btn)
@@ -1046,32 +2034,22 @@ class TMDbGUI(QMainWindow):
         tabs.currentChanged.connect(self.on_tab_changed)
         content_layout.addWidget(tabs)
 
-        # Scrollable areas for content grids with better styling
-        self.today_scroll = QScrollArea()
-        self.today_scroll.setWidgetResizable(True)
-        self.today_content = QWidget()
-        self.today_content.setStyleSheet("background-color: #121212;")
-        self.today_grid = QGridLayout(self.today_content)
-        self.today_grid.setContentsMargins(10, 10, 10, 10)
-        self.today_grid.setSpacing(20)
-        self.today_scroll.setWidget(self.today_content)
-        
-        self.today_tab.setLayout(QVBoxLayout())
-        self.today_tab.layout().setContentsMargins(0, 0, 0, 0)
-        self.today_tab.layout().addWidget(self.today_scroll)
-
-        self.week_scroll = QScrollArea()
-        self.week_scroll.setWidgetResizable(True)
-        self.week_content = QWidget()
-        self.week_content.setStyleSheet("background-color: #121212;")
-        self.week_grid = QGridLayout(self.week_content)
-        self.week_grid.setContentsMargins(10, 10, 10, 10)
-        self.week_grid.setSpacing(20)
-        self.week_scroll.setWidget(self.week_content)
-        
-        self.week_tab.setLayout(QVBoxLayout())
-        self.week_tab.layout().setContentsMargins(0, 0, 0, 0)
-        self.week_tab.layout().addWidget(self.week_scroll)
+        # Virtualized, paginated grids for the Today and This Week views
+        self.today_model = ContentGridModel("today_grid", self)
+        self.week_model = ContentGridModel("week_grid", self)
+        for model, tab in ((self.today_model, self.today_tab), (self.week_model, self.week_tab)):
+            delegate = ContentTileDelegate(self.is_favorite, self)
+            delegate.details_clicked.connect(self.show_details)
+            delegate.favorite_clicked.connect(self.on_favorite_clicked)
+            view = ContentGridView(model, delegate)
+            view.settled.connect(self.prefetcher.prefetch_visible)
+            view.hovered.connect(self.prefetcher.prefetch_hovered)
+            tab.setLayout(QVBoxLayout())
+            tab.layout().setContentsMargins(0, 0, 0, 0)
+            tab.layout().addWidget(view)
+            model.loaded.connect(self.on_grid_loaded)
+        self.today_view = self.today_tab.layout().itemAt(0).widget()
+        self.week_view = self.week_tab.layout().itemAt(0).widget()
 
         self.main_layout.addWidget(content_widget)
 
@@ -1093,24 +2071,13 @@ class TMDbGUI(QMainWindow):
             "📺 Streaming": lambda: self.load_content(self.current_content_type, "trending", "day"),
             "📡 On TV": lambda: self.load_content("tv", "airing_today", "day"),
             "💵 For Rent": lambda: self.load_content(self.current_content_type, "trending", "day"),
-            "🎭 In Theatres": lambda: self.load_content("movie", "now_playing", "day")
+            "🎭 In Theatres": lambda: self.load_content("movie", "now_playing", "day"),
+            "⭐ For You": self.show_for_you
         }
         
         for text, action in footer_items.items():
             btn = QPushButton(text)
-            btn.setStyleSheet("""
-                QPushButton {
-                    background: #333333;
-                    color: #FFFFFF;
-                    border-radius: 15px;
-                    padding: 8px 15px;
-                    font-size: 14px;
-                    min-width: 120px;
-                }
-                QPushButton:hover {
-                    background: #FF0000;
-                }
-            """)
+            btn.setObjectName("footerButton")
             btn.clicked.connect(action)
             footer_layout.addWidget(btn)
 
@@ -1166,6 +2133,7 @@ class TMDbGUI(QMainWindow):
     def switch_category(self, category):
         self.current_content_type = "movie" if category == "Movies" else "tv" if category == "TV Shows" else "person"
         self.content_label.setText(f"{category}")
+        self.prefetcher.cancel()
         self.filter_combo.clear()
         
         # Only disconnect if there are connections
@@ -1184,28 +2152,12 @@ class TMDbGUI(QMainWindow):
         # Load the first option by default
         self.load_content(self.current_content_type, self.nav_options[category][0][1], "day")
         
-        # Update button styles to show active category
+        # Update button styles to show active category; re-polishing applies the
+        # [active="true"] rule without parsing a new stylesheet
         for btn_category, btn in self.nav_buttons.items():
-            btn.setStyleSheet("""
-                QPushButton {
-                    color: #FFFFFF;
-                    background: none;
-                    border: none;
-                    font-size: 16px;
-                    padding: 5px 10px;
-                }
-                QPushButton:hover {
-                    color: #FF0000;
-                }
-            """ if btn_category != category else """
-                QPushButton {
-                    color: #FF0000;
-                    background: none;
-                    border-bottom: 2px solid #FF0000;
-                    font-size: 16px;
-                    padding: 5px 10px;
-                }
-            """)
+            btn.setProperty("active", btn_category == category)
+            btn.style().unpolish(btn)
+            btn.style().polish(btn)
 
     # Searches TMDb based on user input and selected type
     def search_content(self):
@@ -1213,226 +2165,165 @@ class TMDbGUI(QMainWindow):
         if not query:
             self.status_bar.showMessage("Please enter a search query")
             return
-        
+        self.search_timer.stop()
+        self.run_search(query, force=True)
+
+    # Shows local hits and cached results at once, then refines them from TMDb. Typing runs this
+    # after the debounce; a newer search replaces the older one's request in the grid's slot.
+    def run_search(self, query, force=False):
         content_type = "movie" if self.search_type.currentText() == "Movies" else "tv" if self.search_type.currentText() == "TV Shows" else "person"
+        if not force and (len(query) < MIN_SEARCH_CHARS or (content_type, query) == self.last_search):
+            return
+        self.last_search = (content_type, query)
         self.status_bar.showMessage(f"Searching {self.search_type.currentText()} for '{query}'...")
         
-        url = f"https://api.themoviedb.org/3/search/{content_type}"
-        params = {"api_key": self.tmdb_api_key, "query": query}
+        url, params = self.client.search_request(content_type, query)
+        local_items = self.local_search(content_type, query)
         
-        self.worker = FetchWorker(url, params)
-        self.worker.result.connect(self.display_content)
-        self.worker.start()
+        self.week_model.clear()
+        self.today_model.load(url, params, content_type, local_items=local_items,
+                              provisional_items=self.cached_search(url, query))
+
+    # Results of the longest shorter query seen this session, narrowed to the current query
+    def cached_search(self, url, query):
+        for end in range(len(query) - 1, MIN_SEARCH_CHARS - 1, -1):
+            data = self.client.cache.peek(url, {"query": query[:end].strip(), "page": 1})
+            if data:
+                from search_index import narrow
+                return narrow(data.get("results", []), query)
+        return []
+
+    # Ranked hits from the offline index of the local catalog store
+    def local_search(self, content_type, query):
+        if self.catalog_store is None:
+            return []
+        table = self.catalog_store.table(content_type)
+        return table.search(query, ContentGridModel.PAGE_SIZE) if table is not None else []
 
     # Handles tab switching between Today and This Week
     def on_tab_changed(self, index):
         self.load_content(self.current_content_type, self.filter_combo.currentData(), "day" if index == 0 else "week")
 
     # Loads content based on type, filter, and time window
-    def load_content(self, content_type, filter_type, time_window):
+    def load_content(self, content_type, filter_type, time_window, provisional_items=None):
         self.current_content_type = content_type
         self.current_filter = filter_type
         self.status_bar.showMessage(f"Loading {content_type} - {filter_type} for {time_window}...")
         
-        self.clear_layout(self.today_grid)
-        self.clear_layout(self.week_grid)
-        
-        url = f"https://api.themoviedb.org/3/{filter_type}/{content_type}/{time_window}" if filter_type == "trending" else f"https://api.themoviedb.org/3/{content_type}/{filter_type}"
-        params = {"api_key": self.tmdb_api_key}
+        url, params = self.client.list_request(content_type, filter_type, time_window)
         
-        self.worker = FetchWorker(url, params)
-        self.worker.result.connect(self.display_content)
-        self.worker.start()
+        target_model, other_model = ((self.week_model, self.today_model) if filter_type == "trending" and time_window == "week"
+                                     else (self.today_model, self.week_model))
+        other_model.clear()
+        target_model.load(url, params, content_type, lambda: self.offline_items(content_type, filter_type),
+                          provisional_items=provisional_items)
 
     # Loads and displays the latest item for trailer viewing
     def show_latest_trailers(self):
         self.status_bar.showMessage(f"Loading latest trailers for {self.current_content_type}...")
-        url = f"https://api.themoviedb.org/3/{self.current_content_type}/latest"
-        params = {"api_key": self.tmdb_api_key}
-        self.worker = FetchWorker(url, params)
-        self.worker.result.connect(lambda data: self.display_content({"results": [data] if data else []}))
-        self.worker.start()
-
-    # Clears a layout by removing and deleting its widgets
-    def clear_layout(self, layout):
-        while layout.count():
-            child = layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-
-    # Displays fetched content in the grid with improved styling
-    def display_content(self, data):
-        target_grid = self.today_grid if "day" in self.worker.url or "trending" not in self.worker.url else self.week_grid
-        self.clear_layout(target_grid)
-        items = data.get("results", [])
-        self.status_bar.showMessage(f"Loaded {len(items)} items" if items else "Failed to load content")
-
-        if not items:
-            error_label = QLabel("No results found or failed to load content.")
-            error_label.setStyleSheet("color: #FF0000; font-size: 16px;")
-            error_label.setAlignment(Qt.AlignCenter)
-            target_grid.addWidget(error_label, 0, 0, 1, 4)
+        content_type = self.current_content_type
+        url, params = self.client.latest_request(content_type)
+        self.week_model.clear()
+        self.today_model.clear()
+        self.scheduler.submit(self.today_model.slot, url, params,
+                              lambda data: self.today_model.set_items([data] if data else [], content_type))
+
+    def on_recommender_loaded(self, recommender):
+        self.recommender = recommender
+
+    # Adds a title opened in a detail view to the local catalog in the background pool, unless
+    # the recommender or this session already has it; every append makes the catalog larger
+    # than what the model and the store were built from
+    def add_viewed_item(self, content_type, item_id, data):
+        key = (content_type, item_id)
+        if key in self.viewed_items or (self.recommender is not None and key in self.recommender):
             return
-
-        items = items[:12]  # Limit to 12 items for better display
-        for i, item in enumerate(items):
-            item_widget = QWidget()
-            item_widget.setStyleSheet("""
-                background-color: #222222; 
-                border-radius: 10px; 
-                padding: 15px;
-            """)
-            item_layout = QVBoxLayout(item_widget)
-            item_layout.setContentsMargins(0, 0, 0, 0)
-            item_layout.setSpacing(10)
-
-            # Load and display image with better sizing
-            image_path = item.get("poster_path") or item.get("profile_path")
-            if image_path:
-                try:
-                    img_data = requests.get(f"{self.tmdb_image_base_url}{image_path}").content
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(img_data)
-                    
-                    # Larger images for better visibility
-                    if self.current_content_type == "person":
-                        pixmap = pixmap.scaled(200, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    else:
-                        pixmap = pixmap.scaled(220, 330, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    
-                    poster_label = QLabel()
-                    poster_label.setPixmap(pixmap)
-                    poster_label.setAlignment(Qt.AlignCenter)
-                    item_layout.addWidget(poster_label)
-                except Exception as e:
-                    print(f"Error loading image: {e}")
-                    poster_label = QLabel("Image unavailable")
-                    poster_label.setStyleSheet("color: #FFFFFF; font-size: 14px;")
-                    poster_label.setAlignment(Qt.AlignCenter)
-                    item_layout.addWidget(poster_label)
-
-            # Content specific information with better typography
-            if self.current_content_type == "person":
-                # People display
-                name = item.get("name", "Unknown")
-                title_label = QLabel(name)
-                title_label.setStyleSheet("""
-                    font-size: 16px; 
-                    font-weight: bold; 
-                    color: #FFFFFF;
-                    margin-top: 5px;
-                """)
-                title_label.setWordWrap(True)
-                title_label.setAlignment(Qt.AlignCenter)
-                item_layout.addWidget(title_label)
-
-                known_for = item.get("known_for", [])
-                if known_for:
-                    known_for_text = ", ".join([x.get("title") or x.get("name") or "Unknown" for x in known_for[:2]])
-                    known_label = QLabel(known_for_text)
-                    known_label.setStyleSheet("""
-                        font-size: 14px; 
-                        color: #AAAAAA;
-                        margin-bottom: 5px;
-                    """)
-                    known_label.setWordWrap(True)
-                    known_label.setAlignment(Qt.AlignCenter)
-                    item_layout.addWidget(known_label)
-            else:
-                # Movie/TV show display
-                rating = item.get("vote_average", 0) * 10 if "vote_average" in item else None
-                if rating is not None:
-                    rating_label = QLabel(f"★ {int(rating)}%")
-                    rating_label.setStyleSheet("""
-                        font-size: 16px; 
-                        font-weight: bold; 
-                        color: #FF0000;
-                        margin-top: 5px;
-                    """)
-                    rating_label.setAlignment(Qt.AlignCenter)
-                    item_layout.addWidget(rating_label)
-
-                title = item.get("title") or item.get("name", "Unknown")
-                title_label = QLabel(title)
-                title_label.setStyleSheet("""
-                    font-size: 16px; 
-                    font-weight: bold; 
-                    color: #FFFFFF;
-                """)
-                title_label.setWordWrap(True)
-                title_label.setAlignment(Qt.AlignCenter)
-                item_layout.addWidget(title_label)
-
-                date = item.get("release_date") or item.get("first_air_date", "N/A")
-                date_label = QLabel(date)
-                date_label.setStyleSheet("""
-                    font-size: 14px; 
-                    color: #AAAAAA;
-                    margin-bottom: 5px;
-                """)
-                date_label.setAlignment(Qt.AlignCenter)
-                item_layout.addWidget(date_label)
-
-            # Common buttons with better styling
-            button_container = QWidget()
-            button_layout = QHBoxLayout(button_container)
-            button_layout.setContentsMargins(0, 0, 0, 0)
-            button_layout.setSpacing(10)
-
-            item_id = item.get("id")
-            title = item.get("title") or item.get("name", "Unknown")
-            
-            detail_btn = QPushButton("Details")
-            detail_btn.setStyleSheet("""
-                QPushButton {
-                    background: #FF0000;
-                    color: white;
-                    border-radius: 5px;
-                    padding: 8px;
-                    font-size: 14px;
-                }
-                QPushButton:hover {
-                    background: #CC0000;
-                }
-            """)
-            detail_btn.clicked.connect(lambda checked, ct=self.current_content_type, id=item_id: DetailDialog(ct, id, self.tmdb_api_key, self).exec_())
-            button_layout.addWidget(detail_btn)
-
-            fav_btn = QPushButton("❤ Favorite" if item_id not in self.favorites else "★ Unfavorite")
-            fav_btn.setStyleSheet("""
-                QPushButton {
-                    background: #333333;
-                    color: white;
-                    border-radius: 5px;
-                    padding: 8px;
-                    font-size: 14px;
-                }
-                QPushButton:hover {
-                    background: #444444;
-                }
-            """)
-            fav_btn.clicked.connect(lambda checked, id=item_id, t=title, b=fav_btn: self.toggle_favorite(id, t, b))
-            button_layout.addWidget(fav_btn)
-
-            item_layout.addWidget(button_container)
-
-            # Calculate grid position (3 columns)
-            row = i // 3
-            col = i % 3
-            target_grid.addWidget(item_widget, row, col, 1, 1, Qt.AlignTop)
+        self.viewed_items.add(key)
+        self.scheduler.submit_call(f"catalog_add:{content_type}:{item_id}",
+                                   lambda: append_viewed_item(content_type, item_id, data),
+                                   self.on_viewed_item_added, PRIORITY_PREFETCH, background=True)
+
+    def on_viewed_item_added(self, item):
+        if self.recommender is not None:
+            self.recommender.add_item(item)  # Searchable right away, before the next refit
+
+    # Rebuilds the store from the catalog, in the background pool, if it is missing, uses an
+    # older layout or the catalog has grown well past it (see CatalogStore.needs_rebuild)
+    def on_catalog_store_opened(self, store):
+        stale = store.needs_rebuild()
+        self.catalog_store = store
+        if stale:
+            from catalog_store import build_store
+            self.scheduler.submit_call("catalog_store_build", build_store, self.on_catalog_store_built, PRIORITY_PREFETCH,
+                                       background=True)
+        else:
+            self.warm_search_indexes()
+
+    def on_catalog_store_built(self, store):
+        self.catalog_store = store
+        self.warm_search_indexes()
+
+    # Opens the search indexes in the background so the first search does not pay for it
+    def warm_search_indexes(self):
+        tables = list(self.catalog_store.tables.values())
+        self.scheduler.submit_call("search_index", lambda: [table.search_index() for table in tables],
+                                   lambda indexes: None, PRIORITY_PREFETCH)
+
+    # Local stand-in for a list endpoint when TMDb cannot be reached
+    def offline_items(self, content_type, filter_type):
+        if self.catalog_store is None:
+            return []
+        table = self.catalog_store.table(content_type)
+        if table is None or not len(table):
+            return []
+        return table.list_items(filter_type)
+
+    # Shows offline recommendations for the user's favorites and viewing history
+    def show_for_you(self):
+        if self.recommender is None:
+            self.status_bar.showMessage("Recommendations need a local catalog; open a few titles first")
+            return
+        signals = self.get_user_store().signals()
+        keys = [key for key in signals if key in self.recommender]
+        if not keys:
+            self.status_bar.showMessage("Favorite or open a few movies or shows to get recommendations")
+            return
+        results = self.recommender.for_favorites(keys, k=60, weights=[signals[key] for key in keys])
+        self.content_label.setText("For You")
+        self.week_model.clear()
+        self.today_model.set_items([item for item, score in results], "movie")
+
+    # Reports the outcome of a grid's first page in the status bar
+    def on_grid_loaded(self, count):
+        self.status_bar.showMessage(f"Loaded {count} items" if count else "Failed to load content")
+
+    def show_details(self, index):
+        item = index.data(ContentGridModel.ItemRole)
+        content_type = item.get("media_type", index.model().content_type)  # Mixed lists (e.g. For You) carry their own type
+        self.get_user_store().record_view(content_type, item.get("id"), item.get("title") or item.get("name"))
+        DetailDialog(content_type, item.get("id"), self.client, self).exec_()
+
+    def on_favorite_clicked(self, index):
+        item = index.data(ContentGridModel.ItemRole)
+        self.toggle_favorite(item.get("media_type", index.model().content_type), item.get("id"),
+                             item.get("title") or item.get("name", "Unknown"))
+
+    # Called for every painted tile; no stars until the store has opened
+    def is_favorite(self, content_type, item_id):
+        return self.user_store is not None and self.user_store.is_favorite(content_type, item_id)
 
     # Toggles an item as a favorite and updates UI
-    def toggle_favorite(self, item_id, title, button):
-        if item_id in self.favorites:
-            self.favorites.remove(item_id)
-            button.setText("❤ Favorite")
-            self.status_bar.showMessage(f"Removed '{title}' from favorites")
-        else:
-            self.favorites.append(item_id)
-            button.setText("★ Unfavorite")
+    def toggle_favorite(self, content_type, item_id, title):
+        if self.get_user_store().toggle_favorite(content_type, item_id, title):
             self.status_bar.showMessage(f"Added '{title}' to favorites")
+        else:
+            self.status_bar.showMessage(f"Removed '{title}' from favorites")
+        self.today_view.viewport().update()
+        self.week_view.viewport().update()
 
 # Main entry point to run the application
+startup_mark("imports")
+
 def main():
     app = QApplication(sys.argv)
     try:
@@ -0,0 +1,402 @@
+import argparse
+import json
+import math
+import os
+import threading
+import numpy as np
+from scipy import sparse
+from tmdb_cache import CACHE_DIR
+from ann_index import IVFIndex, fit_projection, DEFAULT_NPROBE
+
+# Local catalog of TMDb items (one compact JSON object per line) and the fitted model built from it
+CATALOG_PATH = os.path.join(CACHE_DIR, "catalog.jsonl")
+MODEL_PATH = os.path.join(CACHE_DIR, "recommender.npz")
+
+# Catalogs at least this large are queried through the approximate index instead of a full scan
+ANN_MIN_ITEMS = int(os.getenv("WATCHX_ANN_MIN_ITEMS", "20000"))
+ANN_CANDIDATES = 200  # Approximate candidates fetched per query, then re-ranked exactly
+# Share of the exact top-k the candidates must hold for a sample of items when nprobe is
+# tuned; a catalog the embedding cannot reach it for is searched exactly instead
+ANN_TARGET_RECALL = float(os.getenv("WATCHX_ANN_RECALL", "0.95"))
+ANN_TUNING_QUERIES = 50
+REFIT_FRACTION = 0.1  # Appended catalog lines added to a saved model before it is refitted
+
+MEDIA_TYPES = ("movie", "tv")
+MAX_CAST = 10
+MAX_KEYWORDS = 20
+
+# Relative weight of each feature block in the item vectors
+FEATURE_WEIGHTS = {
+    "g": 1.0,   # Genre ids
+    "c": 0.8,   # Cast person ids
+    "k": 1.0,   # Keyword ids
+    "y": 0.5,   # Release decade
+    "t": 0.3,   # Media type
+}
+VOTE_WEIGHT = 0.3
+POPULARITY_WEIGHT = 0.2
+
+# Fields kept for showing a recommendation in the grid without another request
+DISPLAY_FIELDS = ("id", "media_type", "title", "name", "poster_path", "vote_average", "release_date", "first_air_date")
+# Text kept in the catalog for the local store and search, but not in the recommender model
+TEXT_FIELDS = ("original_title", "original_name", "overview")
+
+# Reduces a TMDb movie/TV details payload (or list item) to the fields the recommender and
+# the grid use. Detail payloads carry credits and keywords; list items only genre ids.
+def compact_item(data, media_type):
+    genres = [g["id"] for g in data.get("genres", [])] or list(data.get("genre_ids", []))
+    cast = [c["id"] for c in data.get("credits", {}).get("cast", [])[:MAX_CAST]]
+    keywords = data.get("keywords", {})
+    keywords = keywords.get("keywords") or keywords.get("results") or []  # Movies vs TV
+    item = {field: data[field] for field in DISPLAY_FIELDS + TEXT_FIELDS if data.get(field)}
+    item.update({
+        "media_type": media_type,
+        "genres": genres,
+        "cast": cast,
+        "keywords": [k["id"] for k in keywords[:MAX_KEYWORDS]],
+        "vote_count": data.get("vote_count", 0),
+        "popularity": data.get("popularity", 0.0),
+    })
+    return item
+
+_catalog_lock = threading.Lock()
+
+# Appends compact items to the local catalog; later lines for the same item win
+def append_to_catalog(items, path=CATALOG_PATH):
+    lines = "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in items)
+    with _catalog_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+# Streams compact items from a catalog file, optionally from a byte offset where an earlier
+# read stopped, skipping lines that fail to parse
+def read_catalog(path=CATALOG_PATH, offset=0):
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if item.get("media_type") in MEDIA_TYPES and "id" in item:
+                yield item
+
+def _release_year(item):
+    date = item.get("release_date") or item.get("first_air_date") or ""
+    return int(date[:4]) if date[:4].isdigit() else None
+
+def _tokens(item):
+    tokens = [f"g{g}" for g in item.get("genres", [])]
+    tokens += [f"c{c}" for c in item.get("cast", [])]
+    tokens += [f"k{k}" for k in item.get("keywords", [])]
+    year = _release_year(item)
+    if year:
+        tokens.append(f"y{year // 10}")
+    tokens.append(f"t{item['media_type']}")
+    return tokens
+
+# Content-based recommender over a sparse item-feature matrix. Each row is an L2-normalised,
+# IDF-weighted bag of genres, cast, keywords, decade and media type plus vote/popularity
+# columns, so cosine similarity is a single sparse matrix product.
+class Recommender:
+    def __init__(self):
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.vocab = {}  # Token -> column
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.items = []  # Display fields per row
+        self.index = {}  # (media_type, id) -> row
+        self.max_log_votes = 1.0
+        self.max_log_popularity = 1.0
+        self.pending_rows = []  # Rows added since the matrix was last stacked
+        self.projection = None  # Feature columns -> dense embedding, learned with the index
+        self.ann = None  # IVFIndex over dense embeddings, for large catalogs
+        self.nprobe = None  # Index lists a query scans, tuned when the index is built
+        self.catalog_size = None  # Bytes of the catalog the model was fitted from
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    # Builds the model from compact catalog items (duplicates keep the last occurrence)
+    def fit(self, items):
+        latest = {}
+        for item in items:
+            latest[(item["media_type"], item["id"])] = item
+        items = list(latest.values())
+        token_lists = [_tokens(item) for item in items]
+
+        document_frequency = {}
+        for tokens in token_lists:
+            for token in set(tokens):
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        self.vocab = {token: col for col, token in enumerate(sorted(document_frequency))}
+        self.idf = np.zeros(len(self.vocab) + 2, dtype=np.float32)
+        for token, col in self.vocab.items():
+            self.idf[col] = math.log((1 + len(items)) / (1 + document_frequency[token])) + 1
+        self.max_log_votes = max([math.log1p(item.get("vote_count", 0)) for item in items] + [1.0])
+        self.max_log_popularity = max([math.log1p(item.get("popularity", 0.0)) for item in items] + [1.0])
+
+        self.items = [{f: item[f] for f in DISPLAY_FIELDS if f in item} for item in items]
+        self.index = {(item["media_type"], item["id"]): row for row, item in enumerate(items)}
+        self.matrix = self._vectorize(items, token_lists)
+        self.pending_rows = []
+        self.build_index()
+        return self
+
+    # Dense embeddings of sparse rows
+    def embed(self, rows):
+        return np.asarray(rows @ self.projection)
+
+    # (Re)builds the approximate index when the catalog is large enough to need one, and tunes
+    # nprobe for it
+    def build_index(self):
+        matrix = self._stacked()
+        self.projection = self.ann = self.nprobe = None
+        if matrix.shape[0] < ANN_MIN_ITEMS:
+            return
+        self.projection = fit_projection(matrix)
+        self.ann = IVFIndex(self.projection.shape[1]).build(self.embed(matrix))
+        self.nprobe = self._tune_nprobe(matrix)
+        if self.nprobe is None:
+            self.projection = self.ann = None
+
+    # Smallest nprobe, doubling from DEFAULT_NPROBE, whose candidates hold ANN_TARGET_RECALL of
+    # the exact top-k for a sample of items. None when even scanning every list falls short,
+    # i.e. the embedding does not keep this catalog's neighbourhoods.
+    def _tune_nprobe(self, matrix, k=10):
+        rows = np.random.default_rng(0).choice(matrix.shape[0], min(ANN_TUNING_QUERIES, matrix.shape[0]),
+                                               replace=False)
+        queries = matrix[rows]
+        scores = (matrix @ queries.T).toarray()
+        scores[rows, np.arange(len(rows))] = -np.inf  # An item is not its own neighbour
+        k = min(k, matrix.shape[0] - 1)
+        exact = [set(np.argpartition(-scores[:, i], k - 1)[:k]) for i in range(len(rows))]
+        embedded = self.embed(queries)
+        n_lists = len(self.ann.centroids)
+        nprobe = min(DEFAULT_NPROBE, n_lists)
+        while True:
+            found = [len(truth.intersection(self.ann.search(query, ANN_CANDIDATES + 1, nprobe)[0]))
+                     for query, truth in zip(embedded, exact)]
+            if sum(found) >= ANN_TARGET_RECALL * k * len(exact):
+                return nprobe
+            if nprobe >= n_lists:
+                return None
+            nprobe = min(nprobe * 2, n_lists)
+
+    def _stacked(self):
+        if self.pending_rows:
+            self.matrix = sparse.vstack([self.matrix] + self.pending_rows, format="csr")
+            self.pending_rows = []
+        return self.matrix
+
+    # Adds a newly seen item (e.g. a details payload that just arrived) without refitting.
+    # Tokens outside the fitted vocabulary are ignored until the next fit.
+    def add_item(self, item):
+        key = (item["media_type"], item["id"])
+        if key in self.index or not self.vocab:
+            return
+        row = self._vectorize([item])
+        self.index[key] = len(self.items)
+        self.items.append({f: item[f] for f in DISPLAY_FIELDS if f in item})
+        self.pending_rows.append(row)
+        if self.ann is not None:
+            self.ann.add(self.embed(row), [self.index[key]])
+
+    # Candidate rows for a query vector: approximate neighbours when the index exists, else every row
+    def _candidates(self, query, k, nprobe):
+        if self.ann is None:
+            return None
+        ids, _ = self.ann.search(self.embed(query), max(ANN_CANDIDATES, k), nprobe or self.nprobe)
+        return ids
+
+    # Turns items into normalised rows using the current vocabulary; unknown tokens are ignored
+    def _vectorize(self, items, token_lists=None):
+        token_lists = token_lists or [_tokens(item) for item in items]
+        vote_col, popularity_col = len(self.vocab), len(self.vocab) + 1
+        rows, cols, values = [], [], []
+        for row, (item, tokens) in enumerate(zip(items, token_lists)):
+            for token in tokens:
+                col = self.vocab.get(token)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    values.append(self.idf[col] * FEATURE_WEIGHTS[token[0]])
+            rows += [row, row]
+            cols += [vote_col, popularity_col]
+            values.append(VOTE_WEIGHT * item.get("vote_average", 0.0) / 10
+                          * math.log1p(item.get("vote_count", 0)) / self.max_log_votes)
+            values.append(POPULARITY_WEIGHT * math.log1p(item.get("popularity", 0.0)) / self.max_log_popularity)
+        matrix = sparse.csr_matrix((np.asarray(values, dtype=np.float32), (rows, cols)),
+                                   shape=(len(items), len(self.vocab) + 2), dtype=np.float32)
+        return _normalize_rows(matrix)
+
+    # Top-k of a dense score vector over `rows` (all rows when None), best first, skipping excluded rows
+    def _top_k(self, scores, k, exclude, rows=None):
+        rows = np.arange(len(scores)) if rows is None else np.asarray(rows)
+        keep = ~np.isin(rows, list(exclude))
+        rows, scores = rows[keep], scores[keep]
+        k = min(k, len(rows))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.items[rows[i]], float(scores[i])) for i in top]
+
+    # "More like this": the k items most similar to (media_type, id), with their cosine scores.
+    # nprobe is the recall-vs-latency knob of the approximate index (ignored for small catalogs);
+    # None uses the value tuned when the index was built.
+    def similar(self, media_type, item_id, k=10, nprobe=None):
+        return self.similar_batch([(media_type, item_id)], k, nprobe)[0]
+
+    # Batched "more like this": one sparse product for all queries, or one index probe each
+    def similar_batch(self, keys, k=10, nprobe=None):
+        matrix = self._stacked()
+        rows = [self.index.get(key) for key in keys]
+        known = [row for row in rows if row is not None]
+        if not known:
+            return [[] for _ in keys]
+        if self.ann is None:
+            scores = (matrix @ matrix[known].T).toarray()
+            columns = iter(range(len(known)))
+            return [self._top_k(scores[:, next(columns)], k, {row}) if row is not None else [] for row in rows]
+        return [self._rank(matrix[row], k, {row}, nprobe) if row is not None else [] for row in rows]
+
+    # Scores candidate rows exactly against a single query row
+    def _rank(self, query, k, exclude, nprobe):
+        matrix = self._stacked()
+        candidates = self._candidates(query, k + len(exclude), nprobe)
+        if candidates is None:
+            return self._top_k((matrix @ query.T).toarray().ravel(), k, exclude)
+        scores = (matrix[candidates] @ query.T).toarray().ravel()
+        return self._top_k(scores, k, exclude, candidates)
+
+    # "For my favorites": ranks the catalog against the mean of the favorites' vectors, or a
+    # weighted mean with one weight per key (e.g. favorites above items only looked at)
+    def for_favorites(self, keys, k=20, nprobe=None, weights=None):
+        matrix = self._stacked()
+        if weights is None:
+            weights = [1.0] * len(keys)
+        pairs = [(self.index[key], weight) for key, weight in zip(keys, weights) if key in self.index]
+        if not pairs:
+            return []
+        rows = [row for row, _ in pairs]
+        weighted = np.asarray([weight for _, weight in pairs], np.float32) @ matrix[rows]
+        profile = _normalize_rows(sparse.csr_matrix(weighted))
+        return self._rank(profile, k, set(rows), nprobe)
+
+    def save(self, path=MODEL_PATH):
+        self._stacked()
+        tokens = sorted(self.vocab, key=self.vocab.get)
+        meta = json.dumps({"tokens": tokens, "items": self.items,
+                           "max_log_votes": self.max_log_votes,
+                           "max_log_popularity": self.max_log_popularity,
+                           "catalog_size": self.catalog_size,
+                           "ann": self.ann is not None, "nprobe": self.nprobe})
+        tmp_path = f"{path}.tmp.npz"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(tmp_path, data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr,
+                 shape=np.asarray(self.matrix.shape), idf=self.idf, meta=np.frombuffer(meta.encode("utf-8"), dtype=np.uint8))
+        os.replace(tmp_path, path)
+        if self.ann is not None:
+            self.ann.save(_index_dir(path))
+            np.save(os.path.join(_index_dir(path), "projection.npy"), self.projection)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        recommender = cls()
+        with np.load(path) as arrays:
+            recommender.matrix = sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                                                   shape=tuple(arrays["shape"]))
+            recommender.idf = arrays["idf"]
+            meta = json.loads(arrays["meta"].tobytes().decode("utf-8"))
+        recommender.vocab = {token: col for col, token in enumerate(meta["tokens"])}
+        recommender.items = meta["items"]
+        recommender.index = {(item["media_type"], item["id"]): row for row, item in enumerate(recommender.items)}
+        recommender.max_log_votes = meta["max_log_votes"]
+        recommender.max_log_popularity = meta["max_log_popularity"]
+        recommender.catalog_size = meta.get("catalog_size")
+        recommender.nprobe = meta.get("nprobe")
+        # "ann" is false when tuning found the index too lossy for this catalog
+        if len(recommender.items) >= ANN_MIN_ITEMS and meta.get("ann", True):
+            if recommender.nprobe is not None and os.path.exists(os.path.join(_index_dir(path), "projection.npy")):
+                recommender.ann = IVFIndex.load(_index_dir(path))
+                recommender.projection = np.load(os.path.join(_index_dir(path), "projection.npy"))
+            else:
+                recommender.build_index()
+        return recommender
+
+def _index_dir(model_path):
+    return os.path.splitext(model_path)[0] + "_ann"
+
+def _normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return (sparse.diags(1.0 / norms).astype(np.float32) @ matrix).tocsr()
+
+# Loads the saved model, refitting from the catalog first if the catalog has changed since.
+# The catalog is only ever appended to, so lines added after the fit (titles opened in a
+# detail view, small ingests) are added to the loaded model instead, until they come to
+# REFIT_FRACTION of it.
+def load_recommender(catalog_path=CATALOG_PATH, model_path=MODEL_PATH):
+    if not os.path.exists(catalog_path):
+        return None
+    size = os.path.getsize(catalog_path)
+    if os.path.exists(model_path):
+        recommender = Recommender.load(model_path)
+        fitted = recommender.catalog_size
+        if fitted is None:  # Saved before catalog sizes were recorded
+            if os.path.getmtime(model_path) >= os.path.getmtime(catalog_path):
+                return recommender
+        elif fitted <= size:
+            tail = list(read_catalog(catalog_path, fitted))
+            if len(tail) <= REFIT_FRACTION * len(recommender):
+                for item in tail:
+                    recommender.add_item(item)
+                return recommender
+    recommender = Recommender().fit(read_catalog(catalog_path))
+    recommender.catalog_size = size  # Lines appended while fitting are re-read as tail; add_item skips known ones
+    recommender.save(model_path)
+    return recommender
+
+def _format(results):
+    return "\n".join(f"{score:.3f}  {item['media_type']:<5} {item['id']:<8} {item.get('title') or item.get('name')}"
+                     for item, score in results)
+
+# Command line entry point for building and querying the model offline
+def main():
+    parser = argparse.ArgumentParser(description="Offline content-based recommendations from the local catalog")
+    parser.add_argument("--catalog", default=CATALOG_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="fit the model from the catalog")
+    similar = commands.add_parser("similar", help="items like one title")
+    similar.add_argument("media_type", choices=MEDIA_TYPES)
+    similar.add_argument("id", type=int)
+    similar.add_argument("-k", type=int, default=10)
+    similar.add_argument("--nprobe", type=int, help="index lists to scan (higher = better recall, slower; default: tuned)")
+    favorites = commands.add_parser("favorites", help="items for a set of favorites, e.g. movie:550 tv:1399")
+    favorites.add_argument("keys", nargs="+")
+    favorites.add_argument("-k", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        recommender = Recommender().fit(read_catalog(args.catalog))
+        recommender.save(args.model)
+        print(f"Fitted {len(recommender)} items x {recommender.matrix.shape[1]} features")
+        return
+    recommender = load_recommender(args.catalog, args.model)
+    if recommender is None:
+        parser.error(f"no catalog at {args.catalog}")
+    if args.command == "similar":
+        print(_format(recommender.similar(args.media_type, args.id, args.k, args.nprobe)))
+    else:
+        keys = [(key.split(":")[0], int(key.split(":")[1])) for key in args.keys]
+        print(_format(recommender.for_favorites(keys, args.k)))
+
+if __name__ == "__main__":
+    main()
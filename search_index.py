@@ -0,0 +1,192 @@
+import bisect
+import math
+import os
+import re
+import unicodedata
+from array import array
+import numpy as np
+
+# Offline full-text index over one catalog store table.
+# Text is accent-folded and case-folded, then split into word tokens. Postings map each term
+# to the rows containing it with a field-weighted, log-damped frequency, stored as CSR arrays
+# over an alphabetically sorted vocabulary so a query prefix is a bisect range. Title terms
+# are also indexed by character trigram, which finds close spellings when a token has no
+# exact or prefix match. Everything except the vocabulary is memory-mapped.
+
+# Store column -> weight of a term occurring in it
+SEARCH_FIELDS = {"title": 3.0, "original_title": 2.0, "overview": 0.5}
+TITLE_FIELDS = ("title", "original_title")  # Only these feed the trigram (typo) index
+MAX_PREFIX_TERMS = 64     # Most frequent completions considered for a prefix
+MAX_FUZZY_TERMS = 16      # Closest spellings considered for a misspelled token
+MIN_FUZZY_SIMILARITY = 0.3
+POPULARITY_WEIGHT = 0.3   # Tie-breaker so well-known titles outrank obscure namesakes
+
+TOKEN_RE = re.compile(r"\w+")
+
+def fold(text):
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text or ""))
+
+# Trigrams of a term padded with word boundaries; a term of n characters has n of them
+def trigrams(term):
+    padded = f"^{term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _save_words(path, words):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(words))
+
+def _load_words(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return text.split("\n") if text else []
+
+# Builds the index for a table into directory
+def build_search_index(table, directory):
+    os.makedirs(directory, exist_ok=True)
+    term_ids = {}
+    title_terms = set()
+    posting_terms, posting_rows, posting_weights = array("i"), array("i"), array("f")
+    for column, weight in SEARCH_FIELDS.items():
+        if column not in table.columns:
+            continue
+        for row, index in enumerate(np.asarray(table.columns[column]).tolist()):
+            if not index:
+                continue
+            for token in tokenize(table.string(index)):
+                term_id = term_ids.setdefault(token, len(term_ids))
+                posting_terms.append(term_id)
+                posting_rows.append(row)
+                posting_weights.append(weight)
+                if column in TITLE_FIELDS:
+                    title_terms.add(term_id)
+
+    # Merge repeated (term, row) pairs, then renumber terms in alphabetical order
+    n_rows = max(len(table), 1)
+    keys = np.frombuffer(posting_terms, np.int32).astype(np.int64) * n_rows + np.frombuffer(posting_rows, np.int32)
+    keys, inverse = np.unique(keys, return_inverse=True)
+    weights = np.log1p(np.bincount(inverse, weights=np.frombuffer(posting_weights, np.float32))).astype(np.float32)
+    terms = sorted(term_ids)
+    rank = np.zeros(len(terms), np.int64)
+    rank[[term_ids[term] for term in terms]] = np.arange(len(terms))
+    ranked_terms = rank[keys // n_rows]
+    order = np.lexsort((keys % n_rows, ranked_terms))
+    ranked_terms = ranked_terms[order]
+    np.save(os.path.join(directory, "term_offsets.npy"),
+            np.searchsorted(ranked_terms, np.arange(len(terms) + 1)).astype(np.int64))
+    np.save(os.path.join(directory, "posting_rows.npy"), (keys % n_rows)[order].astype(np.int32))
+    np.save(os.path.join(directory, "posting_weights.npy"), weights[order])
+    _save_words(os.path.join(directory, "terms.txt"), terms)
+
+    # Trigram -> title terms containing it
+    grams = {}
+    for term_id in title_terms:
+        term = terms[rank[term_id]]
+        if len(term) >= 3:
+            for gram in trigrams(term):
+                grams.setdefault(gram, []).append(int(rank[term_id]))
+    gram_list = sorted(grams)
+    np.save(os.path.join(directory, "trigram_offsets.npy"),
+            np.concatenate([[0], np.cumsum([len(grams[g]) for g in gram_list])]).astype(np.int64))
+    np.save(os.path.join(directory, "trigram_terms.npy"),
+            np.asarray([t for g in gram_list for t in sorted(grams[g])], np.int32))
+    _save_words(os.path.join(directory, "trigrams.txt"), gram_list)
+
+# Keeps the items whose title or name has a word starting with every query token; used to
+# narrow the results of a shorter query while the request for the longer one is in flight
+def narrow(items, query):
+    tokens = tokenize(query)
+    kept = []
+    for item in items:
+        words = tokenize(" ".join(item.get(field) or "" for field in ("title", "original_title", "name", "original_name")))
+        if all(any(word.startswith(token) for word in words) for token in tokens):
+            kept.append(item)
+    return kept
+
+class SearchIndex:
+    def __init__(self, directory, popularity):
+        self.terms = _load_words(os.path.join(directory, "terms.txt"))
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self.trigram_ids = {gram: i for i, gram in enumerate(_load_words(os.path.join(directory, "trigrams.txt")))}
+        arrays = {}
+        for name in ("term_offsets", "posting_rows", "posting_weights", "trigram_offsets", "trigram_terms"):
+            values = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            arrays[name] = values if values.size else np.asarray(values)
+        self.term_offsets = arrays["term_offsets"]
+        self.posting_rows = arrays["posting_rows"]
+        self.posting_weights = arrays["posting_weights"]
+        self.trigram_offsets = arrays["trigram_offsets"]
+        self.trigram_terms = arrays["trigram_terms"]
+        self.popularity_boost = POPULARITY_WEIGHT * np.log1p(np.asarray(popularity, np.float32))
+        self.n_rows = len(popularity)
+
+    # Opens the index in directory, or returns None if it was never built
+    @classmethod
+    def open(cls, directory, popularity):
+        if not os.path.exists(os.path.join(directory, "terms.txt")):
+            return None
+        return cls(directory, popularity)
+
+    # Terms a query token stands for, as (term_id, factor): the exact term, the most
+    # frequent completions if the token is still being typed, or else close spellings
+    def expand(self, token, prefix=False):
+        expansions = {}
+        exact = self.term_ids.get(token)
+        if exact is not None:
+            expansions[exact] = 1.0
+        if prefix and len(token) >= 2:
+            start = bisect.bisect_left(self.terms, token)
+            end = bisect.bisect_left(self.terms, token + "\uffff", start)
+            candidates = np.arange(start, end)
+            if len(candidates) > MAX_PREFIX_TERMS:
+                frequencies = self.term_offsets[start + 1:end + 1] - self.term_offsets[start:end]
+                candidates = candidates[np.argpartition(-frequencies, MAX_PREFIX_TERMS - 1)[:MAX_PREFIX_TERMS]]
+            for term_id in candidates.tolist():
+                expansions.setdefault(term_id, 0.6 + 0.4 * len(token) / len(self.terms[term_id]))
+        if not expansions and len(token) >= 3:
+            expansions.update(self.similar_terms(token))
+        return expansions
+
+    # Title terms sharing enough trigrams with token, scored by Jaccard similarity
+    def similar_terms(self, token):
+        grams = [self.trigram_ids[g] for g in trigrams(token) if g in self.trigram_ids]
+        if not grams:
+            return {}
+        candidates = np.concatenate([self.trigram_terms[self.trigram_offsets[g]:self.trigram_offsets[g + 1]] for g in grams])
+        term_ids, shared = np.unique(candidates, return_counts=True)
+        lengths = np.fromiter((len(self.terms[t]) for t in term_ids.tolist()), np.int64, len(term_ids))
+        similarity = shared / (len(token) + lengths - shared)
+        keep = np.flatnonzero(similarity >= MIN_FUZZY_SIMILARITY)
+        keep = keep[np.argsort(-similarity[keep])[:MAX_FUZZY_TERMS]]
+        return {int(term_ids[i]): 0.5 * float(similarity[i]) for i in keep}
+
+    # Returns (rows, scores) of the best k rows, best first. Every token must match unless no
+    # row matches them all, in which case rows matching the most tokens are ranked instead.
+    def search(self, query, k=20):
+        tokens = tokenize(query)
+        if not tokens or not self.n_rows:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        scores = np.zeros(self.n_rows, np.float32)
+        matched = np.zeros(self.n_rows, np.int16)
+        for i, token in enumerate(tokens):
+            token_scores = np.zeros(self.n_rows, np.float32)
+            for term_id, factor in self.expand(token, prefix=i == len(tokens) - 1).items():
+                start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+                rows = self.posting_rows[start:end]
+                idf = math.log(1 + self.n_rows / (end - start))
+                # A term's postings hold each row once, so this keeps each row's best expansion
+                token_scores[rows] = np.maximum(token_scores[rows], self.posting_weights[start:end] * (factor * idf))
+            scores += token_scores
+            matched += token_scores > 0
+        best_match = matched.max()
+        if best_match == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        rows = np.flatnonzero(matched == best_match)
+        row_scores = scores[rows] + self.popularity_boost[rows]
+        k = min(k, len(rows))
+        top = np.argpartition(-row_scores, k - 1)[:k]
+        top = top[np.argsort(-row_scores[top], kind="stable")]
+        return rows[top], row_scores[top]
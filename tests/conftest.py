@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Modules live at the repository root, and read WATCHX_CACHE_DIR when first imported, so the
+# cache is pointed at a scratch directory before any test module imports them
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("WATCHX_CACHE_DIR", tempfile.mkdtemp(prefix="watchx-tests-"))
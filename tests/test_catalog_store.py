@@ -0,0 +1,49 @@
+import os
+import catalog_store
+from recommender import append_to_catalog
+
+def movie(item_id, title, **fields):
+    return dict({"id": item_id, "media_type": "movie", "title": title, "vote_average": 7.0, "vote_count": 100,
+                 "popularity": 10.0, "release_date": "2001-01-01", "genres": [18]}, **fields)
+
+def generations(directory, content_type="movie"):
+    return sorted(name for name in os.listdir(os.path.join(directory, content_type)) if name.startswith("gen-"))
+
+def test_rebuild_publishes_a_new_generation_and_keeps_the_previous_one_readable(tmp_path):
+    catalog, directory = str(tmp_path / "catalog.jsonl"), str(tmp_path / "store")
+    append_to_catalog([movie(1, "One"), movie(2, "Two")], catalog)
+    first = catalog_store.build_store(catalog, directory)
+    append_to_catalog([movie(3, "Three"), movie(1, "One, revised")], catalog)
+    second = catalog_store.build_store(catalog, directory)
+
+    assert len(generations(directory)) == 2
+    assert first.table("movie").lookup(1)["title"] == "One"  # Still mapped from its own generation
+    assert second.table("movie").lookup(1)["title"] == "One, revised"  # Later lines win
+    assert len(catalog_store.CatalogStore.open(directory)) == 3
+
+    third = catalog_store.build_store(catalog, directory)
+    assert len(generations(directory)) == 2  # The first build's generation is gone
+    assert third.table("movie").path.endswith(generations(directory)[-1])
+    assert not os.path.exists(first.table("movie").path)
+
+def test_small_appends_do_not_force_a_rebuild(tmp_path):
+    catalog, directory = str(tmp_path / "catalog.jsonl"), str(tmp_path / "store")
+    append_to_catalog([movie(item_id, f"Title {item_id}") for item_id in range(1, 101)], catalog)
+    store = catalog_store.build_store(catalog, directory)
+    assert not store.is_stale(catalog) and not store.needs_rebuild(catalog)
+
+    append_to_catalog([movie(101, "Opened in a detail view")], catalog)
+    assert store.is_stale(catalog) and not store.needs_rebuild(catalog)
+    assert catalog_store.load_catalog_store(catalog, directory).table("movie").lookup(101) is None
+
+    append_to_catalog([movie(item_id, f"Ingested {item_id}") for item_id in range(102, 130)], catalog)
+    assert store.needs_rebuild(catalog)
+    assert catalog_store.load_catalog_store(catalog, directory).table("movie").lookup(101) is not None
+
+def test_a_replaced_catalog_forces_a_rebuild(tmp_path):
+    catalog, directory = str(tmp_path / "catalog.jsonl"), str(tmp_path / "store")
+    append_to_catalog([movie(item_id, f"Title {item_id}") for item_id in range(1, 51)], catalog)
+    store = catalog_store.build_store(catalog, directory)
+    os.remove(catalog)
+    append_to_catalog([movie(1, "Only")], catalog)
+    assert store.needs_rebuild(catalog)
@@ -0,0 +1,41 @@
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt5.QtWidgets import QApplication
+import movie_recommender
+
+app = QApplication.instance() or QApplication([])
+
+class FakeScheduler:
+    def __init__(self):
+        self.calls = []
+
+    def submit_call(self, slot, fn, callback, priority):
+        self.calls.append((slot, callback))
+
+    def cancel(self, slot):
+        pass
+
+def make_prefetcher(monkeypatch, budget_kb):
+    monkeypatch.setattr(movie_recommender, "PREFETCH_KB_PER_MINUTE", budget_kb)
+    prefetcher = movie_recommender.DetailPrefetcher(client=None)
+    prefetcher.scheduler = FakeScheduler()
+    return prefetcher
+
+ITEMS = [{"id": item_id, "media_type": "movie"} for item_id in range(1, 6)]
+
+def test_zero_budget_disables_prefetch(monkeypatch):
+    prefetcher = make_prefetcher(monkeypatch, 0)
+    prefetcher.prefetch_visible("movie", ITEMS)
+    prefetcher.prefetch_hovered("movie", ITEMS[0])
+    assert prefetcher.scheduler.calls == []
+    assert prefetcher.queue == []
+
+def test_budget_pauses_until_downloads_age_out(monkeypatch):
+    prefetcher = make_prefetcher(monkeypatch, 1)
+    prefetcher.prefetch_visible("movie", ITEMS)
+    calls = prefetcher.scheduler.calls
+    assert len(calls) == movie_recommender.PREFETCH_CONCURRENCY
+    calls[0][1](2048)  # Over the 1 KB budget
+    assert len(calls) == movie_recommender.PREFETCH_CONCURRENCY
+    assert prefetcher.resume_timer.isActive()
+    prefetcher.cancel()
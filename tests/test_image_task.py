@@ -0,0 +1,51 @@
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from types import SimpleNamespace
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
+from PyQt5.QtGui import QImage
+import movie_recommender
+
+class FakeDiskCache:
+    def __init__(self):
+        self.thumbnails = {}
+
+    def get_thumbnail(self, key):
+        return self.thumbnails.get(key)
+
+    def put_thumbnail(self, key, data):
+        self.thumbnails[key] = data
+
+def png(width, height):
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(0xff336699)
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(data)
+
+def test_boxes_sharing_a_download_decode_it_once(monkeypatch):
+    downloads = []
+    monkeypatch.setattr(movie_recommender.tmdb_client, "image_bytes",
+                        lambda size, file_path, cache: downloads.append(file_path) or png(200, 300))
+    decodes = []
+    load_from_data = QImage.loadFromData
+    monkeypatch.setattr(QImage, "loadFromData", lambda self, data, *args: decodes.append(len(data)) or
+                        load_from_data(self, data, *args))
+    emitted = []
+    signals = SimpleNamespace(finished=SimpleNamespace(emit=lambda key, image: emitted.append((key, image))))
+    disk_cache = FakeDiskCache()
+    task = movie_recommender.ImageTask("w342", "/a.png", disk_cache, signals)
+    assert task.add_target("small", 100, 150, 1.0)
+    assert task.add_target("large", 200, 300, 2.0)
+
+    task.run()
+
+    assert downloads == ["/a.png"]
+    assert len(decodes) == 1
+    assert [key for key, _ in emitted] == ["small", "large"]
+    small, large = emitted[0][1], emitted[1][1]
+    assert (small.width(), small.height()) == (100, 150)
+    assert (large.width(), large.height(), large.devicePixelRatio()) == (200, 300, 2.0)
+    assert list(disk_cache.thumbnails) == ["small"]  # Only scaled copies are worth saving
+    assert not task.add_target("late", 50, 75, 1.0)
@@ -0,0 +1,63 @@
+import gzip
+import json
+import pytest
+import ingest_catalog
+import mock_tmdb
+
+@pytest.fixture
+def server(tmp_path):
+    server = mock_tmdb.start_server(fixture_dir=str(tmp_path / "fixtures"))
+    yield server
+    server.shutdown()
+
+def write_export(path, ids):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for item_id in ids:
+            f.write(json.dumps({"adult": False, "id": item_id, "popularity": 1.0}) + "\n")
+
+def catalog_ids(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+def test_failed_items_are_retried_on_the_next_run(server, tmp_path, monkeypatch):
+    export = str(tmp_path / "movie_ids_01_01_2024.json.gz")
+    out = str(tmp_path / "catalog.jsonl")
+    checkpoint = out + ".checkpoint"
+    write_export(export, [1, 2, 3, 4, 5])
+
+    compact_item = ingest_catalog.compact_item
+    def broken_for_3(data, content_type):
+        if data["id"] == 3:
+            raise KeyError("title")
+        return compact_item(data, content_type)
+    monkeypatch.setattr(ingest_catalog, "compact_item", broken_for_3)
+
+    stats = ingest_catalog.ingest(export, "movie", "key", out, f"{server.url}/3", workers=2, rate=1000,
+                                  checkpoint_path=checkpoint)
+    assert stats == {"written": 4, "missing": 0, "failed": 1}
+    assert sorted(catalog_ids(out)) == [1, 2, 4, 5]
+    with open(checkpoint, encoding="utf-8") as f:
+        assert json.load(f) == {"next_line": 5, "retry": [[2, 3]]}
+
+    monkeypatch.setattr(ingest_catalog, "compact_item", compact_item)
+    stats = ingest_catalog.ingest(export, "movie", "key", out, f"{server.url}/3", workers=2, rate=1000,
+                                  checkpoint_path=checkpoint)
+    assert stats == {"written": 1, "missing": 0, "failed": 0}
+    assert sorted(catalog_ids(out)) == [1, 2, 3, 4, 5]
+    with open(checkpoint, encoding="utf-8") as f:
+        assert json.load(f) == {"next_line": 5, "retry": []}
+
+def test_server_errors_do_not_stop_the_run(tmp_path):
+    server = mock_tmdb.start_server(fixture_dir=str(tmp_path / "fixtures"),
+                                    faults=mock_tmdb.FaultPolicy(error_rate=1.0))
+    try:
+        export = str(tmp_path / "movie_ids_01_01_2024.json.gz")
+        out = str(tmp_path / "catalog.jsonl")
+        write_export(export, [1, 2, 3])
+        stats = ingest_catalog.ingest(export, "movie", "key", out, f"{server.url}/3", workers=2, rate=1000,
+                                      checkpoint_path=out + ".checkpoint")
+    finally:
+        server.shutdown()
+    assert stats == {"written": 0, "missing": 0, "failed": 3}
+    with open(out + ".checkpoint", encoding="utf-8") as f:
+        assert json.load(f)["retry"] == [[0, 1], [1, 2], [2, 3]]
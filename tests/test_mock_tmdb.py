@@ -0,0 +1,52 @@
+import os
+import re
+import pytest
+import requests
+import mock_tmdb
+import tmdb_http
+
+DETAILS = ("/3/movie/550", {"append_to_response": tmdb_http.DETAIL_APPEND_TO_RESPONSE["movie"]})
+
+@pytest.fixture
+def start():
+    servers = []
+    def start(**options):
+        servers.append(mock_tmdb.start_server(**options))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.shutdown()
+
+def get(server, path, params):
+    response = requests.get(f"{server.url}{path}", params=dict(params, api_key="test-key"), timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+def test_bundled_fixtures_are_replayed_by_default(start):
+    server = start()
+    assert server.replay
+    data = get(server, *DETAILS)
+    assert data["title"] == "Fight Club"
+    assert data["credits"]["cast"][1]["name"] == "Brad Pitt"
+    assert server.snapshot_stats()["fixtures"] == 1
+
+def test_synthetic_mode_ignores_fixtures(start):
+    server = start(replay=False)
+    data = get(server, *DETAILS)
+    assert data["title"] != "Fight Club"
+    assert server.snapshot_stats()["synthetic"] == 1
+
+def test_bundled_fixtures_hold_no_api_keys():
+    names = [name for name in os.listdir(mock_tmdb.FIXTURE_DIR) if name.endswith(".json")]
+    assert names
+    for name in names:
+        assert "api_key" not in name
+        with open(os.path.join(mock_tmdb.FIXTURE_DIR, name), "rb") as f:
+            body = f.read()
+        assert b"api_key" not in body
+        assert not re.search(rb"\b[0-9a-f]{32}\b", body)  # v3 keys are 32 hex digits
+
+def test_sanitize_scrubs_the_key():
+    body = b'{"next":"https://api.themoviedb.org/3/x?api_key=abc123&page=2","echo":"abc123"}'
+    assert mock_tmdb.sanitize(body, "abc123") == \
+        b'{"next":"https://api.themoviedb.org/3/x?api_key=REDACTED&page=2","echo":"REDACTED"}'
@@ -0,0 +1,66 @@
+import threading
+import time
+from types import SimpleNamespace
+import tmdb_http
+from tmdb_http import QUEUE_INGESTION, QUEUE_INTERACTIVE, QUEUE_PREFETCH, RateGovernor
+
+def response(status, retry_after=None):
+    return SimpleNamespace(status_code=status, headers={"Retry-After": retry_after} if retry_after else {})
+
+def test_waiting_requests_are_served_by_queue_then_arrival():
+    governor = RateGovernor("test", rate=5, burst=1)
+    governor.acquire()  # Empties the bucket; the next token is 200 ms away
+    order = []
+    def wait(queue, name):
+        governor.acquire(queue)
+        order.append(name)
+    threads = []
+    for queue, name in [(QUEUE_INGESTION, "ingestion"), (QUEUE_PREFETCH, "prefetch 1"),
+                        (QUEUE_PREFETCH, "prefetch 2"), (QUEUE_INTERACTIVE, "interactive")]:
+        threads.append(threading.Thread(target=wait, args=(queue, name)))
+        threads[-1].start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(5)
+    assert order == ["interactive", "prefetch 1", "prefetch 2", "ingestion"]
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert tmdb_http.retry_after(response(429, "3")) == 3.0
+    assert tmdb_http.retry_after(response(429)) == 1.0
+    assert tmdb_http.retry_after(response(429, "Wed, 21 Oct 2015 07:28:00 GMT")) == 0.0  # In the past
+    assert tmdb_http.retry_after(response(429, "86400")) == tmdb_http.MAX_RETRY_AFTER
+
+def test_429_pauses_the_governor_for_retry_after_then_retries(monkeypatch):
+    replies = [response(429, "0.3"), response(200)]
+    monkeypatch.setattr(tmdb_http, "_send", lambda *args: replies.pop(0))
+    governor = RateGovernor("test", rate=1000)
+    started = time.monotonic()
+    assert tmdb_http.get("http://stub/3/movie/1", governor=governor).status_code == 200
+    assert time.monotonic() - started >= 0.3
+    assert governor.throttled == 1 and replies == []
+
+def test_other_requests_wait_out_the_pause():
+    governor = RateGovernor("test", rate=1000)
+    governor.pause(0.3)
+    started = time.monotonic()
+    governor.acquire(QUEUE_INTERACTIVE)
+    assert time.monotonic() - started >= 0.29
+
+def test_persistent_429_is_returned_after_the_retry_limit(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tmdb_http, "_send", lambda *args: calls.append(1) or response(429, "0"))
+    governor = RateGovernor("test", rate=1000)
+    assert tmdb_http.get("http://stub/3/movie/1", governor=governor).status_code == 429
+    assert len(calls) == tmdb_http.MAX_THROTTLE_RETRIES + 1
+
+def test_queue_limit_caps_one_queue_within_the_host_budget():
+    governor = RateGovernor("test", rate=1000)
+    governor.limit_queue(QUEUE_INGESTION, 20)
+    started = time.monotonic()
+    for _ in range(30):  # 20 from the queue's burst, then 10 more at 20 per second
+        governor.acquire(QUEUE_INGESTION)
+    assert time.monotonic() - started >= 0.45
+    started = time.monotonic()
+    for _ in range(30):
+        governor.acquire(QUEUE_INTERACTIVE)
+    assert time.monotonic() - started < 0.2
@@ -0,0 +1,50 @@
+import random
+import recommender as rec
+
+# Items drawn from `topics` groups that share genres, cast and keywords, as franchises do
+def catalog(count, topics, seed=0):
+    rng = random.Random(seed)
+    features = [(rng.sample(range(19), 2), rng.sample(range(100000), 30), rng.sample(range(20000), 40))
+                for _ in range(topics)]
+    items = []
+    for item_id in range(1, count + 1):
+        genres, cast, keywords = features[rng.randrange(topics)]
+        items.append({"id": item_id, "media_type": "movie", "title": f"Title {item_id}", "genres": genres,
+                      "cast": rng.sample(cast, 6) + rng.sample(range(100000), 4),
+                      "keywords": rng.sample(keywords, 12) + rng.sample(range(20000), 4),
+                      "vote_average": rng.uniform(3, 9), "vote_count": rng.randint(0, 20000),
+                      "release_date": f"{rng.randint(1950, 2025)}-01-01"})
+    return items
+
+def similar_ids(model, keys, nprobe=None):
+    return [{item["id"] for item, _ in model.similar(*key, k=5, nprobe=nprobe)} for key in keys]
+
+def test_index_is_tuned_to_the_target_recall(monkeypatch):
+    items = catalog(2000, topics=40)
+    monkeypatch.setattr(rec, "ANN_MIN_ITEMS", float("inf"))
+    model = rec.Recommender().fit(items)
+    keys = random.Random(1).sample(list(model.index), 40)
+    exact = similar_ids(model, keys)
+    monkeypatch.setattr(rec, "ANN_MIN_ITEMS", 0)
+    model.build_index()
+    assert model.ann is not None and model.nprobe is not None
+    approximate = similar_ids(model, keys)
+    recall = sum(len(a & e) for a, e in zip(approximate, exact)) / sum(len(e) for e in exact)
+    assert recall >= 0.9
+
+def test_catalog_the_embedding_cannot_serve_is_searched_exactly(monkeypatch):
+    monkeypatch.setattr(rec, "ANN_MIN_ITEMS", 0)
+    monkeypatch.setattr(rec, "ANN_TARGET_RECALL", 1.01)  # Unreachable
+    model = rec.Recommender().fit(catalog(500, topics=10))
+    assert model.ann is None and model.nprobe is None
+    assert len(model.similar("movie", 1, k=5)) == 5
+
+def test_tuned_nprobe_survives_save_and_load(monkeypatch, tmp_path):
+    monkeypatch.setattr(rec, "ANN_MIN_ITEMS", 0)
+    model = rec.Recommender().fit(catalog(1000, topics=20))
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = rec.Recommender.load(path)
+    assert loaded.nprobe == model.nprobe
+    assert loaded.ann is not None
+    assert similar_ids(loaded, [("movie", 1)]) == similar_ids(model, [("movie", 1)])
@@ -0,0 +1,54 @@
+import pytest
+import catalog_store
+from recommender import append_to_catalog
+from search_index import narrow, tokenize
+
+MOVIES = [
+    (1, "Star Wars", "Princess Leia is held hostage by the Empire.", 80.0),
+    (2, "The Empire Strikes Back", "The Rebels scatter after the Empire attacks.", 60.0),
+    (3, "Starship Troopers", "Humans fight giant bugs.", 30.0),
+    (4, "Amélie", "A shy waitress in Paris.", 25.0),
+    (5, "The Matrix", "A hacker learns the truth about reality.", 70.0),
+    (6, "Paris, Texas", "A drifter wanders out of the desert.", 5.0),
+    (7, "Paris", "Stories of people living in Paris.", 15.0),
+    (8, "Hamlet", "The prince of Denmark.", 9.0),
+    (9, "Hamlet", "A modern retelling set in New York.", 2.0),
+]
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("store")
+    catalog = str(directory / "catalog.jsonl")
+    append_to_catalog([{"id": item_id, "media_type": "movie", "title": title, "overview": overview,
+                        "popularity": popularity} for item_id, title, overview, popularity in MOVIES], catalog)
+    return catalog_store.build_store(catalog, str(directory / "store")).table("movie")
+
+def ids(table, query, k=20):
+    return [item["id"] for item in table.search(query, k)]
+
+def test_title_matches_outrank_overview_matches(table):
+    assert ids(table, "empire")[0] == 2
+    assert set(ids(table, "empire")) == {1, 2}
+
+def test_last_token_matches_as_a_prefix(table):
+    assert ids(table, "star w") == [1]
+    assert ids(table, "star")[:2] == [1, 3]
+
+def test_accents_and_case_are_folded(table):
+    assert ids(table, "AMELIE") == [4]
+    assert tokenize("Amélie's Café") == ["amelie", "s", "cafe"]
+
+def test_misspelled_tokens_match_close_titles(table):
+    assert ids(table, "matrx")[0] == 5
+
+def test_every_token_must_match_when_some_row_matches_all(table):
+    assert ids(table, "paris texas") == [6]
+    assert set(ids(table, "paris zzzz")[:2]) == {6, 7}  # No row has both; title matches for "paris" lead
+
+def test_popularity_breaks_ties_between_namesakes(table):
+    assert ids(table, "hamlet")[:2] == [8, 9]
+
+def test_narrow_keeps_items_with_a_word_starting_with_each_token():
+    items = [{"title": "Star Wars"}, {"title": "Starship Troopers"}, {"name": "Jason Statham"}]
+    assert narrow(items, "star w") == [{"title": "Star Wars"}]
+    assert narrow(items, "sta") == items
@@ -0,0 +1,75 @@
+import threading
+import tmdb_http
+
+# Runs do(key, fn) on `count` threads that all join the flight fn is blocked in
+def run_joined(flight, fn, count):
+    release = threading.Event()
+    results = [None] * count
+    started = threading.Event()
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(i):
+        try:
+            results[i] = ("ok", flight.do("key", leader_fn if i == 0 else fn))
+        except Exception as e:
+            results[i] = ("error", e)
+
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=call, args=(i,)) for i in range(1, count)]
+    for thread in threads[1:]:
+        thread.start()
+    while flight.shared < count - 1:  # Every follower is waiting on the leader's flight
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+def test_concurrent_calls_share_one_run():
+    flight = tmdb_http.SingleFlight()
+    calls = []
+    results = run_joined(flight, lambda: calls.append(1) or "payload", 4)
+    assert calls == [1]
+    assert results == [("ok", "payload")] * 4
+    assert flight.shared == 3
+    assert flight.flights == {}
+
+def test_followers_get_fresh_exceptions_chained_to_the_original():
+    flight = tmdb_http.SingleFlight()
+    original = tmdb_http.RequestException("connection reset")
+    def fail():
+        raise original
+    results = run_joined(flight, fail, 3)
+    assert results[0] == ("error", original)
+    for status, error in results[1:]:
+        assert status == "error"
+        assert isinstance(error, tmdb_http.RequestException)
+        assert error is not original
+        assert error.__cause__ is original
+    assert results[1][1] is not results[2][1]
+
+def test_exceptions_that_cannot_be_rebuilt_become_runtime_errors():
+    class Odd(Exception):
+        def __init__(self, a, b):
+            super().__init__(f"{a}/{b}")
+    flight = tmdb_http.SingleFlight()
+    def fail():
+        raise Odd(1, 2)
+    results = run_joined(flight, fail, 2)
+    assert isinstance(results[0][1], Odd)
+    assert isinstance(results[1][1], RuntimeError)
+    assert isinstance(results[1][1].__cause__, Odd)
+
+def test_a_new_call_after_the_flight_lands_runs_again():
+    flight = tmdb_http.SingleFlight()
+    calls = []
+    assert flight.do("key", lambda: calls.append(1) or 1) == 1
+    assert flight.do("key", lambda: calls.append(2) or 2) == 2
+    assert calls == [1, 2]
+    assert flight.shared == 0
@@ -0,0 +1,88 @@
+import json
+import os
+import tmdb_cache
+from tmdb_cache import RESPONSE_STALE_SECONDS, DiskCache, ResponseCache
+
+LIST_URL = "https://api.themoviedb.org/3/movie/popular"
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+def make_cache(tmp_path, monkeypatch, **options):
+    clock = Clock()
+    monkeypatch.setattr(tmdb_cache, "time", clock)
+    return ResponseCache(str(tmp_path / "responses"), 1024 * 1024, ttls={"list": 60}, **options), clock
+
+def test_response_cache_fresh_then_stale_then_expired(tmp_path, monkeypatch):
+    cache, clock = make_cache(tmp_path, monkeypatch)
+    assert cache.lookup(LIST_URL, {"page": 1}) == (None, False)
+    cache.store(LIST_URL, {"page": 1, "api_key": "secret"}, {"results": [1]})
+    assert cache.lookup(LIST_URL, {"page": 1}) == ({"results": [1]}, True)  # The API key is not part of the key
+    clock.now += 61
+    assert cache.lookup(LIST_URL, {"page": 1}) == ({"results": [1]}, False)
+    clock.now += RESPONSE_STALE_SECONDS
+    assert cache.lookup(LIST_URL, {"page": 1}) == (None, False)
+    assert cache.stats()["fresh_hits"] == 1 and cache.stats()["stale_hits"] == 1 and cache.stats()["misses"] == 2
+
+def test_response_cache_revalidation_replaces_stale_entry(tmp_path, monkeypatch):
+    cache, clock = make_cache(tmp_path, monkeypatch)
+    cache.store(LIST_URL, {"page": 1}, {"results": ["old"]})
+    clock.now += 120
+    assert cache.lookup(LIST_URL, {"page": 1}) == ({"results": ["old"]}, False)
+    cache.store(LIST_URL, {"page": 1}, {"results": ["new"]})
+    assert cache.lookup(LIST_URL, {"page": 1}) == ({"results": ["new"]}, True)
+
+def test_response_cache_survives_restart(tmp_path, monkeypatch):
+    cache, clock = make_cache(tmp_path, monkeypatch)
+    cache.store(LIST_URL, {"page": 2}, {"results": [2]})
+    reopened = ResponseCache(str(tmp_path / "responses"), 1024 * 1024, ttls={"list": 60})
+    assert reopened.peek(LIST_URL, {"page": 2}) is None  # Nothing read from disk yet
+    assert reopened.lookup(LIST_URL, {"page": 2}) == ({"results": [2]}, True)
+
+def test_response_cache_memory_tier_is_bounded_lru(tmp_path, monkeypatch):
+    entry_size = len(json.dumps({"stored_at": 1_000_000.0, "data": {"results": [0]}}))
+    cache, _ = make_cache(tmp_path, monkeypatch, memory_bytes=entry_size * 3)
+    for page in range(3):
+        cache.store(LIST_URL, {"page": page}, {"results": [page]})
+    cache.peek(LIST_URL, {"page": 0})  # Page 0 becomes the most recently used
+    cache.store(LIST_URL, {"page": 3}, {"results": [3]})
+    assert cache.peek(LIST_URL, {"page": 1}) is None
+    assert cache.peek(LIST_URL, {"page": 0}) == {"results": [0]}
+    assert len(cache.memory) == 3 and cache.memory_bytes <= cache.memory_budget
+    assert cache.lookup(LIST_URL, {"page": 1}) == ({"results": [1]}, True)  # Evicted from memory only
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path / "disk"), max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"  # Now b is the oldest
+    cache.put("c", b"cccc")
+    assert "b" not in cache and cache.get("b") is None
+    assert cache.get("a") == b"aaaa" and cache.get("c") == b"cccc"
+    assert cache.total_bytes == 8
+    assert not os.path.exists(cache._path(cache._digest("b")))
+
+def test_disk_cache_rebuilds_its_index_from_disk(tmp_path):
+    directory = str(tmp_path / "disk")
+    cache = DiskCache(directory, max_bytes=100)
+    for age, key in enumerate(["newest", "middle", "oldest"]):
+        cache.put(key, key.encode("utf-8"))
+        os.utime(cache._path(cache._digest(key)), (1_000_000 - age, 1_000_000 - age))
+    with open(os.path.join(directory, ".tmp-interrupted"), "wb") as f:
+        f.write(b"partial write")
+
+    reopened = DiskCache(directory, max_bytes=len("newest") + len("middle"))
+    assert reopened.get("newest") == b"newest" and reopened.get("middle") == b"middle"
+    assert "oldest" not in reopened  # Over budget on reopening; the oldest file goes first
+    assert reopened.total_bytes == len("newest") + len("middle")
+
+def test_disk_cache_forgets_files_removed_behind_its_back(tmp_path):
+    cache = DiskCache(str(tmp_path / "disk"), max_bytes=100)
+    cache.put("a", b"aaaa")
+    os.remove(cache._path(cache._digest("a")))
+    assert cache.get("a") is None
+    assert "a" not in cache and cache.total_bytes == 0
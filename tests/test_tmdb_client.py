@@ -0,0 +1,56 @@
+import json
+import pytest
+import tmdb_client
+
+RESULT = {
+    "adult": False, "backdrop_path": "/b.jpg", "genre_ids": [18, 35], "id": 7, "media_type": "movie",
+    "original_language": "en", "original_title": "Seven", "overview": "A film.", "popularity": 12.5,
+    "poster_path": "/p.jpg", "release_date": "1995-09-22", "title": "Seven", "video": False,
+    "vote_average": 8.3, "vote_count": 21000,
+}
+
+def test_cached_list_results_keep_catalog_fields():
+    payload = tmdb_client.parse_list_payload(json.dumps({"page": 1, "results": [RESULT]}))
+    item = payload["results"][0]
+    assert item["overview"] == "A film."
+    assert item["genre_ids"] == [18, 35]
+    assert item["popularity"] == 12.5
+    assert "adult" not in item and "video" not in item
+
+def test_page_items_hold_only_display_fields():
+    page = tmdb_client.Page.from_response({"page": 1, "results": [RESULT], "total_pages": 3}, 1)
+    item = page.items[0]
+    assert item["title"] == "Seven"
+    assert "overview" not in item
+    assert set(item.to_dict()) <= set(tmdb_client.LIST_FIELDS)
+
+def test_parse_list_payload_matches_compacting_the_decoded_json():
+    payload = {"page": 2, "results": [RESULT, dict(RESULT, id=8, title=None, overview="")],
+               "total_pages": 9, "total_results": 170, "dates": {"maximum": "2024-06-01"}}
+    for text in (json.dumps(payload), json.dumps(payload, indent=2), json.dumps(payload, separators=(",", ":"))):
+        parsed = tmdb_client.parse_list_payload(text)
+        assert parsed == dict(payload, results=[tmdb_client.compact_list_item(item) for item in payload["results"]])
+    assert "title" not in parsed["results"][1]  # Nulls are dropped; empty strings are kept
+    assert parsed["results"][1]["overview"] == ""
+
+def test_parse_list_payload_trims_known_for():
+    person = {"id": 287, "media_type": "person", "name": "Brad Pitt", "gender": 2,
+              "known_for": [dict(RESULT, id=item_id) for item_id in range(1, 6)]}
+    parsed = tmdb_client.parse_list_payload(json.dumps({"results": [person]}))
+    known_for = parsed["results"][0]["known_for"]
+    assert [entry["id"] for entry in known_for] == list(range(1, tmdb_client.KNOWN_FOR_COUNT + 1))
+    assert "video" not in known_for[0] and "gender" not in parsed["results"][0]
+
+def test_parse_list_payload_handles_empty_payloads():
+    assert tmdb_client.parse_list_payload("{}") == {}
+    assert tmdb_client.parse_list_payload(' { "results" : [ ] } ') == {"results": []}
+
+@pytest.mark.parametrize("text", ["", "[]", '{"results": [1, 2]}', '{"results": [{"id": 1}', '{"page" 1}',
+                                  '{"page": 1 "results": []}', '{"results": [{"id": 1} {"id": 2}]}'])
+def test_parse_list_payload_rejects_malformed_json(text):
+    with pytest.raises(ValueError):
+        tmdb_client.parse_list_payload(text)
+
+def test_page_from_an_empty_payload_is_a_failed_page():
+    page = tmdb_client.Page.from_response({}, 3)
+    assert not page.ok and page.items == [] and page.total_pages == 2
@@ -0,0 +1,55 @@
+import user_store
+from user_store import UserStore
+
+def test_favorites_and_history_survive_reopening(tmp_path):
+    path = str(tmp_path / "user.db")
+    store = UserStore(path)
+    store.add_favorite("movie", 550, "Fight Club")
+    store.add_favorite("person", 550, "Someone")  # Same id, different type
+    store.toggle_favorite("tv", 1399, "Game of Thrones")
+    store.toggle_favorite("tv", 1399)
+    store.record_view("movie", 550, "Fight Club")
+    store.record_view("movie", 550, "Fight Club")
+    store.close()
+
+    reopened = UserStore(path)
+    try:
+        assert reopened.favorite_keys() == [("movie", 550), ("person", 550)]
+        assert reopened.favorites[("movie", 550)][0] == "Fight Club"
+        assert not reopened.is_favorite("tv", 1399)
+        assert [entry[:3] + entry[4:] for entry in reopened.recent()] == [("movie", 550, "Fight Club", 2)]
+    finally:
+        reopened.close()
+
+def test_removing_a_favorite_is_persisted(tmp_path):
+    path = str(tmp_path / "user.db")
+    store = UserStore(path)
+    store.add_favorite("movie", 1)
+    store.flush()
+    store.remove_favorite("movie", 1)
+    store.close()
+    reopened = UserStore(path)
+    assert reopened.favorite_keys() == []
+    reopened.close()
+
+def test_history_keeps_the_most_recent_items(tmp_path, monkeypatch):
+    monkeypatch.setattr(user_store, "HISTORY_LIMIT", 3)
+    path = str(tmp_path / "user.db")
+    store = UserStore(path)
+    for item_id in range(1, 6):
+        store.record_view("movie", item_id)
+    store.close()
+    reopened = UserStore(path)
+    assert sorted(key[1] for key in reopened.history) == [3, 4, 5]
+    reopened.close()
+
+def test_signals_weigh_favorites_above_views(tmp_path):
+    store = UserStore(str(tmp_path / "user.db"))
+    store.add_favorite("movie", 1)
+    for _ in range(10):
+        store.record_view("movie", 2)
+    store.record_view("movie", 1)
+    signals = store.signals()
+    store.close()
+    assert signals[("movie", 2)] == user_store.MAX_VIEW_WEIGHT
+    assert signals[("movie", 1)] == user_store.FAVORITE_WEIGHT + user_store.VIEW_WEIGHT
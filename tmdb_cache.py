@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+# Root directory for everything WatchX keeps between sessions
+CACHE_DIR = os.getenv("WATCHX_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".watchx", "cache")
+IMAGE_CACHE_MB = int(os.getenv("WATCHX_IMAGE_CACHE_MB", "200"))
+RESPONSE_CACHE_MB = int(os.getenv("WATCHX_RESPONSE_CACHE_MB", "50"))
+RESPONSE_MEMORY_MB = int(os.getenv("WATCHX_RESPONSE_MEMORY_MB", "16"))  # Decoded responses kept in memory, by JSON size
+
+# Freshness lifetimes in seconds for each class of TMDb endpoint
+RESPONSE_TTLS = {
+    "trending_day": 10 * 60,
+    "trending_week": 60 * 60,
+    "latest": 5 * 60,
+    "search": 10 * 60,
+    "list": 30 * 60,         # popular, now_playing, airing_today
+    "top_rated": 24 * 60 * 60,
+    "details": 6 * 60 * 60,
+}
+# How long past its TTL an entry may still be shown while it is being revalidated
+RESPONSE_STALE_SECONDS = 7 * 24 * 60 * 60
+
+# Writes bytes to path atomically: readers see either the old file or the complete new one
+def atomic_write(path, data):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+# Content-addressed on-disk cache with a byte budget and least-recently-used eviction.
+# Entries are files named by the SHA-1 of their key; recency is kept in memory and
+# mirrored to file mtimes so the LRU order survives restarts.
+class DiskCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # Digest -> size in bytes, oldest first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.indexed = False  # The index is built on first use, off the startup path
+
+    # Rebuilds the LRU index from the files already on disk, once (lock must be held)
+    def _load_index(self):
+        if self.indexed:
+            return
+        self.indexed = True
+        found = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.startswith(".tmp-"):
+                        continue  # Leftover from an interrupted write
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, name, stat.st_size))
+        for _, digest, size in sorted(found):
+            self.entries[digest] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _digest(self, key):
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    # Returns the cached bytes for key, or None on a miss
+    def get(self, key):
+        digest = self._digest(key)
+        with self.lock:
+            self._load_index()
+            if digest not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+        path = self._path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.total_bytes -= self.entries.pop(digest, 0)
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return data
+
+    # True if key is cached, without reading it or counting a hit
+    def __contains__(self, key):
+        with self.lock:
+            self._load_index()
+            return self._digest(key) in self.entries
+
+    def put(self, key, data):
+        digest = self._digest(key)
+        try:
+            atomic_write(self._path(digest), data)
+        except OSError as e:
+            print(f"Cache write failed: {e}")
+            return
+        with self.lock:
+            self._load_index()
+            self.total_bytes -= self.entries.pop(digest, 0)
+            self.entries[digest] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+
+    # Removes the oldest entries until the cache fits its byte budget (lock must be held)
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            digest, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+
+# Disk cache for TMDb images, keyed on size bucket plus file path (e.g. "w300", "/abc.jpg")
+class ImageCache(DiskCache):
+    def __init__(self, directory=None, max_bytes=None):
+        super().__init__(directory or os.path.join(CACHE_DIR, "images"),
+                         max_bytes if max_bytes is not None else IMAGE_CACHE_MB * 1024 * 1024)
+
+    def get_image(self, size, file_path):
+        return self.get(f"{size}{file_path}")
+
+    def put_image(self, size, file_path, data):
+        self.put(f"{size}{file_path}", data)
+
+    def has_image(self, size, file_path):
+        return f"{size}{file_path}" in self
+
+    # Images already scaled for display, keyed by the image loader's request key
+    def get_thumbnail(self, key):
+        return self.get(f"thumb:{key}")
+
+    def put_thumbnail(self, key, data):
+        self.put(f"thumb:{key}", data)
+
+# Classifies a TMDb API URL into one of the RESPONSE_TTLS endpoint classes
+def endpoint_class(url):
+    parts = [p for p in urlsplit(url).path.split("/") if p and p != "3"]
+    if not parts:
+        return "list"
+    if parts[0] == "trending":
+        return "trending_week" if parts[-1] == "week" else "trending_day"
+    if parts[0] == "search":
+        return "search"
+    if parts[-1] == "latest":
+        return "latest"
+    if parts[-1] == "top_rated":
+        return "top_rated"
+    if len(parts) >= 2 and parts[1].isdigit():
+        return "details"
+    return "list"
+
+# TTL-aware cache of decoded TMDb JSON responses, persisted to disk across restarts.
+# Lookups report whether an entry is still fresh; stale entries are returned too so the
+# caller can show them immediately while it revalidates against the network.
+class ResponseCache:
+    def __init__(self, directory=None, max_bytes=None, ttls=None, memory_bytes=None):
+        self.disk = DiskCache(directory or os.path.join(CACHE_DIR, "responses"),
+                              max_bytes if max_bytes is not None else RESPONSE_CACHE_MB * 1024 * 1024)
+        self.ttls = dict(RESPONSE_TTLS, **(ttls or {}))
+        # Key -> (stored_at, data, size) for entries read this session, least recently used first
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.memory_budget = memory_bytes if memory_bytes is not None else RESPONSE_MEMORY_MB * 1024 * 1024
+        self.lock = threading.Lock()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    # Cache key: the URL plus its query parameters, minus the API key
+    def key(self, url, params=None):
+        query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()) if k != "api_key")
+        return f"{url}?{query}"
+
+    # Adds or refreshes an entry in the memory tier, evicting the least recently used past
+    # the budget. Call with the lock held.
+    def _remember(self, key, entry):
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= previous[2]
+        self.memory[key] = entry
+        self.memory_bytes += entry[2]
+        while self.memory_bytes > self.memory_budget and len(self.memory) > 1:
+            self.memory_bytes -= self.memory.popitem(last=False)[1][2]
+
+    # Returns (data, is_fresh); data is None on a miss or when the entry is too old to show
+    def lookup(self, url, params=None):
+        key = self.key(url, params)
+        with self.lock:
+            entry = self.memory.get(key)
+        if entry is None:
+            raw = self.disk.get(key)
+            if raw is not None:
+                try:
+                    stored = json.loads(raw.decode("utf-8"))
+                    entry = (stored["stored_at"], stored["data"], len(raw))
+                except (ValueError, KeyError):
+                    entry = None
+        age = time.time() - entry[0] if entry else None
+        ttl = self.ttls[endpoint_class(url)]
+        with self.lock:
+            if entry is None or age > ttl + RESPONSE_STALE_SECONDS:
+                self.misses += 1
+                return None, False
+            if key in self.memory:
+                self.memory.move_to_end(key)
+            else:
+                self._remember(key, entry)
+            if age <= ttl:
+                self.fresh_hits += 1
+                return entry[1], True
+            self.stale_hits += 1
+            return entry[1], False
+
+    # Data for a request already seen this session, fresh or not, without touching disk or stats
+    def peek(self, url, params=None):
+        key = self.key(url, params)
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+        return entry[1] if entry else None
+
+    def store(self, url, params, data):
+        key = self.key(url, params)
+        stored_at = time.time()
+        raw = json.dumps({"stored_at": stored_at, "data": data}).encode("utf-8")
+        with self.lock:
+            self._remember(key, (stored_at, data, len(raw)))
+        self.disk.put(key, raw)
+
+    # Hit/miss counters for diagnostics
+    def stats(self):
+        with self.lock:
+            total = self.fresh_hits + self.stale_hits + self.misses
+            return {
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": (self.fresh_hits + self.stale_hits) / total if total else 0.0,
+            }
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+# Process-wide response cache, created on first use
+def get_response_cache():
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
@@ -0,0 +1,420 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+from datetime import datetime
+import tmdb_http
+import tracing
+from tmdb_cache import ImageCache, endpoint_class, get_response_cache
+
+# GUI-free access to TMDb: URL building, cached fetching and shaping of responses into
+# result objects. The Qt views in movie_recommender.py run these same paths on their thread
+# pools; batch jobs, load tests and benchmarks call them directly, with no display.
+
+MAX_PAGES = 500  # TMDb serves at most this many pages of any list
+WATCH_REGION = "US"
+
+# Kind, field and display size of the main image a detail view opens with
+DETAIL_IMAGES = {
+    "movie": ("poster", "poster_path", 300, 450),
+    "tv": ("poster", "poster_path", 300, 450),
+    "person": ("profile", "profile_path", 350, 525),
+}
+
+# Fields of a list result that the grids, search narrowing and prefetcher read; ListItem
+# keeps only these, so that is all the GUI thread holds.
+LIST_FIELDS = ("id", "media_type", "title", "name", "original_title", "original_name", "poster_path",
+               "profile_path", "vote_average", "release_date", "first_air_date", "known_for")
+_LIST_FIELD_SET = frozenset(LIST_FIELDS)
+# Further fields kept in the response cache for the catalog, search index and recommender
+# (text, genres, ranking). What remains (adult, video, ...) is dropped when a list response
+# is parsed.
+CATALOG_LIST_FIELDS = ("overview", "genre_ids", "popularity", "vote_count", "original_language",
+                       "backdrop_path", "known_for_department")
+_CACHED_FIELD_SET = _LIST_FIELD_SET | frozenset(CATALOG_LIST_FIELDS)
+KNOWN_FOR_COUNT = 3  # Titles kept per person; tiles show two
+LIST_ENDPOINTS = {"trending_day", "trending_week", "search", "top_rated", "list"}  # Classes with a results list
+
+CastMember = namedtuple("CastMember", "name character profile_path")
+Provider = namedtuple("Provider", "name logo_path")
+Role = namedtuple("Role", "title media_label character poster_path")
+
+# The cached fields (LIST_FIELDS and CATALOG_LIST_FIELDS) of one result, as a
+# JSON-serializable dict
+def compact_list_item(item):
+    compact = {field: value for field, value in item.items() if field in _CACHED_FIELD_SET and value is not None}
+    if "known_for" in compact:
+        compact["known_for"] = [compact_list_item(entry) for entry in compact["known_for"][:KNOWN_FOR_COUNT]]
+    return compact
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+# Index of the next non-whitespace character; TMDb sends none, so that case costs one test
+def _skip(text, end):
+    if text[end] in " \t\n\r":
+        end = _whitespace.match(text, end).end()
+    return end
+
+# Parses a list response one result at a time, keeping only the cached fields of each, so
+# the full nested objects of a page never exist together. Other top-level values are kept as is.
+# Raises ValueError on malformed JSON.
+def parse_list_payload(text):
+    try:
+        end = _skip(text, 0)
+        if text[end] != "{":
+            raise ValueError("Expecting a JSON object")
+        payload = {}
+        end = _skip(text, end + 1)
+        if text[end] == "}":
+            return payload
+        while True:
+            key, end = _decoder.raw_decode(text, end)
+            end = _skip(text, end)
+            if text[end] != ":":
+                raise ValueError(f"Expecting ':' at {end}")
+            end = _skip(text, end + 1)
+            if key == "results" and text[end] == "[":
+                results = payload[key] = []
+                end = _skip(text, end + 1)
+                while text[end] != "]":
+                    item, end = _decoder.raw_decode(text, end)
+                    if not isinstance(item, dict):
+                        raise ValueError(f"Expecting an object at {end}")
+                    results.append(compact_list_item(item))
+                    end = _skip(text, end)
+                    if text[end] == ",":
+                        end = _skip(text, end + 1)
+                    elif text[end] != "]":
+                        raise ValueError(f"Expecting ',' at {end}")
+                end += 1
+            else:
+                payload[key], end = _decoder.raw_decode(text, end)
+            end = _skip(text, end)
+            if text[end] == "}":
+                return payload
+            if text[end] != ",":
+                raise ValueError(f"Expecting ',' at {end}")
+            end = _skip(text, end + 1)
+    except IndexError:
+        raise ValueError("Truncated JSON") from None
+
+# One result of a list, trending or search endpoint, built off the GUI thread. Reads like
+# the TMDb dict it came from (get, [], in), with missing and null fields alike absent, so
+# views mix these with the dicts the local catalog store and recommender return.
+class ListItem:
+    __slots__ = LIST_FIELDS
+
+    def __init__(self, item):
+        for field in LIST_FIELDS:
+            setattr(self, field, item.get(field))
+        if self.known_for:
+            self.known_for = [ListItem(entry) for entry in self.known_for[:KNOWN_FOR_COUNT]]
+
+    def get(self, field, default=None):
+        value = getattr(self, field) if field in _LIST_FIELD_SET else None
+        return default if value is None else value
+
+    def __getitem__(self, field):
+        value = self.get(field)
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def __contains__(self, field):
+        return self.get(field) is not None
+
+    # Plain dict of the fields present, e.g. as json.dumps(default=ListItem.to_dict)
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in LIST_FIELDS if getattr(self, field) is not None}
+        if "known_for" in data:
+            data["known_for"] = [entry.to_dict() for entry in data["known_for"]]
+        return data
+
+    def __repr__(self):
+        return f"ListItem({self.to_dict()!r})"
+
+# One page of a list, trending or search endpoint, with its results as ListItem records
+class Page:
+    __slots__ = ("items", "page", "total_pages", "ok")
+
+    def __init__(self, items, page, total_pages, ok=True):
+        self.items = items
+        self.page = page
+        self.total_pages = total_pages
+        self.ok = ok
+
+    # An empty payload is how a failed request is reported
+    @classmethod
+    def from_response(cls, data, page):
+        if not data:
+            return cls([], page, page - 1, ok=False)
+        return cls([ListItem(item) for item in data.get("results", [])], data.get("page", page),
+                   min(data.get("total_pages", 1), MAX_PAGES))
+
+# Movie or TV show details from an append_to_response payload
+class MediaDetails:
+    __slots__ = ("content_type", "id", "title", "poster_path", "rating", "date", "genres", "runtime",
+                 "episodes", "overview", "cast", "providers", "recommendations", "data")
+
+    def __init__(self, content_type, item_id, data):
+        self.content_type = content_type
+        self.id = item_id
+        self.title = data.get("title") or data.get("name", "Unknown")
+        self.poster_path = data.get("poster_path")
+        self.rating = data.get("vote_average", 0)
+        self.date = data.get("release_date") or data.get("first_air_date")
+        self.genres = [genre["name"] for genre in data.get("genres", [])]
+        self.runtime = data.get("runtime")  # Minutes, movies only
+        self.episodes = data.get("number_of_episodes")  # TV only
+        self.overview = data.get("overview", "Not available")
+        # None when the payload has no credits, as opposed to an empty cast
+        self.cast = None
+        if "credits" in data:
+            self.cast = [CastMember(member.get("name", "Unknown"), member.get("character", "Unknown"),
+                                    member.get("profile_path"))
+                         for member in data["credits"].get("cast", [])[:10]]
+        # None when the title is not offered in WATCH_REGION at all
+        self.providers = None
+        region = data.get("watch/providers", {}).get("results", {}).get(WATCH_REGION)
+        if region is not None:
+            self.providers = [Provider(provider.get("provider_name", "Unknown"), provider.get("logo_path"))
+                              for provider in region.get("flatrate", [])[:6]]
+        self.recommendations = data.get("recommendations", {}).get("results", [])[:10]
+        self.data = data  # Full payload, e.g. for the local catalog
+
+# Person details from an append_to_response payload
+class PersonDetails:
+    __slots__ = ("content_type", "id", "name", "profile_path", "real_name", "birthday", "age",
+                 "birthplace", "biography", "known_for", "gallery", "data")
+
+    def __init__(self, item_id, data):
+        self.content_type = "person"
+        self.id = item_id
+        self.name = data.get("name", "Unknown")
+        self.profile_path = data.get("profile_path")
+        also_known_as = data.get("also_known_as", [])
+        self.real_name = also_known_as[0] if also_known_as and also_known_as[0] != self.name else None
+        self.birthday = data.get("birthday")
+        self.age = None
+        if self.birthday:
+            try:
+                self.age = (datetime.now() - datetime.strptime(self.birthday, "%Y-%m-%d")).days // 365
+            except ValueError:
+                self.birthday = None
+        self.birthplace = data.get("place_of_birth")
+        self.biography = data.get("biography")
+        cast = sorted(data.get("combined_credits", {}).get("cast", []),
+                      key=lambda role: role.get("popularity", 0), reverse=True)[:5]
+        self.known_for = [Role(role.get("title") or role.get("name") or "Unknown",
+                               "Movie" if role.get("media_type") == "movie" else "TV Show",
+                               role.get("character") or "Unknown", role.get("poster_path"))
+                          for role in cast]
+        self.gallery = [image["file_path"] for image in data.get("images", {}).get("profiles", [])[:10]]
+        self.data = data
+
+# Shapes a details payload; returns None for an empty (failed) one
+def details_from_payload(content_type, item_id, data):
+    if not data:
+        return None
+    if content_type == "person":
+        return PersonDetails(item_id, data)
+    return MediaDetails(content_type, item_id, data)
+
+# Identical requests in flight at the same time (the same list from two tabs, a detail view
+# opened while its prefetch is running, a poster in two grids) share one download and one
+# parsed result. The shared dicts are read-only to every caller, as cached ones already are.
+json_flights = tmdb_http.SingleFlight()
+image_flights = tmdb_http.SingleFlight()
+
+# Downloads and parses a JSON response and stores it in the cache. Returns (data, bytes);
+# concurrent calls for the same request share one download. List results are reduced to the
+# cached fields as they are parsed (see parse_list_payload), and to LIST_FIELDS only when
+# Page shapes them for display.
+def download_json(url, params, headers=None, cache=None):
+    cache = cache or get_response_cache()
+    key = cache.key(url, params)
+    if headers:
+        key = (key, tuple(sorted(headers.items())))
+    return json_flights.do(key, lambda: _download_json(url, params, headers, cache))
+
+def _download_json(url, params, headers, cache):
+    response = tmdb_http.get(url, params=params, headers=headers)
+    response.raise_for_status()
+    with tracing.span("json", "parse", bytes=len(response.content)):
+        if endpoint_class(url) in LIST_ENDPOINTS and url.startswith(tmdb_http.TMDB_API_HOST):
+            data = parse_list_payload(response.text)
+        else:
+            data = response.json()
+    with tracing.span("cache store", "cache"):
+        cache.store(url, params, data)
+    return data, len(response.content)
+
+# Yields the response for a request through the shared TTL cache: a fresh entry alone, or a
+# stale one followed by the revalidated data if it changed. A failed request with nothing
+# cached yields {}. Runs on whatever thread calls it.
+def responses(url, params, headers=None, cache=None):
+    cache = cache or get_response_cache()
+    with tracing.span("cache lookup", "cache"):
+        cached, fresh = cache.lookup(url, params)
+    if cached is not None:
+        yield cached
+        if fresh:
+            return
+    try:
+        data = download_json(url, params, headers, cache)[0]
+        if data != cached:
+            yield data
+    except (tmdb_http.RequestException, ValueError) as e:
+        print(f"API request failed: {e}")
+        if cached is None:
+            yield {}
+
+# Latest data for a request: the revalidated response if there is one, else the cached copy
+def fetch(url, params, headers=None, cache=None):
+    data = {}
+    for data in responses(url, params, headers, cache):
+        pass
+    return data
+
+def image_url(size, file_path):
+    return f"{tmdb_http.TMDB_IMAGE_HOST}/t/p/{size}{file_path}"
+
+# Bytes of an image in a size bucket, from the disk cache or else the CDN (then cached).
+# Concurrent misses for the same image share one download.
+# Raises tmdb_http.RequestException if the download fails.
+def image_bytes(size, file_path, image_cache):
+    with tracing.span("image disk read", "image"):
+        data = image_cache.get_image(size, file_path)
+    if data is None:
+        data = image_flights.do((size, file_path), lambda: _download_image(size, file_path, image_cache))
+    return data
+
+def _download_image(size, file_path, image_cache):
+    with tracing.span("image download", "image", size=size):
+        response = tmdb_http.get(image_url(size, file_path))
+        response.raise_for_status()
+        data = response.content
+    image_cache.put_image(size, file_path, data)
+    return data
+
+# Builds TMDb requests for one API key and runs them through the caches
+class TMDbClient:
+    def __init__(self, api_key, cache=None, image_cache=None):
+        self.api_key = api_key
+        self.cache = cache or get_response_cache()
+        self.image_cache = image_cache or ImageCache()
+
+    # Trending lists take a time window; the other categories (popular, top_rated, ...) do not
+    def list_request(self, content_type, filter_type, time_window="day"):
+        if filter_type == "trending":
+            url = f"{tmdb_http.TMDB_API_BASE}/trending/{content_type}/{time_window}"
+        else:
+            url = f"{tmdb_http.TMDB_API_BASE}/{content_type}/{filter_type}"
+        return url, {"api_key": self.api_key}
+
+    def search_request(self, content_type, query):
+        return f"{tmdb_http.TMDB_API_BASE}/search/{content_type}", {"api_key": self.api_key, "query": query}
+
+    def latest_request(self, content_type):
+        return f"{tmdb_http.TMDB_API_BASE}/{content_type}/latest", {"api_key": self.api_key}
+
+    # The append_to_response request a detail view makes for an item
+    def detail_request(self, content_type, item_id):
+        return f"{tmdb_http.TMDB_API_BASE}/{content_type}/{item_id}", {
+            "api_key": self.api_key,
+            "append_to_response": tmdb_http.DETAIL_APPEND_TO_RESPONSE[content_type]
+        }
+
+    def page(self, content_type, filter_type, time_window="day", page=1):
+        url, params = self.list_request(content_type, filter_type, time_window)
+        return Page.from_response(fetch(url, dict(params, page=page), cache=self.cache), page)
+
+    def search(self, content_type, query, page=1):
+        url, params = self.search_request(content_type, query)
+        return Page.from_response(fetch(url, dict(params, page=page), cache=self.cache), page)
+
+    # The newest item of a type, as a TMDb-shaped dict, or None
+    def latest(self, content_type):
+        return fetch(*self.latest_request(content_type), cache=self.cache) or None
+
+    def details(self, content_type, item_id):
+        url, params = self.detail_request(content_type, item_id)
+        return details_from_payload(content_type, item_id, fetch(url, params, cache=self.cache))
+
+    # (details, is_fresh) from the response cache alone; details is None on a miss
+    def cached_details(self, content_type, item_id):
+        url, params = self.detail_request(content_type, item_id)
+        data, fresh = self.cache.lookup(url, params)
+        return details_from_payload(content_type, item_id, data), fresh
+
+    # Fetches a detail payload and its main image into the caches unless they are already
+    # there. Returns the number of bytes downloaded, or None on failure.
+    def prefetch_details(self, content_type, item_id, ratio=1.0):
+        url, params = self.detail_request(content_type, item_id)
+        downloaded = 0
+        try:
+            data, fresh = self.cache.lookup(url, params)
+            if not fresh:
+                data, size = download_json(url, params, cache=self.cache)
+                downloaded += size
+            kind, field, width, height = DETAIL_IMAGES[content_type]
+            size = tmdb_http.image_size(kind, width, height, ratio)
+            image_path = data.get(field)
+            if image_path and not self.image_cache.has_image(size, image_path):
+                downloaded += len(image_bytes(size, image_path, self.image_cache))
+        except (tmdb_http.RequestException, ValueError) as e:
+            print(f"Prefetch failed: {e}")
+            return None
+        return downloaded
+
+def _print_items(items):
+    for item in items:
+        title = item.get("title") or item.get("name", "Unknown")
+        date = item.get("release_date") or item.get("first_air_date") or ""
+        print(f"{item.get('id'):>9}  {item.get('vote_average', 0):4.1f}  {date:<10}  {title}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query TMDb through the WatchX caches")
+    sub = parser.add_subparsers(dest="command", required=True)
+    lists = sub.add_parser("list", help="one page of a trending or category list")
+    lists.add_argument("content_type", choices=["movie", "tv", "person"])
+    lists.add_argument("filter_type", help="trending, popular, top_rated, now_playing, ...")
+    lists.add_argument("--window", default="day", choices=["day", "week"])
+    lists.add_argument("--page", type=int, default=1)
+    search = sub.add_parser("search", help="one page of search results")
+    search.add_argument("content_type", choices=["movie", "tv", "person"])
+    search.add_argument("query")
+    search.add_argument("--page", type=int, default=1)
+    details = sub.add_parser("details", help="details of one item")
+    details.add_argument("content_type", choices=["movie", "tv", "person"])
+    details.add_argument("id", type=int)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = os.getenv("TMDB_API_KEY")
+    if not api_key:
+        parser.error("TMDB_API_KEY is not set")
+    client = TMDbClient(api_key)
+    if args.command == "details":
+        result = client.details(args.content_type, args.id)
+        if result is None:
+            sys.exit("Failed to load details")
+        for name in result.__slots__:
+            if name != "data":
+                print(f"{name}: {getattr(result, name)}")
+        return
+    if args.command == "list":
+        page = client.page(args.content_type, args.filter_type, args.window, args.page)
+    else:
+        page = client.search(args.content_type, args.query, args.page)
+    if not page.ok:
+        sys.exit("Request failed")
+    _print_items(page.items)
+    print(f"page {page.page} of {page.total_pages}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import tracing
+
+# requests and urllib3 are imported on first use, which is on a worker thread in the GUI, so
+# they stay off the startup path. RequestException resolves to requests' base exception
+# class; an except clause only looks it up once an exception is raised.
+def __getattr__(name):
+    if name == "RequestException":
+        import requests
+        return requests.exceptions.RequestException
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Overridable to point the app at a local stand-in such as mock_tmdb.py
+TMDB_API_HOST = os.getenv("WATCHX_TMDB_API_HOST", "https://api.themoviedb.org").rstrip("/")
+TMDB_IMAGE_HOST = os.getenv("WATCHX_TMDB_IMAGE_HOST", "https://image.tmdb.org").rstrip("/")
+TMDB_API_BASE = f"{TMDB_API_HOST}/3"
+
+# Sub-resources bundled into a details request, shared by DetailDialog and catalog ingestion
+DETAIL_APPEND_TO_RESPONSE = {
+    "movie": "credits,videos,reviews,recommendations,watch/providers,keywords",
+    "tv": "credits,videos,reviews,recommendations,watch/providers,keywords",
+    "person": "combined_credits,images",
+}
+
+# Size buckets the image CDN serves per kind of image, smallest first (see /configuration).
+# "w" buckets are limited by width, the profile bucket "h632" by height.
+IMAGE_SIZES = {
+    "poster": ("w92", "w154", "w185", "w342", "w500", "w780"),
+    "profile": ("w45", "w185", "h632"),
+    "logo": ("w45", "w92", "w154", "w185", "w300", "w500"),
+}
+
+# Smallest bucket covering a width x height box at the given device pixel ratio
+def image_size(kind, width, height, ratio=1.0):
+    for size in IMAGE_SIZES[kind]:
+        if int(size[1:]) >= (width if size[0] == "w" else height) * ratio:
+            return size
+    return "original"
+
+# Keep-alive connections held open per host; images get more because grids fetch them in parallel
+POOL_SIZES = {
+    TMDB_API_HOST: int(os.getenv("WATCHX_API_POOL_SIZE", "8")),
+    TMDB_IMAGE_HOST: int(os.getenv("WATCHX_IMAGE_POOL_SIZE", "16")),
+}
+DEFAULT_POOL_SIZE = 4
+CONNECT_TIMEOUT = float(os.getenv("WATCHX_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("WATCHX_READ_TIMEOUT", "10"))
+
+# Client-side request budgets per host (requests per second and burst size); TMDb rejects
+# bursts past its per-key limit with 429
+API_RATE = float(os.getenv("WATCHX_API_RATE", "40"))
+API_BURST = float(os.getenv("WATCHX_API_BURST", "20"))
+IMAGE_RATE = float(os.getenv("WATCHX_IMAGE_RATE", "100"))
+IMAGE_BURST = float(os.getenv("WATCHX_IMAGE_BURST", "50"))
+MAX_THROTTLE_RETRIES = 5  # 429s a single request waits out before its 429 is returned
+MAX_RETRY_AFTER = 60.0  # Longest pause honoured from a Retry-After header
+
+# Request queues, served in this order by the rate governors
+QUEUE_INTERACTIVE = 0  # What the user is looking at
+QUEUE_PREFETCH = 1
+QUEUE_INGESTION = 2
+
+# Retries connection errors and 5xx responses with exponential backoff. 429s are left to the
+# rate governors, which pause the whole queue for the host rather than one request; urllib3
+# would otherwise retry any 429 carrying Retry-After itself, so that header is not honoured here.
+def _retry_policy():
+    from urllib3.util.retry import Retry
+    return Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+
+# Adapters own the urllib3 connection pools, so every session that mounts them
+# reuses the same keep-alive connections
+def _build_adapters():
+    from requests.adapters import HTTPAdapter
+    adapters = {host: HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=_retry_policy())
+                for host, size in POOL_SIZES.items()}
+    adapters["https://"] = HTTPAdapter(pool_maxsize=DEFAULT_POOL_SIZE, max_retries=_retry_policy())
+    adapters["http://"] = HTTPAdapter(pool_maxsize=DEFAULT_POOL_SIZE, max_retries=_retry_policy())
+    if tracing.enabled:
+        pool_classes = _traced_pool_classes()
+        for adapter in adapters.values():
+            adapter.poolmanager.pool_classes_by_scheme = pool_classes
+    return adapters
+
+# urllib3 pools whose new connections are traced: "connect" covers DNS, TCP and TLS, the
+# nested "dns+tcp" span the socket alone, so TLS is the difference
+def _traced_pool_classes():
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class TracedConnection:
+        def connect(self):
+            with tracing.span("connect", "http", host=self.host):
+                super().connect()
+
+        def _new_conn(self):
+            with tracing.span("dns+tcp", "http", host=self.host):
+                return super()._new_conn()
+
+    class TracedHTTPConnection(TracedConnection, HTTPConnection):
+        pass
+
+    class TracedHTTPSConnection(TracedConnection, HTTPSConnection):
+        pass
+
+    class TracedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TracedHTTPConnection
+
+    class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TracedHTTPSConnection
+
+    return {"http": TracedHTTPConnectionPool, "https": TracedHTTPSConnectionPool}
+
+_adapters = None
+_adapters_lock = threading.Lock()
+_local = threading.local()
+
+# Returns this thread's Session. requests.Session is not guaranteed thread-safe, so each
+# thread gets its own, but all of them share the pooled adapters above.
+def get_session():
+    global _adapters
+    session = getattr(_local, "session", None)
+    if session is None:
+        with _adapters_lock:
+            if _adapters is None:
+                _adapters = _build_adapters()
+        import requests
+        session = requests.Session()
+        for prefix, adapter in _adapters.items():
+            session.mount(prefix, adapter)
+        _local.session = session
+    return session
+
+# Token bucket shared by every thread sending to one host. Waiting requests are served by
+# queue (interactive, prefetch, ingestion), then in arrival order; a 429 pauses the bucket
+# for its Retry-After so everything queued behind it waits instead of failing.
+class RateGovernor:
+    def __init__(self, name, rate, burst=None):
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+        self.waiting = []  # Heap of (queue, sequence) tickets
+        self.sequence = itertools.count()
+        self.throttled = 0  # 429s received
+        self.queue_limits = {}  # Queue -> [rate, tokens, updated] for queues with their own cap
+
+    # Caps one queue at `rate` requests per second within the host's budget, e.g. so a bulk
+    # ingestion run leaves headroom for the app sharing the same API key
+    def limit_queue(self, queue, rate):
+        with self.condition:
+            self.queue_limits[queue] = [float(rate), float(rate), time.monotonic()]
+
+    # Blocks until the caller's ticket is first in line, the bucket has a token and the host
+    # is not paused
+    def acquire(self, queue=QUEUE_INTERACTIVE):
+        started = time.perf_counter()
+        with self.condition:
+            ticket = (queue, next(self.sequence))
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now > self.updated:
+                        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                        self.updated = now
+                    limit = self.queue_limits.get(queue)
+                    if limit is not None and now > limit[2]:
+                        limit[1] = min(limit[0], limit[1] + (now - limit[2]) * limit[0])
+                        limit[2] = now
+                    if now < self.paused_until:
+                        self.condition.wait(self.paused_until - now)
+                    elif self.waiting[0] != ticket:
+                        self.condition.wait()  # The head of the line notifies when it leaves
+                    elif self.tokens >= 1 and (limit is None or limit[1] >= 1):
+                        self.tokens -= 1
+                        if limit is not None:
+                            limit[1] -= 1
+                        break
+                    elif self.tokens < 1:
+                        self.condition.wait((1 - self.tokens) / self.rate)
+                    else:
+                        self.condition.wait((1 - limit[1]) / limit[0])
+            finally:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.condition.notify_all()
+        if tracing.enabled and time.perf_counter() - started > 0.001:
+            tracing.record("rate wait", started, "http", governor=self.name, queue=queue)
+
+    # Stops handing out tokens for `seconds`, e.g. after a 429 with Retry-After. The bucket
+    # restarts empty, so the queue drains at the steady rate rather than in one burst.
+    def pause(self, seconds):
+        with self.condition:
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+            self.condition.notify_all()
+
+api_governor = RateGovernor("api", API_RATE, API_BURST)
+image_governor = RateGovernor("image", IMAGE_RATE, IMAGE_BURST)
+
+# Governor for a URL, or None for hosts other than TMDb's
+def governor_for(url):
+    if url.startswith(f"{TMDB_IMAGE_HOST}/t/p/"):
+        return image_governor
+    if url.startswith(TMDB_API_HOST):
+        return api_governor
+    return None
+
+# Queue the requests made on this thread inside the block belong to
+@contextmanager
+def request_queue(queue):
+    outer = getattr(_local, "queue", QUEUE_INTERACTIVE)
+    _local.queue = queue
+    try:
+        yield
+    finally:
+        _local.queue = outer
+
+# Seconds to wait from a Retry-After header (delta seconds or an HTTP date); 1 if absent
+def retry_after(response):
+    value = response.headers.get("Retry-After", "")
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            seconds = 1.0
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+def _send(url, params, headers, timeout):
+    if not tracing.enabled:
+        return get_session().get(url, params=params, headers=headers,
+                                 timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+    with tracing.span("http GET", "http", path=urlsplit(url).path) as span:
+        response = get_session().get(url, params=params, headers=headers,
+                                     timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+        # elapsed runs to the response headers, so it is the time to first byte
+        span.set(status=response.status_code, bytes=len(response.content),
+                 ttfb_ms=round(response.elapsed.total_seconds() * 1000, 2))
+        return response
+
+# GET through the shared pool with separate connect/read timeouts. Requests to TMDb wait for
+# their host's rate governor (or the one passed in), and a 429 pauses that governor's queue
+# and is retried.
+def get(url, params=None, headers=None, timeout=None, governor=None):
+    governor = governor or governor_for(url)
+    if governor is None:
+        return _send(url, params, headers, timeout)
+    queue = getattr(_local, "queue", QUEUE_INTERACTIVE)
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        governor.acquire(queue)
+        response = _send(url, params, headers, timeout)
+        if response.status_code != 429 or attempt == MAX_THROTTLE_RETRIES:
+            return response
+        governor.pause(retry_after(response))
+
+# Outcome of one SingleFlight call, shared with every caller that joined it
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+# A fresh exception for a caller that joined a failed flight, so the original's traceback is
+# not extended from several threads at once. Keeps the type where its constructor allows
+# (callers catch RequestException and friends); otherwise falls back to RuntimeError.
+def _shared_error(error):
+    try:
+        shared = type(error)(*error.args)
+    except Exception:
+        return RuntimeError(f"shared call failed: {error!r}")
+    for name in ("response", "request"):  # requests exceptions carry the exchange that failed
+        if hasattr(error, name):
+            setattr(shared, name, getattr(error, name))
+    return shared
+
+# Coalesces concurrent identical work: the first caller for a key runs fn, callers arriving
+# while it runs block and receive the same result instead of repeating it. If fn fails, each
+# of them gets a new exception of the same type chained to the original. Nothing is kept once
+# the call returns; caching results is left to the caller.
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}  # Key -> _Flight in progress
+        self.shared = 0  # Calls answered by another caller's flight
+
+    def do(self, key, fn):
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise _shared_error(flight.error) from flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
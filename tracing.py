@@ -0,0 +1,127 @@
+import atexit
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Span-based latency tracing for the hot paths (API fetches, HTTP connects, JSON parsing,
+# image download, decode and scaling, grid and dialog construction).
+#
+# WATCHX_TRACE turns it on: "1" records into the ring buffer, a path ending in .json also
+# writes a Chrome trace there at exit (open it in chrome://tracing or ui.perfetto.dev).
+# Switched off, span() returns a shared no-op context manager, and call sites that run per
+# tile or per frame test `tracing.enabled` first, so the cost is a global lookup.
+
+TRACE = os.getenv("WATCHX_TRACE", "")
+TRACE_BUFFER = int(os.getenv("WATCHX_TRACE_BUFFER", "20000"))  # Spans kept, oldest dropped first
+
+enabled = bool(TRACE)
+_spans = deque(maxlen=TRACE_BUFFER)  # (name, category, start_us, duration_us, thread, request_id, args)
+_request_ids = itertools.count(1)
+_local = threading.local()
+_origin = time.perf_counter()
+
+def new_request_id():
+    return next(_request_ids)
+
+# Request id of the innermost span open on this thread, inherited by spans nested in it
+def current_request_id():
+    return getattr(_local, "request_id", None)
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "category", "request_id", "args", "start", "outer_request_id")
+
+    def __init__(self, name, category, request_id, args):
+        self.name = name
+        self.category = category
+        self.request_id = request_id
+        self.args = args
+
+    def __enter__(self):
+        self.outer_request_id = current_request_id()
+        if self.request_id is None:
+            self.request_id = self.outer_request_id
+        _local.request_id = self.request_id
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end = time.perf_counter()
+        _local.request_id = self.outer_request_id
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _spans.append((self.name, self.category, (self.start - _origin) * 1e6, (end - self.start) * 1e6,
+                       threading.get_ident(), self.request_id, self.args))
+        return False
+
+    # Attaches results known only at the end, e.g. a status code or byte count
+    def set(self, **args):
+        self.args.update(args)
+
+# Context manager timing the block it wraps; a no-op unless tracing is enabled
+def span(name, category="app", request_id=None, **args):
+    if not enabled:
+        return NULL_SPAN
+    return _Span(name, category, request_id, args)
+
+# Records a span measured elsewhere, e.g. from a start time kept across callbacks
+def record(name, start, category="app", request_id=None, **args):
+    if enabled:
+        _spans.append((name, category, (start - _origin) * 1e6, (time.perf_counter() - start) * 1e6,
+                       threading.get_ident(), request_id if request_id is not None else current_request_id(), args))
+
+def spans():
+    return list(_spans)
+
+def clear():
+    _spans.clear()
+
+# Count, median and 95th percentile duration in ms of each span name in the buffer,
+# optionally only spans that ended in the last `seconds`
+def summary(seconds=None):
+    cutoff = (time.perf_counter() - _origin - seconds) * 1e6 if seconds else None
+    durations = {}
+    for name, _, start, duration, _, _, _ in list(_spans):
+        if cutoff is None or start + duration >= cutoff:
+            durations.setdefault(name, []).append(duration / 1000)
+    result = {}
+    for name, values in durations.items():
+        values.sort()
+        result[name] = (len(values), values[len(values) // 2], values[min(len(values) - 1, int(len(values) * 0.95))])
+    return result
+
+# Writes the buffer as Chrome trace event JSON and returns the number of spans written
+def export_chrome_trace(path):
+    pid = os.getpid()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    records = list(_spans)
+    events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": names.get(tid, f"thread-{tid}")}}
+              for tid in {record[4] for record in records}]
+    for name, category, start, duration, tid, request_id, args in records:
+        event_args = dict(args, request_id=request_id) if request_id is not None else args
+        events.append({"name": name, "cat": category, "ph": "X", "ts": round(start, 1), "dur": round(duration, 1),
+                       "pid": pid, "tid": tid, "args": event_args})
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+    return len(records)
+
+if TRACE.endswith(".json"):
+    atexit.register(lambda: export_chrome_trace(TRACE))
@@ -0,0 +1,174 @@
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from tmdb_cache import CACHE_DIR
+
+# Favorites and viewing history, kept in SQLite in WAL mode and keyed by (content_type, id),
+# so a movie and a person that share an id are separate entries.
+# Both tables are read into memory when the store opens, so the membership checks the grid
+# makes for every painted tile are dict lookups that never touch the database. Changes
+# apply to memory at once and are written by a background thread, which commits whatever
+# queued up within WRITE_DELAY_MS in one transaction; close() flushes the rest.
+# The store may be opened on a worker thread; after that its in-memory state belongs to the
+# one thread that uses it (the GUI thread).
+
+USER_DB_PATH = os.getenv("WATCHX_USER_DB", os.path.join(CACHE_DIR, "user.db"))
+WRITE_DELAY_MS = float(os.getenv("WATCHX_USER_WRITE_DELAY_MS", "250"))  # Batching window for writes
+HISTORY_LIMIT = 500  # Most recently viewed items kept
+
+# Weight of each kind of signal in the recommender's profile of the user
+FAVORITE_WEIGHT = 1.0
+VIEW_WEIGHT = 0.25  # Per view of an item's details
+MAX_VIEW_WEIGHT = 0.75
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS favorites (
+    content_type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (content_type, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history (
+    content_type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT,
+    viewed_at REAL NOT NULL,
+    views INTEGER NOT NULL,
+    PRIMARY KEY (content_type, id)
+) WITHOUT ROWID;
+"""
+
+def _connect(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # Durable to the last committed batch short of a power cut
+    connection.executescript(SCHEMA)
+    return connection
+
+class UserStore:
+    def __init__(self, path=USER_DB_PATH):
+        self.path = path
+        self.connection = _connect(path)
+        self.favorites = {(content_type, item_id): (title, added_at) for content_type, item_id, title, added_at
+                          in self.connection.execute("SELECT content_type, id, title, added_at FROM favorites")}
+        self.history = {(content_type, item_id): (title, viewed_at, views) for content_type, item_id, title, viewed_at, views
+                        in self.connection.execute("SELECT content_type, id, title, viewed_at, views FROM history")}
+        self.writes = queue.Queue()  # (sql, params) statements, None to stop the writer
+        self.writer = threading.Thread(target=self._write_loop, name="user-store-writer", daemon=True)
+        self.writer.start()
+
+    def is_favorite(self, content_type, item_id):
+        return (content_type, item_id) in self.favorites
+
+    def add_favorite(self, content_type, item_id, title=None):
+        added_at = time.time()
+        self.favorites[(content_type, item_id)] = (title, added_at)
+        self.writes.put(("INSERT OR REPLACE INTO favorites VALUES (?, ?, ?, ?)", (content_type, item_id, title, added_at)))
+
+    def remove_favorite(self, content_type, item_id):
+        if self.favorites.pop((content_type, item_id), None) is not None:
+            self.writes.put(("DELETE FROM favorites WHERE content_type = ? AND id = ?", (content_type, item_id)))
+
+    # Flips an item's favorite state and returns the new one
+    def toggle_favorite(self, content_type, item_id, title=None):
+        if self.is_favorite(content_type, item_id):
+            self.remove_favorite(content_type, item_id)
+            return False
+        self.add_favorite(content_type, item_id, title)
+        return True
+
+    # (content_type, id) of every favorite, oldest first
+    def favorite_keys(self):
+        return sorted(self.favorites, key=lambda key: self.favorites[key][1])
+
+    # Counts a view of an item's details; only the HISTORY_LIMIT most recent items are kept
+    def record_view(self, content_type, item_id, title=None):
+        key = (content_type, item_id)
+        viewed_at = time.time()
+        views = self.history.get(key, (None, 0, 0))[2] + 1
+        self.history[key] = (title, viewed_at, views)
+        self.writes.put(("INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?)",
+                         (content_type, item_id, title, viewed_at, views)))
+        if len(self.history) > HISTORY_LIMIT:
+            oldest = min(self.history, key=lambda key: self.history[key][1])
+            del self.history[oldest]
+            self.writes.put(("DELETE FROM history WHERE content_type = ? AND id = ?", oldest))
+
+    # (content_type, id, title, viewed_at, views) of the most recently viewed items
+    def recent(self, limit=20):
+        keys = sorted(self.history, key=lambda key: self.history[key][1], reverse=True)[:limit]
+        return [key + self.history[key] for key in keys]
+
+    # {(content_type, id): weight} of everything the user favorited or looked at, for the
+    # recommender's profile of the user
+    def signals(self):
+        weights = {key: min(views * VIEW_WEIGHT, MAX_VIEW_WEIGHT) for key, (_, _, views) in self.history.items()}
+        for key in self.favorites:
+            weights[key] = weights.get(key, 0.0) + FAVORITE_WEIGHT
+        return weights
+
+    # Blocks until every change made so far is committed
+    def flush(self):
+        self.writes.join()
+
+    # Commits outstanding changes and stops the writer
+    def close(self):
+        if self.writer.is_alive():
+            self.writes.put(None)
+            self.writer.join()
+
+    def _write_loop(self):
+        while True:
+            batch = [self.writes.get()]
+            if batch[0] is not None:
+                time.sleep(WRITE_DELAY_MS / 1000)  # Lets a burst of changes share one commit
+            while True:
+                try:
+                    batch.append(self.writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self.connection:
+                    for statement in batch:
+                        if statement is not None:
+                            self.connection.execute(*statement)
+            except sqlite3.Error as e:
+                print(f"Saving favorites and history failed: {e}")
+            for _ in batch:
+                self.writes.task_done()
+            if None in batch:
+                self.connection.close()
+                return
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the saved favorites and viewing history")
+    parser.add_argument("--db", default=USER_DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("favorites", help="favorites, oldest first")
+    history = sub.add_parser("history", help="most recently viewed items")
+    history.add_argument("-n", type=int, default=20)
+    args = parser.parse_args()
+
+    store = UserStore(args.db)
+    try:
+        if args.command == "favorites":
+            for content_type, item_id in store.favorite_keys():
+                title, added_at = store.favorites[(content_type, item_id)]
+                print(f"{_format_time(added_at)}  {content_type:<6} {item_id:>9}  {title or ''}")
+        else:
+            for content_type, item_id, title, viewed_at, views in store.recent(args.n):
+                print(f"{_format_time(viewed_at)}  {content_type:<6} {item_id:>9}  {views:>3}x  {title or ''}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()